@@ -19,11 +19,17 @@ from __future__ import unicode_literals
 import io
 import os
 import re
+import sys
 
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 __author__ = 'Cedric Zhuang'
 
+# modules using `async def`, which could not be compiled before python 3.5
+ASYNC_MODULES = [('storops.connection', 'async_connector'),
+                 ('storops.unity', 'async_client')]
+
 
 def version():
     desc = get_long_description()
@@ -62,6 +68,16 @@ def get_long_description():
     return read(filename)
 
 
+class BuildPy(build_py):
+    """ skips the asyncio modules when built with python older than 3.5. """
+
+    def find_package_modules(self, package, package_dir):
+        ret = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 5):
+            ret = [(p, m, f) for p, m, f in ret if (p, m) not in ASYNC_MODULES]
+        return ret
+
+
 setup(
     name='storops',
     version=version(),
@@ -94,5 +110,6 @@ setup(
         'License :: OSI Approved :: Apache Software License',
     ],
     install_requires=read_requirements('requirements.txt'),
-    tests_require=read_requirements('test-requirements.txt')
+    tests_require=read_requirements('test-requirements.txt'),
+    cmdclass={'build_py': BuildPy}
 )
@@ -0,0 +1,177 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" asyncio version of the Unity REST connector.
+
+Requires python 3.5+ and `aiohttp`.
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import json
+import logging
+import ssl
+import time
+
+from storops.connection import exceptions
+from storops.connection.connector import UnityRESTConnector
+from storops.connection.exceptions import HTTPClientError
+from storops.exception import StoropsConnectTimeoutError
+from storops.lib import common
+
+aiohttp = common.try_import('aiohttp')
+
+log = logging.getLogger(__name__)
+
+
+class AsyncResponse(object):
+    """ the response read from aiohttp.
+
+    It has the same attributes as the `requests` response used by storops,
+    so that it could be used by `exceptions.from_response` and
+    `RestResponse`.
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+
+class AsyncUnityRESTConnector(object):
+    HEADERS = UnityRESTConnector.HEADERS
+
+    def __init__(self, host, port=443, user='admin', password='',
+                 verify=False, retries=None, connect_timeout=30,
+                 application_type=None, pool_maxsize=None):
+        if aiohttp is None:
+            raise ImportError('aiohttp is required by the asyncio client.')
+        self.base_url = 'https://{host}:{port}'.format(host=host, port=port)
+        self.headers = dict(self.HEADERS)
+        if application_type:
+            self.headers['Application-Type'] = application_type
+        if retries is None:
+            retries = 2
+        self.retries = retries
+        self.auth = aiohttp.BasicAuth(user, password)
+        self.connect_timeout = connect_timeout
+        if pool_maxsize is None:
+            pool_maxsize = 10
+        self.pool_maxsize = pool_maxsize
+        self._ssl = self._get_ssl(verify)
+        self._session = None
+
+    @staticmethod
+    def _get_ssl(verify):
+        if isinstance(verify, bool):
+            # `None` for the default certificate check
+            ret = None if verify else False
+        else:
+            ret = ssl.create_default_context(cafile=verify)
+        return ret
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize)
+            timeout = aiohttp.ClientTimeout(connect=self.connect_timeout)
+            # the arrays are usually reached by ip, the default jar drops
+            # the cookies of ip hosts, including the session cookie which
+            # the csrf token is bound to.
+            cookie_jar = aiohttp.CookieJar(unsafe=True)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  auth=self.auth,
+                                                  timeout=timeout,
+                                                  cookie_jar=cookie_jar)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _send(self, method, full_url, headers, data):
+        session = self._get_session()
+        ssl_args = {} if self._ssl is None else {'ssl': self._ssl}
+        async with session.request(method, full_url, headers=headers,
+                                   data=data, **ssl_args) as resp:
+            content = await resp.read()
+            return AsyncResponse(resp.status, resp.headers, content)
+
+    async def request(self, url, method, body=None):
+        full_url = self.base_url + url
+        data = json.dumps(body) if body else None
+        tried = 0
+        while True:
+            tried += 1
+            start = time.time()
+            try:
+                resp = await self._send(method, full_url, self.headers, data)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                if tried > self.retries:
+                    if isinstance(ex, (aiohttp.ServerTimeoutError,
+                                       asyncio.TimeoutError)):
+                        raise StoropsConnectTimeoutError(message=str(ex))
+                    raise
+                log.debug('Failed to send [{}] {}, retry. Reason: {}'
+                          .format(method, full_url, ex))
+                await asyncio.sleep(2 ** (tried - 1))
+        log.debug('REQ URL: [{}] {}, TIME: {}, RESP CODE: {}'
+                  .format(method, full_url, time.time() - start,
+                          resp.status_code))
+
+        ret = None
+        if resp.content:
+            try:
+                ret = resp.json()
+            except ValueError:
+                pass
+
+        # same as the sync client, do NOT retry these errors
+        if resp.status_code in [401, 503]:
+            raise exceptions.from_response(resp, method, full_url)
+        return resp, ret
+
+    async def get(self, url):
+        return await self.request(url, 'GET')
+
+    async def post(self, url, body=None):
+        return await self._request_with_csrf_token(url, 'POST', body)
+
+    async def delete(self, url, body=None):
+        return await self._request_with_csrf_token(url, 'DELETE', body)
+
+    async def _request_with_csrf_token(self, url, method, body=None):
+        tried = 0
+        while True:
+            try:
+                return await self.request(url, method, body=body)
+            except HTTPClientError as err:
+                if err.http_status != 401 or tried >= self.retries:
+                    raise
+                tried += 1
+                await self._update_csrf_token()
+
+    async def _update_csrf_token(self):
+        path_user = '/api/types/user/instances'
+        resp, _ = await self.get(path_user)
+        self.headers['emc-csrf-token'] = resp.headers['emc-csrf-token']
@@ -16,13 +16,16 @@
 
 from __future__ import unicode_literals
 
-import copy
+import collections
 import json
 import logging
+import re
+import threading
 import time
 
 import requests
 import six
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectTimeout
 from requests.exceptions import RequestException
 from retryz import retry
@@ -41,10 +44,101 @@ def _wait_callback(tried):
     return 2 ** (tried - 1)
 
 
+class ResponseCache(object):
+    """ Thread safe LRU cache of responses with a TTL for each entry.
+
+    Entries are tagged with the resource type in the URL so that they could
+    be invalidated when the resources of that type are changed.
+    """
+    _type_pattern = re.compile(r'^/api/(?:types|instances)/([^/?]+)')
+
+    def __init__(self, ttl, max_size=None):
+        if max_size is None:
+            max_size = 1024
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_key(cls, url, **kwargs):
+        if kwargs:
+            ret = '{} {}'.format(url, json.dumps(kwargs, sort_keys=True,
+                                                 default=str))
+        else:
+            ret = url
+        return ret
+
+    @classmethod
+    def get_type_name(cls, url):
+        match = cls._type_pattern.match(url)
+        if match:
+            ret = match.group(1)
+        else:
+            ret = None
+        return ret
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                # re-insert to mark it as the most recently used one
+                self._entries[key] = entry
+                self.hits += 1
+                ret = entry[2]
+            else:
+                self.misses += 1
+                ret = None
+        return ret
+
+    def put(self, key, url, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), self.get_type_name(url),
+                                  value)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url):
+        type_name = self.get_type_name(url)
+        if type_name is not None:
+            with self._lock:
+                keys = [k for k, v in self._entries.items()
+                        if v[1] == type_name]
+                for k in keys:
+                    del self._entries[k]
+            if keys:
+                log.debug('Invalidate {} cached responses of type: {}'
+                          .format(len(keys), type_name))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # `__getstate__` and `__setstate__` are used by Pickle.
+    # the lock could not be pickled and the cached responses are dropped.
+    def __getstate__(self):
+        return {'ttl': self.ttl, 'max_size': self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['ttl'], state['max_size'])
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self), 'max_size': self.max_size}
+
+
 class HTTPClient(object):
     def __init__(self, base_url, headers, insecure=False, auth=None,
                  timeout=None, retries=None, ca_cert_path=None,
-                 cache_interval=0):
+                 cache_interval=0, cache_size=None, pool_connections=None,
+                 pool_maxsize=None, pool_block=False, keep_alive=True):
         self.base_url = base_url
         if retries is None:
             retries = 2
@@ -52,9 +146,68 @@ class HTTPClient(object):
         self.request_options = self._set_request_options(
             insecure, auth, timeout, ca_cert_path)
         self.headers = headers
-        self.session = requests.session()
+        if not keep_alive:
+            self.headers = dict(headers, Connection='close')
+        self.session = self._new_session(pool_connections, pool_maxsize,
+                                         pool_block)
         self.cache_interval = cache_interval
-        self.cache_dict = {}
+        self.cache = ResponseCache(cache_interval, cache_size)
+
+    @staticmethod
+    def _new_session(pool_connections=None, pool_maxsize=None,
+                     pool_block=False):
+        """ creates the session with the connection pool configured.
+
+        :param pool_connections: number of hosts to keep the pools for.
+        :param pool_maxsize: max connections kept in the pool of each host.
+            it should be no less than the number of the threads sending
+            requests concurrently, otherwise the extra connections are
+            discarded after use.
+        :param pool_block: block the request when no connection is
+            available in the pool instead of opening a new one.
+        """
+        ret = requests.session()
+        if pool_connections is not None or pool_maxsize is not None \
+                or pool_block:
+            adapter_args = {'pool_block': pool_block}
+            if pool_connections is not None:
+                adapter_args['pool_connections'] = pool_connections
+            if pool_maxsize is not None:
+                adapter_args['pool_maxsize'] = pool_maxsize
+            adapter = HTTPAdapter(**adapter_args)
+            ret.mount('https://', adapter)
+            ret.mount('http://', adapter)
+        return ret
+
+    @property
+    def pool_stats(self):
+        """ utilization of the connection pools of this client.
+
+        :return: list of dict, one for each host with a pool.
+        """
+        ret = []
+        adapter = self.session.get_adapter(self.base_url)
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            try:
+                pool = pools[key]
+            except KeyError:
+                # evicted by other threads
+                continue
+            queue = pool.pool
+            if queue is None:
+                # pool closed
+                continue
+            # empty slots of the queue are filled with `None`
+            slots = list(queue.queue)
+            ret.append({'host': pool.host,
+                        'port': pool.port,
+                        'maxsize': queue.maxsize,
+                        'in_use': queue.maxsize - len(slots),
+                        'idle': len([c for c in slots if c is not None]),
+                        'connections': pool.num_connections,
+                        'requests': pool.num_requests})
+        return ret
 
     def __del__(self):
         self.session.close()
@@ -78,16 +231,23 @@ class HTTPClient(object):
         return options
 
     def request(self, full_url, method, **kwargs):
-        headers = copy.deepcopy(self.headers)
-        headers.update(kwargs.get('headers', {}))
-        options = copy.deepcopy(self.request_options)
+        # the shared headers and options are only copied (shallowly) when
+        # they need to be changed for this request.
+        headers = self.headers
+        extra_headers = kwargs.get('headers', None)
+        files = kwargs.get('files', None)
+        if extra_headers or files:
+            headers = dict(headers)
+            if extra_headers:
+                headers.update(extra_headers)
+        options = self.request_options
         content_type = headers.get('Content-Type', None)
         if kwargs.get('body', None):
+            options = dict(options)
             if content_type == 'application/json':
                 options['data'] = json.dumps(kwargs['body'])
             else:
                 options['data'] = kwargs['body']
-        files = kwargs.get('files', None)
         files_opener = None
         if files:
             files_opener = {}
@@ -102,10 +262,12 @@ class HTTPClient(object):
         self.log_response(full_url, method, resp, start)
 
         body = None
-        if resp.text:
+        if resp.content:
             try:
                 if content_type == 'application/json':
-                    body = json.loads(resp.text)
+                    # decode the raw bytes directly, `resp.text` guesses
+                    # the encoding of the content which is expensive.
+                    body = json.loads(resp.content.decode('utf-8'))
                 else:
                     body = resp.text
 
@@ -140,27 +302,41 @@ class HTTPClient(object):
         if self.cache_interval <= 0:
             result = self._cs_request(url, 'GET', **kwargs)
         else:
-            current = time.time()
-            if url in self.cache_dict.keys() and (
-                    current - self.cache_dict.get(url)[
-                    0] < self.cache_interval):
-                result = self.cache_dict[url][1]
+            key = self.cache.get_key(url, **kwargs)
+            result = self.cache.get(key)
+            if result is not None:
                 log.debug('Read response from cache, URL: {}'.format(url))
             else:
                 result = self._cs_request(url, 'GET', **kwargs)
-                current = time.time()
                 log.debug('Write response to cache, URL: {}'.format(url))
-                self.cache_dict[url] = (current, result)
+                self.cache.put(key, url, result)
         return result
 
+    def _invalidate_cache(self, url):
+        if self.cache_interval > 0:
+            self.cache.invalidate(url)
+
     def post(self, url, **kwargs):
-        return self._cs_request(url, 'POST', **kwargs)
+        try:
+            return self._cs_request(url, 'POST', **kwargs)
+        finally:
+            self._invalidate_cache(url)
 
     def put(self, url, **kwargs):
-        return self._cs_request(url, 'PUT', **kwargs)
+        try:
+            return self._cs_request(url, 'PUT', **kwargs)
+        finally:
+            self._invalidate_cache(url)
 
     def delete(self, url, **kwargs):
-        return self._cs_request(url, 'DELETE', **kwargs)
+        try:
+            return self._cs_request(url, 'DELETE', **kwargs)
+        finally:
+            self._invalidate_cache(url)
+
+    @property
+    def cache_stats(self):
+        return self.cache.stats
 
     @classmethod
     def log_request(cls, url, method, data=None):
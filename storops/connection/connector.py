@@ -16,9 +16,13 @@
 
 from __future__ import unicode_literals
 
+import codecs
 import functools
 import logging
 import pipes
+import socket
+import threading
+import time
 
 import six
 from retryz import retry
@@ -55,7 +59,9 @@ class UnityRESTConnector(object):
 
     def __init__(self, host, port=443, user='admin', password='',
                  verify=False, retries=None, cache_interval=0,
-                 connect_timeout=30, application_type=None):
+                 connect_timeout=30, application_type=None,
+                 pool_connections=None, pool_maxsize=None, pool_block=False,
+                 keep_alive=True):
         base_url = 'https://{host}:{port}'.format(host=host, port=port)
 
         insecure = False
@@ -68,14 +74,19 @@ class UnityRESTConnector(object):
         if application_type:
             self.HEADERS['Application-Type'] = application_type
 
-        self.http_client = client.HTTPClient(base_url=base_url,
-                                             headers=self.HEADERS,
-                                             auth=(user, password),
-                                             insecure=insecure,
-                                             retries=retries,
-                                             ca_cert_path=ca_cert_path,
-                                             cache_interval=cache_interval,
-                                             timeout=(connect_timeout, None))
+        self.http_client = client.HTTPClient(
+            base_url=base_url,
+            headers=self.HEADERS,
+            auth=(user, password),
+            insecure=insecure,
+            retries=retries,
+            ca_cert_path=ca_cert_path,
+            cache_interval=cache_interval,
+            timeout=(connect_timeout, None),
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive)
 
     def get(self, url, **kwargs):
         return self.http_client.get(url, **kwargs)
@@ -137,38 +148,250 @@ class XMLAPIConnector(object):
 
 
 class SSHConnector(object):
-    """SSH Connection to the specified host."""
+    """SSH Connection to the specified host.
+
+    A small pool of transports is kept.  Each command runs on its own
+    channel, so the concurrent commands do not wait for each other.  The
+    transports are kept alive, and connected again if dropped.
+    """
+
+    # seconds to wait for the output before checking the stderr again
+    poll_interval = 0.1
+    buffer_size = 32 * 1024
+
+    def __init__(self, host, username, password, port=22, pool_size=2,
+                 keepalive=30):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.port = port
+        self.pool_size = max(1, pool_size)
+        self.keepalive = keepalive
+
+        self._lock = threading.Lock()
+        # {transport: number of the open channels}
+        self._channels = {}
+        self._connecting = 0
 
-    def __init__(self, host, username, password, port=22):
         self.transport = None
         self.init_connection(host, password, port, username)
         self.isLive = True
 
     def init_connection(self, host, password, port, username):
-        self.transport = paramiko.Transport((host, port))
+        self.transport = self._connect(host, password, port, username)
+        with self._lock:
+            self._channels[self.transport] = 0
+
+    def _connect(self, host, password, port, username):
+        transport = paramiko.Transport((host, port))
         # Currently we only support to use the password to ssh.
         if password:
             try:
-                self.transport.connect(username=username, password=password)
+                transport.connect(username=username, password=password)
             except paramiko.ssh_exception.SSHException as ex:
                 error_msg = ('Failed to setup SSH connection. '
                              'Reason:%s.' % six.text_type(ex))
                 LOG.error(error_msg)
                 raise ex
+        if self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        return transport
 
-    def execute(self, command, timeout=None, check_exit_code=True):
-        cmd = ' '.join(pipes.quote(cmd_arg) for cmd_arg in command)
-        channel = self.transport.open_session()
-        channel.exec_command(cmd)
+    def _acquire_transport(self, new=False):
+        """ gets the transport with the least open channels.
+
+        A new transport is connected if all of them are in use and the
+        pool is not full.
+
+        :param new: connect a new transport anyway.
+        """
+        with self._lock:
+            for transport in list(self._channels):
+                if not transport.is_active():
+                    LOG.info('ssh transport to %s dropped.', self.host)
+                    self._remove_transport(transport)
+            ret = None
+            if self._channels and not new:
+                ret = min(self._channels, key=self._channels.get)
+            size = len(self._channels) + self._connecting
+            if ret is None or (self._channels[ret] > 0 and
+                               size < self.pool_size):
+                ret = None
+                self._connecting += 1
+            else:
+                self._channels[ret] += 1
+
+        if ret is None:
+            try:
+                ret = self._connect(self.host, self.password, self.port,
+                                    self.username)
+            finally:
+                with self._lock:
+                    self._connecting -= 1
+            with self._lock:
+                self._channels[ret] = 1
+                self.transport = ret
+        return ret
+
+    def _release_transport(self, transport):
+        with self._lock:
+            if transport in self._channels:
+                self._channels[transport] -= 1
+                if (self._channels[transport] <= 0 and
+                        len(self._channels) > self.pool_size):
+                    self._remove_transport(transport)
+
+    def _remove_transport(self, transport):
+        self._channels.pop(transport, None)
+        try:
+            transport.close()
+        except Exception as ex:
+            LOG.debug('failed to close the ssh transport: %s', ex)
+
+    def _open_channel(self):
+        """ opens a session on the pool.
+
+        If the session could not be opened, like the transport is dropped
+        or the server limits the sessions, it is opened once again on a
+        new transport.
+
+        :return: the transport and the channel.
+        """
+        transport = self._acquire_transport()
+        try:
+            channel = transport.open_session()
+        except Exception as ex:
+            LOG.warning('failed to open ssh session to %s, retry on a new '
+                        'connection. Reason: %s.', self.host,
+                        six.text_type(ex))
+            self._release_transport(transport)
+            transport = self._acquire_transport(new=True)
+            try:
+                channel = transport.open_session()
+            except Exception:
+                self._release_transport(transport)
+                raise
+        return transport, channel
+
+    @staticmethod
+    def _get_command(command):
+        return ' '.join(pipes.quote(cmd_arg) for cmd_arg in command)
+
+    def _read_output(self, channel, stderr, timeout=None):
+        """ yields the stdout in text as it arrives.
+
+        The stderr is read at the same time so that the channel never
+        stalls on a full window, and appended to `stderr`.
+
+        :param timeout: seconds to wait without any output, `socket.timeout`
+            is raised then.  the command itself could run longer.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        err_decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        last_output = time.time()
+        channel.settimeout(self.poll_interval)
+        while True:
+            while channel.recv_stderr_ready():
+                stderr.append(err_decoder.decode(
+                    channel.recv_stderr(self.buffer_size)))
+                last_output = time.time()
+            try:
+                data = channel.recv(self.buffer_size)
+            except socket.timeout:
+                if (timeout is not None and
+                        time.time() - last_output > timeout):
+                    raise
+                continue
+            last_output = time.time()
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text
+
+        # stdout is closed, the rest of stderr is read till the end.
         channel.settimeout(timeout)
-        exit_status = channel.recv_exit_status()
+        while True:
+            data = channel.recv_stderr(self.buffer_size)
+            if not data:
+                break
+            stderr.append(err_decoder.decode(data))
+        stderr.append(err_decoder.decode(b'', final=True))
+
+    def _run(self, cmd, timeout, stderr, status):
+        """ runs the command on its own channel and yields the stdout.
+
+        The stderr is appended to `stderr`, and the exit status to
+        `status` when the command finishes.
+        """
+        transport, channel = self._open_channel()
+        try:
+            channel.exec_command(cmd)
+            try:
+                for text in self._read_output(channel, stderr, timeout):
+                    yield text
+            except socket.timeout:
+                raise SSHExecutionError(
+                    stderr=''.join(stderr), cmd=cmd,
+                    description='No output in {} seconds.'.format(timeout))
+            status.append(channel.recv_exit_status())
+        finally:
+            channel.close()
+            self._release_transport(transport)
+
+    def stream(self, command, timeout=None, check_exit_code=True):
+        """ runs the command and yields the stdout as it arrives.
+
+        :param command: command in list.
+        :param timeout: seconds to wait without any output.
+            `SSHExecutionError` is raised if it expires.
+        :param check_exit_code: raise `SSHExecutionError` if the command
+            fails.  the error is raised after all the output is yielded.
+        :return: generator of the stdout chunks in text.
+        """
+        cmd = self._get_command(command)
+        stderr = []
+        status = []
+        for text in self._run(cmd, timeout, stderr, status):
+            yield text
+
+        stderr = ''.join(stderr)
+        self._ssh_command_log(cmd, '(streamed)', stderr)
+        self._check_exit_status(cmd, status[0], check_exit_code, None,
+                                stderr)
 
-        stdout = channel.makefile('r').read()
-        stderr = channel.makefile_stderr('r').read()
+    def iter_lines(self, command, timeout=None, check_exit_code=True):
+        """ runs the command and yields the lines of the stdout.
 
-        channel.makefile('wb').close()
+        The lines are yielded without the line breaks.
+        """
+        rest = ''
+        for text in self.stream(command, timeout, check_exit_code):
+            lines = (rest + text).split('\n')
+            rest = lines.pop()
+            for line in lines:
+                yield line
+        if rest:
+            yield rest
+
+    def execute(self, command, timeout=None, check_exit_code=True):
+        cmd = self._get_command(command)
+        stderr = []
+        status = []
+        stdout = ''.join(self._run(cmd, timeout, stderr, status))
+
+        stderr = ''.join(stderr)
         self._ssh_command_log(cmd, stdout, stderr)
+        self._check_exit_status(cmd, status[0], check_exit_code, stdout,
+                                stderr)
+        return stdout, stderr
 
+    @staticmethod
+    def _check_exit_status(cmd, exit_status, check_exit_code, stdout,
+                           stderr):
         # exit_status == -1 if no exit code was returned
         if exit_status != -1:
             LOG.debug('Result was %s' % exit_status)
@@ -178,24 +401,25 @@ class SSHConnector(object):
                                         stderr=stderr,
                                         cmd=cmd)
 
-        return stdout, stderr
-
     def copy_file_to_remote(self, local_path, remote_path):
         """scp the local file to remote folder.
 
         :param local_path: local path
         :param remote_path: remote path
         """
-        sftp_client = self.transport.open_sftp_client()
+        transport = self._acquire_transport()
         LOG.debug('Copy the local file to remote. '
                   'Source=%(src)s. Target=%(target)s.' %
                   {'src': local_path, 'target': remote_path})
         try:
+            sftp_client = transport.open_sftp_client()
             sftp_client.put(local_path, remote_path)
         except Exception as ex:
             LOG.error('Failed to copy the local file to remote. '
                       'Reason: %s.' % six.text_type(ex))
             raise SFtpExecutionError(err=ex)
+        finally:
+            self._release_transport(transport)
 
     def get_remote_file(self, remote_path, local_path):
         """Fetch remote File.
@@ -203,21 +427,26 @@ class SSHConnector(object):
         :param remote_path: remote path
         :param local_path: local path
         """
-        sftp_client = self.transport.open_sftp_client()
+        transport = self._acquire_transport()
         LOG.debug('Get the remote file. '
                   'Source=%(src)s. Target=%(target)s.' %
                   {'src': remote_path, 'target': local_path})
         try:
+            sftp_client = transport.open_sftp_client()
             sftp_client.get(remote_path, local_path)
         except Exception as ex:
             LOG.error('Failed to secure copy. Reason: %s.' %
                       six.text_type(ex))
             raise SFtpExecutionError(err=ex)
+        finally:
+            self._release_transport(transport)
 
     def close(self):
         """Closes the ssh connection."""
         if 'isLive' in self.__dict__ and self.isLive:
-            self.transport.close()
+            with self._lock:
+                for transport in list(self._channels):
+                    self._remove_transport(transport)
             self.isLive = False
 
     def __del__(self):
@@ -16,6 +16,7 @@
 from __future__ import unicode_literals
 
 import logging
+import re
 
 import six
 
@@ -63,20 +64,154 @@ class MappedErrorCodeDecoratorFactory(object):
         return ret
 
 
+def _trie_pattern(words):
+    """ regex pattern matching any of the words.
+
+    Words sharing a prefix share the branch of the pattern, so that the
+    regex engine tries a few alternatives at each position instead of all
+    the words.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = None
+
+    def build(node):
+        alternatives = []
+        for ch in sorted(k for k in node if k):
+            alternatives.append(re.escape(ch) + build(node[ch]))
+        if not alternatives:
+            ret = ''
+        elif len(alternatives) == 1 and '' not in node:
+            ret = alternatives[0]
+        else:
+            ret = '(?:{})'.format('|'.join(alternatives))
+            if '' in node:
+                # the word could end here
+                ret += '?'
+        return ret
+
+    return build(trie)
+
+
+class ExceptionMatcher(object):
+    """ finds the first exception class whose message is in the output.
+
+    The messages are prepared once: all the literal messages and hex
+    codes are combined in one pattern, so that the output is scanned once
+    for all of them.  Regexes are compiled once and searched one by one.
+    The precedence is the same as checking the classes in order.
+    """
+
+    def __init__(self, exception_list):
+        self.exception_list = list(exception_list)
+        # [(literal messages, compiled regex)] of each class
+        self._messages = []
+        # {literal message: index of the first class of it}
+        self._literal_index = {}
+        self._regex_indices = []
+        for i, clz in enumerate(self.exception_list):
+            literals, regex = self._get_messages(clz)
+            self._messages.append((literals, regex))
+            for literal in literals:
+                self._literal_index.setdefault(literal, i)
+            if regex is not None:
+                self._regex_indices.append(i)
+
+        if self._literal_index:
+            self._pattern = re.compile(_trie_pattern(self._literal_index))
+        else:
+            self._pattern = None
+
+    @staticmethod
+    def _get_messages(clz):
+        msg = clz.get_error_message()
+        if isinstance(msg, (tuple, list, set)):
+            ret = tuple(msg), None
+        elif isinstance(msg, six.string_types):
+            ret = (msg,), None
+        elif hasattr(msg, 'search'):
+            ret = (), msg
+        else:
+            raise ValueError('{} is not a valid message.'.format(msg))
+        return ret
+
+    def _is_found(self, index, output):
+        literals, regex = self._messages[index]
+        if regex is not None:
+            ret = regex.search(output) is not None
+        else:
+            ret = any(m in output for m in literals)
+        return ret
+
+    def _get_first_literal_index(self, output):
+        """ index of the first class found by the literal pattern. """
+        ret = None
+        if self._pattern is not None:
+            for m in self._pattern.finditer(output):
+                index = self._literal_index[m.group()]
+                if ret is None or index < ret:
+                    ret = index
+                    if ret == 0:
+                        break
+        return ret
+
+    def match(self, output):
+        """ the exception class of the output, `None` if not found. """
+        if isinstance(output, six.string_types):
+            first = self._get_first_literal_index(output)
+            if first is None:
+                # only the regexes could match
+                candidates = self._regex_indices
+            else:
+                # matches overlapped by the found ones are not reported
+                # by the patterns, check the classes before it one by one.
+                candidates = range(first)
+        else:
+            first = None
+            candidates = range(len(self.exception_list))
+
+        for i in candidates:
+            if self._is_found(i, output):
+                ret = self.exception_list[i]
+                break
+        else:
+            ret = None if first is None else self.exception_list[first]
+        return ret
+
+
 class ExceptionListDecoratorFactory(object):
     def __init__(self, default_exception, exception_list=None):
         if exception_list is None:
             exception_list = []
         self.exception_list = exception_list
         self.default = default_exception
+        self._matcher = None
 
     def clz_decorator(self):
         def decorator(clz):
             self.exception_list.append(clz)
+            self._matcher = None
             return clz
 
         return decorator
 
+    def get_matcher(self):
+        """ the matcher of the registered exception classes.
+
+        It is built when first used after new classes are registered.  The
+        classes are not compared on each call, only the number of them is
+        checked in case the list is appended directly.
+        """
+        matcher = self._matcher
+        if matcher is None or \
+                len(matcher.exception_list) != len(self.exception_list):
+            matcher = ExceptionMatcher(self.exception_list)
+            self._matcher = matcher
+        return matcher
+
     def get_exception(self, output, default=None):
         if default is not None:
             ret = default
@@ -84,18 +219,7 @@ class ExceptionListDecoratorFactory(object):
             ret = self.default
 
         if output:
-            for clz in self.exception_list:
-                msg = clz.get_error_message()
-                if isinstance(msg, (tuple, list, set)):
-                    found = any(m in output for m in msg)
-                elif isinstance(msg, six.string_types):
-                    found = msg in output
-                elif hasattr(msg, 'search'):
-                    found = msg.search(output) is not None
-                else:
-                    raise ValueError('{} is not a valid message.'.format(msg))
-
-                if found:
-                    ret = clz
-                    break
+            clz = self.get_matcher().match(output)
+            if clz is not None:
+                ret = clz
         return ret
@@ -13,21 +13,31 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
-from __future__ import unicode_literals
+from __future__ import unicode_literals, division
 
+import collections
+import math
 import os
+from datetime import datetime
 
+import six
 import yaml
 from yaml import loader
 
-from storops.lib.common import RepeatedTimer, cache
+from storops.lib.common import cache
 from storops.lib.resource import ResourceList
+from storops.lib.scheduler import CollectionScheduler
 
 __author__ = 'Cedric Zhuang'
 
+NaN = float('nan')
+
 
 class MetricCounterRecords(object):
     """ Data structure to save metric counter in memory
+
+    The samples are saved in a ring buffer of fixed size, newest first.
+    Each sample is saved with the time it is added.
     """
 
     def __init__(self, maximum=None):
@@ -35,18 +45,52 @@ class MetricCounterRecords(object):
         if maximum is None:
             maximum = 2
         self._maximum_len = maximum
-        self._records = []
+        self._records = collections.deque(maxlen=maximum)
+        self._timestamps = collections.deque(maxlen=maximum)
+        self._memo = {}
+
+    @property
+    def maximum(self):
+        return self._maximum_len
+
+    def resize(self, maximum):
+        """ changes the number of samples to keep.
+
+        The newest samples are kept if the buffer is shrunk.
+        """
+        if maximum < 2:
+            raise ValueError('at least 2 samples are required to calculate '
+                             'the metrics.')
+        self._maximum_len = maximum
+        # newest samples are on the left
+        self._records = collections.deque(
+            list(self._records)[:maximum], maxlen=maximum)
+        self._timestamps = collections.deque(
+            list(self._timestamps)[:maximum], maxlen=maximum)
 
-    def add_results(self, result):
+    def add_results(self, result, timestamp=None):
         self.enabled = True
         if result is not None:
-            self._records.insert(0, result)
-            while len(self._records) > self._maximum_len:
-                self._records.pop()
+            if timestamp is None:
+                timestamp = datetime.now()
+            self._records.appendleft(result)
+            self._timestamps.appendleft(timestamp)
+            # values calculated from the previous samples are outdated
+            self._memo = {}
 
     def reset(self):
         self.enabled = False
-        self._records = []
+        self._records.clear()
+        self._timestamps.clear()
+        self._memo = {}
+
+    @property
+    def memo(self):
+        """ values calculated from the current samples.
+
+        A new dict is used each time the samples are rotated.
+        """
+        return self._memo
 
     def __len__(self):
         return len(self._records)
@@ -67,12 +111,125 @@ class MetricCounterRecords(object):
             ret = None
         return ret
 
+    def samples(self, window=None):
+        """ samples in the time window, newest first.
+
+        :param window: seconds (or string like `5m`) before the newest
+            sample.  the sample whose age is the closest to the window is
+            the oldest one returned, so that the window is not shortened
+            by the jitter of the polling.  all samples if not set.
+        :return: list of `(timestamp, sample)`.
+        """
+        if not self.enabled:
+            ret = []
+        else:
+            ret = list(zip(self._timestamps, self._records))
+            if window is not None and ret:
+                window = to_seconds(window)
+                newest = ret[0][0]
+                ages = [abs((newest - t).total_seconds() - window)
+                        for t, _ in ret]
+                ret = ret[:ages.index(min(ages)) + 1]
+        return ret
+
+    def window_pair(self, window=None):
+        """ the oldest and newest samples in the time window.
+
+        :return: `MetricSamplePair` to calculate the average rates over the
+            window.
+        """
+        samples = self.samples(window)
+        if len(samples) > 1:
+            ret = MetricSamplePair(samples[-1][1], samples[0][1], self)
+        else:
+            ret = MetricSamplePair(None, self.curr, self)
+        return ret
+
+    def pairs(self, window=None):
+        """ pairs of the adjacent samples in the time window, newest first.
+        """
+        samples = [sample for _, sample in self.samples(window)]
+        return [MetricSamplePair(prev, curr, self)
+                for curr, prev in zip(samples, samples[1:])]
+
+
+class MetricSamplePair(object):
+    """ two samples to calculate the metrics.
+
+    It has the same counter properties as `PerfManager` so that it could
+    be passed to the calculators in place of the client.
+    """
+
+    def __init__(self, prev, curr, records=None):
+        self.prev_counter = prev
+        self.curr_counter = curr
+        # share the memo of the records.  memo is keyed by the samples.
+        self.metric_counter_records = records
+
+
+def to_seconds(window):
+    """ converts the time window to seconds.
+
+    :param window: number of seconds, or string like `30s`, `5m` and `1h`.
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if isinstance(window, six.string_types):
+        window = window.strip().lower()
+        if window[-1:] in units:
+            ret = float(window[:-1]) * units[window[-1]]
+        else:
+            ret = float(window)
+    else:
+        ret = float(window)
+    if ret < 0:
+        raise ValueError('time window should not be negative: {}.'
+                         .format(window))
+    return ret
+
+
+def aggregate_values(values, percentiles=None):
+    """ aggregates the values of a metric, `None` and NaN are skipped.
+
+    :param values: list of values.
+    :param percentiles: list of percentiles to calculate, like `[50, 95]`.
+    :return: dict with `count`, `min`, `max`, `avg` and `p<percentile>`.
+        values are NaN if there is no valid value.
+    """
+    if percentiles is None:
+        percentiles = []
+    valid = sorted(v for v in values
+                   if v is not None and not math.isnan(v))
+    ret = {'count': len(valid)}
+    if valid:
+        ret['min'] = valid[0]
+        ret['max'] = valid[-1]
+        ret['avg'] = sum(valid) / len(valid)
+    else:
+        ret['min'] = ret['max'] = ret['avg'] = NaN
+    for p in percentiles:
+        ret['p{}'.format(p)] = _percentile(valid, p)
+    return ret
+
+
+def _percentile(sorted_values, p):
+    """ percentile with linear interpolation between the closest ranks. """
+    if not sorted_values:
+        ret = NaN
+    else:
+        pos = (len(sorted_values) - 1) * p / 100.0
+        lower = int(math.floor(pos))
+        upper = min(lower + 1, len(sorted_values) - 1)
+        ret = sorted_values[lower] + (
+            sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+    return ret
+
 
 class PerfManager(object):
     def __init__(self):
         self.metric_collector = None
         self._rsc_list_2 = None
         self._rsc_clz_list = None
+        self.metric_store = None
         self.metric_counter_records = MetricCounterRecords()
 
     def persist_rsc_list_metrics(self):
@@ -80,7 +237,7 @@ class PerfManager(object):
         if self.prev_counter and persist_rsc_list:
             for rsc_list in persist_rsc_list:
                 rsc_list.update()
-                rsc_list.persist_metric_data()
+                rsc_list.persist_metric_data(store=self.metric_store)
 
     def _is_perf_monitored(self, rsc):
         if self._rsc_clz_list is not None:
@@ -102,8 +259,21 @@ class PerfManager(object):
             ret = []
         return ret
 
-    def enable_perf_metric(self, interval, callback, rsc_clz_list=None):
+    def enable_perf_metric(self, interval, callback, rsc_clz_list=None,
+                           history_size=None, scheduler=None):
+        """ starts to collect the metric samples.
+
+        :param interval: seconds between the samples.
+        :param callback: function returns the sample.
+        :param rsc_clz_list: classes of the resources to monitor.
+        :param history_size: number of samples to keep, at least 2.  keep
+            more samples to calculate the metrics over a time window.
+        :param scheduler: `CollectionScheduler` to run the collection.  the
+            one shared by all the systems if not set.
+        """
         self._rsc_clz_list = rsc_clz_list
+        if history_size is not None:
+            self.metric_counter_records.resize(history_size)
 
         def f():
             self.metric_counter_records.add_results(callback())
@@ -114,14 +284,29 @@ class PerfManager(object):
 
         self.metric_counter_records.enabled = True
         if interval > 0:
-            self.metric_collector = RepeatedTimer(interval, f)
-            self.metric_collector.start()
+            if scheduler is None:
+                scheduler = CollectionScheduler.get_default()
+            self.metric_collector = scheduler.add(
+                interval, f, name=getattr(self, 'ip', None))
 
     def disable_perf_metric(self):
         if self.metric_collector:
             self.metric_collector.stop()
+            self.metric_collector = None
         self.metric_counter_records.reset()
 
+    @property
+    def metric_collection_stats(self):
+        """ stats of the metric collection, like the latency.
+
+        `None` if the metrics are not collected periodically.
+        """
+        if self.metric_collector is None:
+            ret = None
+        else:
+            ret = self.metric_collector.stats
+        return ret
+
     def is_perf_metric_enabled(self, rsc=None):
         ret = self.metric_counter_records.enabled
         if rsc is not None and ret:
@@ -139,8 +324,15 @@ class PerfManager(object):
     def __del__(self):
         self.disable_perf_metric()
 
-    def persist_perf_stats(self, perf_rsc_list):
+    def persist_perf_stats(self, perf_rsc_list, store=None):
+        """ persists the metrics of the resource lists each interval.
+
+        :param perf_rsc_list: lists to persist, `None` to stop.
+        :param store: `MetricStore` to save the metrics.  appended to the
+            csv files if not set.
+        """
         self._rsc_list_2 = perf_rsc_list
+        self.metric_store = store
 
     def is_perf_stats_persisted(self):
         return self._rsc_list_2 is not None and len(self._rsc_list_2) > 0
@@ -156,13 +348,17 @@ class MetricConfigList(object):
         self._metric_configs = {
             config.get('name'): self.init_metric_config(config)
             for config in inputs}
+        self._metric_names = sorted(self._metric_configs.keys())
 
     def init_metric_config(self, raw_config):
         raise NotImplementedError('should be implemented by child class.'
                                   'init config from dict.')
 
     def metric_names(self):
-        return sorted(self._metric_configs.keys())
+        return list(self._metric_names)
+
+    def is_metric(self, name):
+        return name in self._metric_configs
 
     def get_calculator(self, metric_name):
         return self.get_metric_config(metric_name).calculator
@@ -225,10 +421,86 @@ class CalculatorMetaInfo(object):
     def get_metric_names(self, clz):
         return self.get_config(clz).metric_names()
 
+    def is_metric(self, clz, metric_name):
+        return self.get_config(clz).is_metric(metric_name)
+
     def get_metric_value(self, clz, metric_name, cli, obj=None):
         raise NotImplementedError('should be implemented by child class.'
                                   'return the calculated metric value.')
 
+    def get_window_metric_value(self, clz, metric_name, cli, window,
+                                obj=None):
+        """ calculates the metric over the time window.
+
+        The metric is calculated from the oldest and newest samples in the
+        window, which is the average rate of the window for the counters.
+        """
+        self.check_cli(cli)
+        pair = cli.metric_counter_records.window_pair(window)
+        return self.get_metric_value(clz, metric_name, pair, obj)
+
+    def get_metric_aggregates(self, clz, metric_name, cli, obj, window=None,
+                              percentiles=None):
+        """ aggregates the metric of each pair of samples in the window.
+
+        :return: dict of `count`, `min`, `max`, `avg` and the percentiles.
+            see `aggregate_values`.
+        """
+        self.check_cli(cli)
+        values = [self.get_metric_value(clz, metric_name, pair, obj)
+                  for pair in cli.metric_counter_records.pairs(window)]
+        return aggregate_values(values, percentiles)
+
+    def get_metric_values(self, clz, metric_names, cli, objs):
+        """ calculates the metrics of a list of objects.
+
+        child classes could override it to calculate each metric once for
+        all the objects.
+
+        :return: list of rows, one for each object.  each row has the
+            values of the metrics in `metric_names`.
+        """
+        return [[self.get_metric_value(clz, name, cli, obj)
+                 for name in metric_names]
+                for obj in objs]
+
+    @staticmethod
+    def check_cli(cli):
+        if not hasattr(cli, 'curr_counter'):
+            raise ValueError('cli should has "curr_counter" attribute.')
+        if not hasattr(cli, 'prev_counter'):
+            raise ValueError('cli should has "prev_counter" attribute.')
+
+
+class MetricsTable(object):
+    """ metric values of the resources in a resource list.
+
+    One row for each resource, one column for each metric.
+    """
+
+    def __init__(self, ids, names, rows):
+        self.ids = ids
+        self.names = names
+        self.rows = rows
+        self._row_index = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(zip(self.ids, self.rows))
+
+    def get_row(self, rsc_id):
+        if self._row_index is None:
+            self._row_index = {k: i for i, k in enumerate(self.ids)}
+        return self.rows[self._row_index[rsc_id]]
+
+    def get(self, rsc_id, name):
+        return self.get_row(rsc_id)[self.names.index(name)]
+
+    def to_dict(self):
+        return {rsc_id: dict(zip(self.names, row)) for rsc_id, row in self}
+
 
 class MetricsDumper(object):
     def __init__(self, rsc_list, dft_hdr=None, dft_hdr_cb=None):
@@ -253,13 +525,14 @@ class MetricsDumper(object):
                    self.get_metrics_csv_data(sep)]
         return '\n'.join(content)
 
-    def data_line(self, rsc):
+    def data_line(self, rsc, values=None):
         if self._dft_hdr_cb is not None:
             metrics = self._dft_hdr_cb(rsc)
         else:
             metrics = []
-        metrics += [str(self.get_attr(rsc, name))
-                    for name in self.metric_names]
+        if values is None:
+            values = [self.get_attr(rsc, name) for name in self.metric_names]
+        metrics += [str(value) for value in values]
         return metrics
 
     @staticmethod
@@ -273,7 +546,24 @@ class MetricsDumper(object):
     def get_metrics_csv_data(self, sep=None):
         if sep is None:
             sep = ','
-        return '\n'.join(sep.join(self.data_line(r)) for r in self._rsc_list)
+        table = self.get_metrics_table()
+        if table is None:
+            lines = (self.data_line(r) for r in self._rsc_list)
+        else:
+            lines = (self.data_line(r, row)
+                     for r, row in zip(self._rsc_list, table.rows))
+        return '\n'.join(sep.join(line) for line in lines)
+
+    def get_metrics_table(self):
+        """ calculates the metrics of all the resources at once.
+
+        :return: `None` if the list could not calculate them in bulk.
+        """
+        if hasattr(self._rsc_list, 'metrics_table'):
+            ret = self._rsc_list.metrics_table(self.metric_names)
+        else:
+            ret = None
+        return ret
 
     def get_metrics_csv_header(self, sep=None):
         if sep is None:
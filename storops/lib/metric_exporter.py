@@ -0,0 +1,245 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" exports the performance metrics in the OpenMetrics text format.
+
+The exporter is a `MetricStore`.  The metrics of each resource list are
+rendered to text once when they are persisted after each collection.  The
+http endpoint only returns the rendered buffer, so a scrape never queries
+the arrays or calculates the metrics.
+
+    exporter = OpenMetricsExporter()
+    exporter.start_http_server(9800)
+    unity.enable_perf_stats()
+    unity.enable_persist_perf_stats(store=exporter)
+"""
+from __future__ import unicode_literals
+
+import logging
+import math
+import re
+import threading
+
+from six.moves import BaseHTTPServer, socketserver
+
+from storops.lib.metric_store import MetricStore, to_epoch
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+DEFAULT_PORT = 9800
+
+_INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_:]')
+
+
+def _metric_name(prefix, name):
+    ret = _INVALID_NAME_CHARS.sub('_', '{}_{}'.format(prefix, name))
+    if ret[0].isdigit():
+        ret = '_' + ret
+    return ret
+
+
+def _label_value(value):
+    return '{}'.format(value).replace('\\', '\\\\').replace(
+        '"', '\\"').replace('\n', '\\n')
+
+
+def _sample_value(value):
+    """ text of the value, `None` if it is not a number. """
+    if isinstance(value, bool):
+        value = int(value)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(value):
+        ret = 'NaN'
+    elif math.isinf(value):
+        ret = '+Inf' if value > 0 else '-Inf'
+    elif value.is_integer() and abs(value) < 1e15:
+        ret = '{}'.format(int(value))
+    else:
+        ret = repr(value)
+    return ret
+
+
+class OpenMetricsExporter(MetricStore):
+    """ keeps the rendered metrics of the resource lists.
+
+    Each metric is one gauge family named `<prefix>_<metric>`, with the
+    labels `array`, `type` and `id` of the resource.
+
+    :param prefix: prefix of the metric names.
+    """
+
+    def __init__(self, prefix=None):
+        if prefix is None:
+            prefix = 'storops'
+        self.prefix = prefix
+        # {list name: (labels, timestamp, {metric: rendered samples})}
+        # the samples are rendered when written, and only joined when
+        # any of the lists is updated.
+        self._lists = {}
+        self._lock = threading.Lock()
+        self._buffer = b'# EOF\n'
+        self._server = None
+
+    # `__getstate__` and `__setstate__` are used by Pickle.
+    def __getstate__(self):
+        return {'prefix': self.prefix}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @staticmethod
+    def _get_labels(name):
+        # name of the list is like `10.244.211.30_VNXLun`
+        array, _, rsc_type = name.partition('_')
+        return 'array="{}",type="{}"'.format(_label_value(array),
+                                             _label_value(rsc_type))
+
+    def write(self, name, table, timestamp=None):
+        labels = self._get_labels(name)
+        samples = {}
+        label_list = ['{},id="{}"'.format(labels, _label_value(rsc_id))
+                      for rsc_id in table.ids]
+        for i, metric in enumerate(table.names):
+            full_name = _metric_name(self.prefix, metric)
+            lines = []
+            for rsc_labels, row in zip(label_list, table.rows):
+                value = _sample_value(row[i])
+                if value is not None:
+                    lines.append('{}{{{}}} {}\n'.format(
+                        full_name, rsc_labels, value))
+            samples[metric] = ''.join(lines)
+        with self._lock:
+            self._lists[name] = (labels, to_epoch(timestamp), samples)
+            self._render()
+
+    def remove(self, name):
+        """ stops exporting the metrics of a resource list. """
+        with self._lock:
+            if self._lists.pop(name, None) is not None:
+                self._render()
+
+    def clear(self):
+        with self._lock:
+            self._lists.clear()
+            self._render()
+
+    def _render(self):
+        families = {}
+        for name in sorted(self._lists):
+            _, _, samples = self._lists[name]
+            for metric, text in samples.items():
+                families.setdefault(metric, []).append(text)
+
+        out = []
+        for metric in sorted(families):
+            out.append('# TYPE {} gauge\n'.format(
+                _metric_name(self.prefix, metric)))
+            out.extend(families[metric])
+
+        if self._lists:
+            full_name = _metric_name(self.prefix,
+                                     'collection_timestamp_seconds')
+            out.append('# TYPE {} gauge\n'.format(full_name))
+            out.append('# UNIT {} seconds\n'.format(full_name))
+            for name in sorted(self._lists):
+                labels, timestamp, _ = self._lists[name]
+                out.append('{}{{{}}} {}\n'.format(
+                    full_name, labels, _sample_value(timestamp)))
+        out.append('# EOF\n')
+        self._buffer = ''.join(out).encode('utf-8')
+
+    def render(self):
+        """ the metrics of the latest collection in the OpenMetrics text
+        format.
+        """
+        return self._buffer
+
+    def start_http_server(self, port=None, host=None):
+        """ serves the metrics at `http://<host>:<port>/metrics`.
+
+        :param port: port to listen, 0 for any free port.
+        :param host: address to bind, all the addresses if not set.
+        :return: the `MetricsHttpServer`.
+        """
+        if self._server is not None:
+            raise ValueError('http server of the exporter is already '
+                             'started.')
+        self._server = MetricsHttpServer(self, port, host)
+        self._server.start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
+
+
+class _MetricsHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] in ('/', '/metrics'):
+            body = self.server.exporter.render()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+        else:
+            body = b'not found.\n'
+            self.send_response(404)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        log.debug('metrics http server: {}'.format(fmt % args))
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                           BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class MetricsHttpServer(object):
+    """ embedded http server of the `OpenMetricsExporter`. """
+
+    def __init__(self, exporter, port=None, host=None):
+        if port is None:
+            port = DEFAULT_PORT
+        if host is None:
+            host = ''
+        self._httpd = _ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._httpd.exporter = exporter
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._httpd.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name='storops-metrics-http')
+        self._thread.daemon = True
+        self._thread.start()
+        log.info('serve metrics at port {}.'.format(self.port))
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,446 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" binary persistence of the performance metrics.
+
+The metrics of a resource list are saved in a folder named by the list,
+like `10.244.211.30_VNXLun`.  The folder is partitioned by time, each
+partition is named by its start time in UTC.  A partition has one or more
+segments, and a segment is stored by columns:
+
+* `<n>.json`: ids of the resources and names of the metrics.
+* `<n>.time.bin`: the timestamp of each write, little-endian doubles.
+* `<n>.<m>.bin`: fixed-width array of the m-th metric.  Each write appends
+  the values of all the resources as little-endian doubles.
+
+A new segment is started when the resources or metrics are changed.  The
+columns are read from the memory mapped files without parsing text, and
+reading one metric only touches its own file.
+"""
+from __future__ import unicode_literals, division
+
+import calendar
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from datetime import datetime
+
+import six
+
+from storops.lib.common import get_local_folder
+from storops.lib.metric import MetricsTable
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+NaN = float('nan')
+
+_DOUBLE = struct.Struct(str('<d'))
+_META_FILENAME = 'store.json'
+_TIME_FORMAT = '%Y%m%d%H%M%S'
+
+
+def to_epoch(timestamp):
+    """ converts the `datetime` to seconds since epoch.
+
+    A `datetime` without time zone is in local time.
+    """
+    if timestamp is None:
+        ret = time.time()
+    elif isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            ret = time.mktime(timestamp.timetuple())
+        else:
+            ret = calendar.timegm(timestamp.utctimetuple())
+        ret += timestamp.microsecond / 1e6
+    else:
+        ret = float(timestamp)
+    return ret
+
+
+def _to_float(value):
+    try:
+        ret = float(value)
+    except (TypeError, ValueError):
+        ret = NaN
+    return ret
+
+
+def _get_partition_start(name):
+    return calendar.timegm(datetime.strptime(name, _TIME_FORMAT).timetuple())
+
+
+def _get_size(filename):
+    if os.path.exists(filename):
+        ret = os.path.getsize(filename)
+    else:
+        ret = 0
+    return ret
+
+
+class MetricStore(object):
+    """ backend to persist the metrics of the resource lists. """
+
+    def write(self, name, table, timestamp=None):
+        """ saves the metrics of a resource list.
+
+        :param name: name of the list, like `10.244.211.30_VNXLun`.
+        :param table: `MetricsTable` of the list.
+        :param timestamp: time of the metrics, now if not set.
+        """
+        raise NotImplementedError('should be implemented by child class.')
+
+    def close(self):
+        pass
+
+
+class _Segment(object):
+    def __init__(self, folder, seq, ids, names):
+        self.folder = folder
+        self.seq = seq
+        self.ids = list(ids)
+        self.names = list(names)
+        self.schema_file = os.path.join(folder, '{}.json'.format(seq))
+        self.time_file = os.path.join(folder, '{}.time.bin'.format(seq))
+        self.column = struct.Struct(str('<{}d'.format(len(self.ids))))
+
+    def get_column_file(self, index):
+        return os.path.join(self.folder,
+                            '{}.{}.bin'.format(self.seq, index))
+
+    @classmethod
+    def load(cls, folder, seq):
+        with open(os.path.join(folder, '{}.json'.format(seq)), 'r') as f:
+            schema = json.load(f)
+        return cls(folder, seq, schema['ids'], schema['names'])
+
+    def save_schema(self):
+        with open(self.schema_file, 'w') as f:
+            json.dump({'ids': self.ids, 'names': self.names}, f)
+
+    def match(self, ids, names):
+        return self.ids == list(ids) and self.names == list(names)
+
+    @property
+    def count(self):
+        """ number of the writes, a partial write is not counted. """
+        return _get_size(self.time_file) // _DOUBLE.size
+
+    def append(self, timestamp, rows):
+        # the timestamp is written at last, the columns of a partial
+        # write are not read.
+        for i in range(len(self.names)):
+            values = [_to_float(row[i]) for row in rows]
+            with open(self.get_column_file(i), 'ab') as f:
+                f.write(self.column.pack(*values))
+        with open(self.time_file, 'ab') as f:
+            f.write(_DOUBLE.pack(timestamp))
+
+    def truncate(self):
+        """ removes the partial write before appending to the segment. """
+        count = self.count
+        files = [(self.time_file, count * _DOUBLE.size)]
+        files.extend((self.get_column_file(i), count * self.column.size)
+                     for i in range(len(self.names)))
+        for filename, size in files:
+            if _get_size(filename) > size:
+                with open(filename, 'r+b') as f:
+                    f.truncate(size)
+
+
+class BinaryMetricStore(MetricStore):
+    """ saves the metrics in time partitioned binary files.
+
+    :param folder: root folder of the files, the local folder of storops
+        if not set.
+    :param partition_seconds: time span of each partition, one day by
+        default.
+    :param retention: number of partitions to keep for each list.  older
+        partitions are removed when a new one is created.  keep all if not
+        set.
+    """
+
+    def __init__(self, folder=None, partition_seconds=None, retention=None):
+        if folder is None:
+            folder = os.path.join(get_local_folder(), 'metrics')
+        if partition_seconds is None:
+            partition_seconds = 24 * 3600
+        if retention is not None and retention < 1:
+            raise ValueError('retention should be at least 1 partition.')
+        self.folder = folder
+        self.partition_seconds = partition_seconds
+        self.retention = retention
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    # `__getstate__` and `__setstate__` are used by Pickle.
+    def __getstate__(self):
+        return {'folder': self.folder,
+                'partition_seconds': self.partition_seconds,
+                'retention': self.retention}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def get_folder(self, name):
+        return os.path.join(self.folder, name)
+
+    def _get_partition_name(self, timestamp):
+        start = timestamp - timestamp % self.partition_seconds
+        return datetime.utcfromtimestamp(start).strftime(_TIME_FORMAT)
+
+    def write(self, name, table, timestamp=None):
+        timestamp = to_epoch(timestamp)
+        with self._lock:
+            segment = self._get_segment(name, table, timestamp)
+            segment.append(timestamp, table.rows)
+
+    def _get_segment(self, name, table, timestamp):
+        folder = self.get_folder(name)
+        partition = os.path.join(folder,
+                                 self._get_partition_name(timestamp))
+        segment = self._segments.get(name)
+        if segment is None or segment.folder != partition:
+            segment = self._init_partition(folder, partition)
+        if segment is None or not segment.match(table.ids, table.names):
+            seq = 0 if segment is None else segment.seq + 1
+            segment = _Segment(partition, seq, table.ids, table.names)
+            segment.save_schema()
+        self._segments[name] = segment
+        return segment
+
+    def _init_partition(self, folder, partition):
+        """ returns the last segment of the partition if it exists. """
+        if not os.path.exists(partition):
+            os.makedirs(partition)
+            self._save_meta(folder)
+            self._remove_expired(folder)
+        seqs = _get_segment_seqs(partition)
+        if seqs:
+            ret = _Segment.load(partition, seqs[-1])
+            ret.truncate()
+        else:
+            ret = None
+        return ret
+
+    def _save_meta(self, folder):
+        meta = os.path.join(folder, _META_FILENAME)
+        if not os.path.exists(meta):
+            with open(meta, 'w') as f:
+                json.dump({'partition_seconds': self.partition_seconds}, f)
+
+    def _remove_expired(self, folder):
+        if self.retention is not None:
+            partitions = _get_partitions(folder)
+            for partition in partitions[:-self.retention]:
+                log.info('remove expired metric partition: {}.'.format(
+                    partition))
+                shutil.rmtree(os.path.join(folder, partition),
+                              ignore_errors=True)
+
+
+def _get_partitions(folder):
+    if os.path.exists(folder):
+        ret = sorted(p for p in os.listdir(folder)
+                     if os.path.isdir(os.path.join(folder, p)))
+    else:
+        ret = []
+    return ret
+
+
+def _get_segment_seqs(partition):
+    return sorted(int(f[:-len('.json')]) for f in os.listdir(partition)
+                  if f.endswith('.json'))
+
+
+class _SegmentReader(object):
+    def __init__(self, segment):
+        self.segment = segment
+        self.count = segment.count
+        self._opened = []
+        self._times = self._open(segment.time_file, _DOUBLE.size)
+        self._columns = {}
+
+    def _open(self, filename, item_size):
+        if self.count > 0:
+            f = open(filename, 'rb')
+            ret = mmap.mmap(f.fileno(), self.count * item_size,
+                            access=mmap.ACCESS_READ)
+            self._opened.append((f, ret))
+        else:
+            ret = None
+        return ret
+
+    def close(self):
+        for f, m in self._opened:
+            m.close()
+            f.close()
+
+    def timestamp(self, i):
+        return _DOUBLE.unpack_from(self._times, i * _DOUBLE.size)[0]
+
+    def _get_column(self, index):
+        ret = self._columns.get(index)
+        if ret is None:
+            ret = self._open(self.segment.get_column_file(index),
+                             self.segment.column.size)
+            self._columns[index] = ret
+        return ret
+
+    def values(self, i, index):
+        """ values of all the resources of the index-th metric. """
+        return self.segment.column.unpack_from(
+            self._get_column(index), i * self.segment.column.size)
+
+    def value(self, i, index, position):
+        """ value of one resource of the index-th metric. """
+        offset = (i * len(self.segment.ids) + position) * _DOUBLE.size
+        return _DOUBLE.unpack_from(self._get_column(index), offset)[0]
+
+    def bisect(self, timestamp, right=False):
+        """ index of the first write later than the timestamp.
+
+        :param right: the writes of the same timestamp are skipped if true.
+        """
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = self.timestamp(mid)
+            if t < timestamp or (right and t == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start, end):
+        lo = 0 if start is None else self.bisect(start)
+        hi = self.count if end is None else self.bisect(end, True)
+        return six.moves.range(lo, hi)
+
+
+class BinaryMetricReader(object):
+    """ reads the metrics saved by `BinaryMetricStore`.
+
+    :param folder: root folder of the store.
+    :param name: name of the resource list.
+    """
+
+    def __init__(self, folder, name):
+        self.folder = os.path.join(folder, name)
+        meta = os.path.join(self.folder, _META_FILENAME)
+        if os.path.exists(meta):
+            with open(meta, 'r') as f:
+                self.partition_seconds = json.load(f)['partition_seconds']
+        else:
+            self.partition_seconds = None
+
+    @classmethod
+    def from_store(cls, store, name):
+        return cls(store.folder, name)
+
+    def _get_partitions(self, start, end):
+        partitions = _get_partitions(self.folder)
+        starts = [_get_partition_start(p) for p in partitions]
+        # a partition ends before the next one starts.  the last one has
+        # no end if the partition span is unknown.
+        ends = starts[1:] + [None]
+        if self.partition_seconds is not None:
+            ends = [p_start + self.partition_seconds
+                    if p_end is None
+                    else min(p_end, p_start + self.partition_seconds)
+                    for p_start, p_end in zip(starts, ends)]
+        ret = []
+        for p, p_start, p_end in zip(partitions, starts, ends):
+            if (start is None or p_end is None or p_end > start) and \
+                    (end is None or p_start <= end):
+                ret.append(p)
+        return ret
+
+    def _iter_segment_readers(self, start, end):
+        for p in self._get_partitions(start, end):
+            partition = os.path.join(self.folder, p)
+            for seq in _get_segment_seqs(partition):
+                reader = _SegmentReader(_Segment.load(partition, seq))
+                try:
+                    yield reader
+                finally:
+                    reader.close()
+
+    def read(self, start=None, end=None, ids=None, names=None):
+        """ reads the metrics in the time range.
+
+        :param start: `datetime` or seconds since epoch, inclusive.
+        :param end: `datetime` or seconds since epoch, inclusive.
+        :param ids: ids of the resources to read, all if not set.
+        :param names: names of the metrics to read, all if not set.
+        :return: list of `(datetime, MetricsTable)` in time order.  only
+            the ids and names found in the files are in the tables.
+        """
+        start = None if start is None else to_epoch(start)
+        end = None if end is None else to_epoch(end)
+        ret = []
+        for reader in self._iter_segment_readers(start, end):
+            ret.extend(self._read_segment(reader, start, end, ids, names))
+        return ret
+
+    @staticmethod
+    def _read_segment(reader, start, end, ids, names):
+        segment = reader.segment
+        if ids is None:
+            id_index = list(enumerate(segment.ids))
+        else:
+            positions = {k: i for i, k in enumerate(segment.ids)}
+            id_index = [(positions[k], k) for k in ids if k in positions]
+        if names is None:
+            name_index = list(enumerate(segment.names))
+        else:
+            name_index = [(segment.names.index(n), n)
+                          for n in names if n in segment.names]
+
+        ret = []
+        for i in reader.range(start, end):
+            columns = [reader.values(i, c) for c, _ in name_index]
+            rows = [[column[r] for column in columns] for r, _ in id_index]
+            table = MetricsTable([k for _, k in id_index],
+                                 [n for _, n in name_index], rows)
+            ret.append((datetime.fromtimestamp(reader.timestamp(i)), table))
+        return ret
+
+    def series(self, rsc_id, name, start=None, end=None):
+        """ values of one metric of one resource in the time range.
+
+        Only the file of the metric is read.
+
+        :return: list of `(datetime, value)`.
+        """
+        start = None if start is None else to_epoch(start)
+        end = None if end is None else to_epoch(end)
+        ret = []
+        for reader in self._iter_segment_readers(start, end):
+            segment = reader.segment
+            if rsc_id not in segment.ids or name not in segment.names:
+                continue
+            index = segment.names.index(name)
+            position = segment.ids.index(rsc_id)
+            ret.extend((datetime.fromtimestamp(reader.timestamp(i)),
+                        reader.value(i, index, position))
+                       for i in reader.range(start, end))
+        return ret
@@ -20,14 +20,16 @@ import inspect
 import logging
 import os
 import re
+import threading
 
 import six
+from six.moves import cPickle as pickle
 
 import yaml
 from yaml import loader
 
 from storops.lib.common import cache, instance_cache, Enum, \
-    get_clz_from_module, EnumList
+    get_clz_from_module, EnumList, assure_folder, get_local_folder
 from storops.lib import converter as cvt
 import storops.lib.resource
 
@@ -196,6 +198,12 @@ class PropDescriptor(PropMapper):
                 self.re_flags)
         return ret
 
+    def compile(self):
+        """ compiles the regular expressions of this property. """
+        # `pattern` may update the flags used by the `index_pattern`
+        # so keep the order.
+        return self.pattern, self.index_pattern
+
     def __lt__(self, other):
         if isinstance(other, PropDescriptor):
             ret = self.sequence < other.sequence
@@ -207,6 +215,7 @@ class PropDescriptor(PropMapper):
 class OutputParser(object):
     def __init__(self):
         self._property_map = {}
+        self._property_names = None
         self.resource_name = ''
 
     @property
@@ -221,12 +230,14 @@ class OutputParser(object):
 
     def set_property_map(self, value):
         self._property_map = value
+        self._property_names = None
 
     def add_property(self, *props):
         for prop in props:
             seq = len(self._property_map)
             prop.sequence = seq
             self._property_map[prop.key.upper()] = prop
+        self._property_names = None
 
     def has_property_key(self, key):
         return key.upper() in self._property_map
@@ -253,7 +264,10 @@ class OutputParser(object):
 
     @property
     def property_names(self):
-        return sorted(p.key for p in self.properties)
+        # sorted once, the callers get a copy they could change.
+        if self._property_names is None:
+            self._property_names = sorted(p.key for p in self.properties)
+        return list(self._property_names)
 
     def parse_all(self, output, properties=None):
         raise NotImplementedError('must be implemented by sub-class')
@@ -270,6 +284,14 @@ class OutputParser(object):
         # do any customized initialization from config in child class
         pass
 
+    def compile(self):
+        """ prepares the parser ahead of parsing.
+
+        Child classes parsing with the patterns of the properties should
+        compile them here.
+        """
+        return self
+
     @property
     @instance_cache
     def index_property(self):
@@ -310,6 +332,30 @@ class OutputParser(object):
 class ParserConfigFactory(object):
     config_filename = 'parser_configs.yaml'
 
+    # folder to save the pre-compiled configs.  not saved if None.
+    cache_folder = None
+
+    def __init__(self):
+        self._configs = None
+        self._parsers = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def enable_config_cache(cls, folder=None):
+        """ saves the loaded configs to speed up the next start.
+
+        The cached file is refreshed when the yaml file is changed.
+        :param folder: where to save the cached file.  default to the
+            `parser_cache` folder under the storops local folder.
+        """
+        if folder is None:
+            folder = os.path.join(get_local_folder(), 'parser_cache')
+        ParserConfigFactory.cache_folder = folder
+
+    @classmethod
+    def disable_config_cache(cls):
+        ParserConfigFactory.cache_folder = None
+
     @classmethod
     def get_parser_clz(cls, data_src):
         raise NotImplementedError('get_base_clz not implemented.')
@@ -329,6 +375,18 @@ class ParserConfigFactory(object):
         return '.'.join(names)
 
     def get(self, name):
+        # parsers are built once and shared.  the lock is reentrant because
+        # parser of the nested config is built in the same call.
+        parser = self._parsers.get(name)
+        if parser is None:
+            with self._lock:
+                parser = self._parsers.get(name)
+                if parser is None:
+                    parser = self._build(name)
+                    self._parsers[name] = parser
+        return parser
+
+    def _build(self, name):
         config = self.get_config(name)
 
         parser = self._get_parser_instance(config)
@@ -336,7 +394,14 @@ class ParserConfigFactory(object):
 
         self._get_property_map(parser, config)
         parser.resource_class_name = name
-        return parser
+        return parser.compile()
+
+    def build_all(self):
+        """ builds the parsers of all the configs in one pass.
+
+        :return: dictionary of config name to parser.
+        """
+        return {name: self.get(name) for name in self._read_configs()}
 
     def _get_parser_instance(self, config):
         base_clz = self.get_parser_clz(config.data_src)
@@ -356,11 +421,60 @@ class ParserConfigFactory(object):
         return ParserConfig(all_configs[name])
 
     def _read_configs(self):
+        if self._configs is None:
+            with self._lock:
+                if self._configs is None:
+                    self._configs = self._load_configs()
+        return self._configs
+
+    def _load_configs(self):
         filename = os.path.join(self.get_folder(), self.config_filename)
-        with open(filename, 'r') as stream:
-            ret = yaml.load(stream, Loader=loader.SafeLoader)
+        cache_filename = self._get_cache_filename(filename)
+        ret = self._read_config_cache(cache_filename)
+        if ret is None:
+            safe_loader = getattr(yaml, 'CSafeLoader', loader.SafeLoader)
+            with open(filename, 'r') as stream:
+                ret = yaml.load(stream, Loader=safe_loader)
+            self._write_config_cache(cache_filename, ret)
+        return ret
+
+    def _get_cache_filename(self, filename):
+        if self.cache_folder is None:
+            ret = None
+        else:
+            name = '{}_{}.pickle'.format(
+                self.__module__.replace('.', '_'),
+                int(os.path.getmtime(filename)))
+            ret = os.path.join(self.cache_folder, name)
         return ret
 
+    @staticmethod
+    def _read_config_cache(cache_filename):
+        ret = None
+        if cache_filename is not None and os.path.exists(cache_filename):
+            try:
+                with open(cache_filename, 'rb') as stream:
+                    ret = pickle.load(stream)
+            except Exception as ex:
+                log.warning('failed to read parser config cache {}: {}'
+                            .format(cache_filename, ex))
+        return ret
+
+    @staticmethod
+    def _write_config_cache(cache_filename, configs):
+        if cache_filename is not None:
+            try:
+                assure_folder(os.path.dirname(cache_filename))
+                # write to a temp file to avoid partial file read by
+                # other processes.
+                tmp = '{}.{}.tmp'.format(cache_filename, os.getpid())
+                with open(tmp, 'wb') as stream:
+                    pickle.dump(configs, stream, protocol=2)
+                os.rename(tmp, cache_filename)
+            except (IOError, OSError) as ex:
+                log.warning('failed to write parser config cache {}: {}'
+                            .format(cache_filename, ex))
+
     @instance_cache
     def get_resource_clz_by_name(self, clz_name):
         ret = None
@@ -226,17 +226,22 @@ class ResourceList(Resource):
         if data is None:
             data = self._get_raw_resource()
 
+        self._list = self._parse_items(data)
+        return self
+
+    def _parse_items(self, data):
         if data is not None and isinstance(data, dict):
             parsed_list = data
         else:
             parsed_list = self._parse_raw(data)
 
+        ret = []
         for i in parsed_list:
             item = self._get_resource_instance()
             item.update(i)
             if self._filter(item):
-                self._list.append(item)
-        return self
+                ret.append(item)
+        return ret
 
     def _apply_filter(self):
         result = []
@@ -353,9 +358,19 @@ class ResourceListCollection(object):
     def __len__(self):
         return len(self._items)
 
-    def update(self):
-        for rsc_list in self.get_rsc_list_collection():
-            rsc_list.update()
+    def update(self, executor=None):
+        """ updates all the resource lists.
+
+        :param executor: object with a `map(func, iterable)` method, like
+            `ThreadPool`, to update the lists concurrently.  lists are
+            updated one by one if not specified.
+        """
+        rsc_lists = list(self.get_rsc_list_collection())
+        if executor is None:
+            for rsc_list in rsc_lists:
+                rsc_list.update()
+        else:
+            executor.map(lambda rsc_list: rsc_list.update(), rsc_lists)
         self.timestamp = datetime.now()
         return self
 
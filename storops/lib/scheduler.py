@@ -0,0 +1,272 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" scheduler to collect the metrics of many systems.
+
+One scheduler thread dispatches the collections of all the systems to a
+bounded worker pool.  The collections are aligned to the wall clock, like
+every minute at `hh:mm:00` plus a fixed jitter of each job, so that they
+do not drift by the collection time.
+"""
+from __future__ import unicode_literals, division
+
+import heapq
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+# max jitter is 10% of the interval, and no more than 10 seconds.
+_JITTER_RATIO = 0.1
+_MAX_JITTER = 10
+
+
+class CollectionJob(object):
+    """ a collection scheduled repeatedly.
+
+    Its `stop` method removes it from the scheduler, so that it could be
+    used in place of the `RepeatedTimer`.
+    """
+
+    def __init__(self, scheduler, name, interval, function, offset,
+                 clock=None):
+        if clock is None:
+            clock = time.time
+        self._scheduler = scheduler
+        self._clock = clock
+        self.name = name
+        self.interval = interval
+        self.function = function
+        self.offset = offset
+        self.is_running = False
+        self.is_stopped = False
+        self.next_run = None
+        self.runs = 0
+        self.errors = 0
+        self.overruns = 0
+        self.last_run = None
+        self.last_latency = None
+        self.last_error = None
+
+    def get_next_run(self, now):
+        """ the next wall clock boundary of the interval after now. """
+        ret = (math.floor((now - self.offset) / self.interval) + 1) * \
+            self.interval + self.offset
+        return ret
+
+    def run(self):
+        start = self._clock()
+        try:
+            self.function()
+            self.last_error = None
+        except Exception as ex:
+            self.errors += 1
+            self.last_error = ex
+            log.exception('failed to run collection {}.'.format(self.name))
+        finally:
+            self.last_run = start
+            self.last_latency = self._clock() - start
+            self.runs += 1
+            self.is_running = False
+
+    def stop(self):
+        self._scheduler.remove(self)
+
+    @property
+    def stats(self):
+        return {'name': self.name,
+                'interval': self.interval,
+                'runs': self.runs,
+                'errors': self.errors,
+                'overruns': self.overruns,
+                'last_run': self.last_run,
+                'last_latency': self.last_latency,
+                'is_running': self.is_running}
+
+
+class CollectionScheduler(object):
+    """ runs the collections of many systems with a bounded worker pool.
+
+    :param max_workers: max number of the collections run concurrently.
+    :param jitter: max seconds to delay the collections from the wall
+        clock boundaries.  each job gets a random delay within it, so that
+        the systems are not polled at the same time.  10% of the interval
+        (10 seconds at most) if not set.
+    :param clock: function returning the current time in seconds.
+        `time.time` if not set.
+    :param sleep: function to wait for the seconds till the next run.  the
+        jobs added or removed meanwhile are handled when it returns.  if
+        not set, the scheduler waits on its condition, which is notified
+        by the changes of the jobs.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_workers=None, jitter=None, clock=None,
+                 sleep=None):
+        if max_workers is None:
+            max_workers = DEFAULT_MAX_WORKERS
+        if clock is None:
+            clock = time.time
+        self.max_workers = max_workers
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._heap = []
+        self._jobs = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = None
+        self._thread = None
+        self._is_shutdown = False
+
+    @classmethod
+    def get_default(cls):
+        """ the scheduler shared by the systems. """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = CollectionScheduler()
+            return cls._default
+
+    def _get_offset(self, interval):
+        if self.jitter is None:
+            jitter = min(interval * _JITTER_RATIO, _MAX_JITTER)
+        else:
+            jitter = min(self.jitter, interval)
+        return random.uniform(0, jitter)
+
+    def add(self, interval, function, name=None):
+        """ schedules the function to run every interval seconds.
+
+        :return: the `CollectionJob`.
+        """
+        if interval <= 0:
+            raise ValueError('interval should be positive.')
+        job = CollectionJob(self, name, interval, function,
+                            self._get_offset(interval), clock=self._clock)
+        with self._cond:
+            if self._is_shutdown:
+                raise RuntimeError('scheduler is shut down.')
+            self._jobs.add(job)
+            self._push(job, job.get_next_run(self._clock()))
+            self._start()
+            self._cond.notify()
+        return job
+
+    def remove(self, job):
+        with self._cond:
+            job.is_stopped = True
+            if job in self._jobs:
+                log.info('stop collection {}.'.format(job.name))
+                self._jobs.discard(job)
+            # removed from the heap when it is due
+            self._cond.notify()
+
+    @property
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs)
+
+    def stats(self):
+        """ collection stats of all the jobs, like the latency. """
+        return [job.stats for job in self.jobs]
+
+    def _push(self, job, next_run):
+        job.next_run = next_run
+        heapq.heappush(self._heap, (next_run, next(self._seq), job))
+
+    def _start(self):
+        if self._thread is None:
+            self._pool = ThreadPool(self.max_workers)
+            self._thread = threading.Thread(target=self._loop,
+                                            name='storops-collection')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                due = self._get_due_jobs()
+                if due is None:
+                    break
+            for job in due:
+                self._dispatch(job)
+
+    def _get_due_jobs(self):
+        """ waits for the jobs to be run.
+
+        :return: due jobs, `None` if the scheduler is shut down.
+        """
+        while not self._is_shutdown:
+            now = self._clock()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                if not job.is_stopped:
+                    due.append(job)
+                    self._push(job, job.get_next_run(now))
+            if due:
+                return due
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wait(timeout)
+        return None
+
+    def _wait(self, timeout):
+        if timeout is None or self._sleep is None:
+            self._cond.wait(timeout)
+        else:
+            self._cond.release()
+            try:
+                self._sleep(timeout)
+            finally:
+                self._cond.acquire()
+
+    def _dispatch(self, job):
+        with self._cond:
+            if self._is_shutdown:
+                return
+            if job.is_running:
+                # skip this one instead of piling up the collections
+                job.overruns += 1
+                log.warning('collection {} is still running, skip the one '
+                            'at {}.'.format(job.name,
+                                            time.ctime(self._clock())))
+                return
+            job.is_running = True
+            try:
+                self._pool.apply_async(job.run)
+            except ValueError:
+                # the pool is terminated by `shutdown`
+                job.is_running = False
+                if not self._is_shutdown:
+                    raise
+
+    def shutdown(self):
+        with self._cond:
+            self._is_shutdown = True
+            self._jobs.clear()
+            self._heap = []
+            self._cond.notify()
+        if self._pool is not None:
+            self._pool.terminate()
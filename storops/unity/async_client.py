@@ -0,0 +1,167 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" asyncio version of the Unity client.
+
+Requires python 3.5+ and `aiohttp`.  One event loop could poll many
+arrays without a thread for each of them::
+
+    clients = [AsyncUnityClient(ip, 'admin', 'password') for ip in ips]
+    results = await asyncio.gather(
+        *[c.get_all('lun', base_fields=('id', 'name')) for c in clients])
+"""
+from __future__ import unicode_literals
+
+import logging
+
+from storops.connection.async_connector import AsyncUnityRESTConnector
+from storops.exception import UnityResourceNotSupportedError, \
+    UnityResourceNotFoundError
+from storops.unity.client import UnityClient
+from storops.unity.resource.type_resource import UnityType
+from storops.unity.resp import RestResponse
+
+log = logging.getLogger(__name__)
+
+
+class AsyncUnityClient(object):
+    def __init__(self, ip, username, password, port=443, verify=False,
+                 retries=None, connect_timeout=30, application_type=None,
+                 pool_maxsize=None):
+        self.ip = ip
+        self._rest = AsyncUnityRESTConnector(
+            ip, port=port, user=username, password=password, verify=verify,
+            retries=retries, connect_timeout=connect_timeout,
+            application_type=application_type, pool_maxsize=pool_maxsize)
+        self._type_fields = {}
+
+    async def close(self):
+        await self._rest.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    assemble_url = UnityClient.assemble_url
+    dict_to_filter_string = UnityClient.dict_to_filter_string
+    make_body = UnityClient.make_body
+
+    async def rest_get(self, url, fields=None, **params):
+        if fields is None:
+            fields = []
+        params['fields'] = ','.join(map(str, sorted(fields)))
+        url = self.assemble_url(url, **params)
+        return RestResponse(await self._rest.get(url))
+
+    async def rest_post(self, url, body=None, **params):
+        url = self.assemble_url(url, **params)
+        return RestResponse(await self._rest.post(url, body=body))
+
+    async def rest_delete(self, url, body=None, **params):
+        url = self.assemble_url(url, **params)
+        return RestResponse(await self._rest.delete(url, body=body))
+
+    async def get_fields(self, type_name, base_fields=None,
+                         nested_fields=None):
+        if base_fields is not None:
+            ret = base_fields
+        else:
+            ret = self._type_fields.get(type_name)
+            if ret is None:
+                ret = await self._get_type_fields(type_name)
+                self._type_fields[type_name] = ret
+        if nested_fields is not None:
+            if isinstance(nested_fields, str):
+                nested_fields = tuple([nested_fields])
+            ret = ret + nested_fields
+        return ret
+
+    async def _get_type_fields(self, type_name):
+        # same as the `fields` of `UnityType`
+        resp = await self.rest_get('/api/types/{}'.format(type_name),
+                                   fields=UnityType._fields)
+        try:
+            resp.raise_if_err()
+        except UnityResourceNotFoundError:
+            log.info('Resource type [{}] is not supported.'.format(type_name))
+            raise UnityResourceNotSupportedError(
+                "Resource is not supported.")
+        attributes = resp.first_content.get('attributes', [])
+        return tuple(sorted(att['name'] for att in attributes))
+
+    async def get_all(self, type_name, base_fields=None, the_filter=None,
+                      nested_fields=None):
+        """Get all the resources of the type.
+
+        Same as `UnityClient.get_all`.
+        """
+        try:
+            fields = await self.get_fields(type_name, base_fields,
+                                           nested_fields)
+        except UnityResourceNotSupportedError:
+            return RestResponse(inputs="")
+        the_filter = self.dict_to_filter_string(the_filter)
+        url = '/api/types/{}/instances'.format(type_name)
+
+        resp = await self.rest_get(url, fields=fields, filter=the_filter)
+        pages = [resp]
+        while resp.has_next_page:
+            resp = await self.rest_get(url, fields=fields,
+                                       filter=the_filter,
+                                       page=resp.next_page)
+            pages.append(resp)
+        # noinspection PyProtectedMember
+        return UnityClient._merge_pages(pages)
+
+    async def get(self, type_name, obj_id, base_fields=None,
+                  nested_fields=None):
+        """Get the resource by resource id.
+
+        Same as `UnityClient.get`.
+        """
+        try:
+            fields = await self.get_fields(type_name, base_fields,
+                                           nested_fields)
+        except UnityResourceNotSupportedError:
+            return RestResponse(inputs="")
+        url = '/api/instances/{}/{}'.format(type_name, obj_id)
+        return await self.rest_get(url, fields=fields)
+
+    async def post(self, type_name, **kwargs):
+        url = '/api/types/{}/instances'.format(type_name)
+        body = self.make_body(kwargs)
+        return await self.rest_post(url, body)
+
+    async def action(self, type_name, obj_id, action, **kwargs):
+        url = '/api/instances/{}/{}/action/{}'.format(type_name, obj_id,
+                                                      action)
+        url_params = {}
+        if kwargs.pop('async_mode', False):
+            url_params['timeout'] = 0
+        body = self.make_body(kwargs, allow_empty=True)
+        return await self.rest_post(url, body, **url_params)
+
+    async def modify(self, type_name, obj_id, **kwargs):
+        return await self.action(type_name, obj_id, 'modify', **kwargs)
+
+    async def delete(self, type_name, _id, **kwargs):
+        url = '/api/instances/{}/{}'.format(type_name, _id)
+        url_params = {'compact': True}
+        if kwargs.pop('async_mode', False):
+            url_params['timeout'] = 0
+        body = self.make_body(kwargs)
+        return await self.rest_delete(url, body, **url_params)
@@ -21,20 +21,158 @@ import sys
 
 import six
 
-from storops.lib.common import cache, all_not_none
+from storops.lib.common import cache, all_not_none, try_import
 from storops.lib.metric import CalculatorMetaInfo, MetricConfigParser, \
     MetricConfigList
 
 __author__ = 'Cedric Zhuang'
 
+np = try_import('numpy')
+
+# integers are saved as float in the columns.  they are exact only within
+# the precision of float.
+_MAX_EXACT_INT = 2 ** 53
+
 
 class IdValues(object):
+    """ values of the objects, keyed by the object id.
+
+    When `numpy` is available, the values built by `from_counters` are
+    saved in columns: a tuple of sorted ids and a float array of values.
+    Operations between two columnar instances with the same ids, or with
+    a number, are done on the arrays.  Other operations fall back to the
+    values in the dict and give the same results.
+    """
     NaN = float('nan')
 
     def __init__(self, data=None):
         if data is None:
             data = {}
-        self._data = data
+        self._dict = data
+        self._index = None
+        self._values = None
+        # `True` for the values that are integers in the dict
+        self._is_int = None
+
+    @classmethod
+    def from_columns(cls, index, values, is_int):
+        ret = cls()
+        ret._dict = None
+        ret._index = index
+        ret._values = values
+        ret._is_int = is_int
+        return ret
+
+    @classmethod
+    def from_counters(cls, counters, index=None):
+        """ creates the instance from the raw counters of a query result.
+
+        :param counters: dict of id to counter, like `{'sv_1': '385'}`.
+            counters are converted to int.
+        :param index: sorted ids of the counters.  pass the index of other
+            instances with the same ids to share it.
+        :return: the columnar instance if possible.
+        """
+        ret = None
+        if np is not None:
+            if index is None:
+                index = tuple(sorted(counters.keys()))
+            ret = cls._counters_to_columns(counters, index)
+        if ret is None:
+            ret = cls({k: int(v) for k, v in counters.items()})
+        return ret
+
+    @classmethod
+    def _counters_to_columns(cls, counters, index):
+        try:
+            values = np.array([counters[k] for k in index]).astype(np.int64)
+        except (ValueError, TypeError, OverflowError):
+            return None
+        if len(values) and np.abs(values).max() >= _MAX_EXACT_INT:
+            # could not be saved in float without losing precision
+            return None
+        return cls.from_columns(index, values.astype(np.float64),
+                                np.ones(len(index), dtype=bool))
+
+    @property
+    def is_columnar(self):
+        return self._values is not None
+
+    @property
+    def _data(self):
+        if self._dict is None:
+            self._dict = self._columns_to_dict()
+        return self._dict
+
+    def _columns_to_dict(self):
+        if self._is_int.all():
+            values = self._values.astype(np.int64).tolist()
+        elif self._is_int.any():
+            values = [int(v) if is_int else v
+                      for v, is_int in zip(self._values.tolist(),
+                                           self._is_int.tolist())]
+        else:
+            values = self._values.tolist()
+        return dict(zip(self._index, values))
+
+    def _get_operand_columns(self, other):
+        """ returns the values and the integer flags of the operand.
+
+        :return: `None` if the operation could not be done on the arrays.
+        """
+        ret = None
+        if not self.is_columnar:
+            pass
+        elif isinstance(other, IdValues):
+            if other.is_columnar and (other._index is self._index or
+                                      other._index == self._index):
+                ret = other._values, other._is_int
+        elif isinstance(other, bool):
+            pass
+        elif isinstance(other, six.integer_types):
+            if abs(other) < _MAX_EXACT_INT:
+                ret = float(other), True
+        elif isinstance(other, float):
+            ret = other, False
+        return ret
+
+    def _new_columns(self, values, is_int):
+        if np.ndim(is_int) == 0:
+            is_int = np.full(len(self._index), bool(is_int), dtype=bool)
+        if is_int.any() and \
+                np.abs(values[is_int]).max() >= _MAX_EXACT_INT:
+            # integer results out of the precision of float
+            ret = None
+        else:
+            ret = IdValues.from_columns(self._index, values, is_int)
+        return ret
+
+    def _apply_columns_op(self, op, other):
+        operand = self._get_operand_columns(other)
+        if operand is None:
+            ret = None
+        else:
+            values, is_int = operand
+            ret = op(self._values, self._is_int, values, is_int)
+        return ret
+
+    def _columns_add(self, v1, is_int1, v2, is_int2):
+        return self._new_columns(v1 + v2, is_int1 & is_int2)
+
+    def _columns_mul(self, v1, is_int1, v2, is_int2):
+        return self._new_columns(v1 * v2, is_int1 & is_int2)
+
+    def _columns_div(self, v1, _, v2, __):
+        # same as `_div`: 0 if dividend is 0, NaN if divisor is 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.true_divide(v1, v2)
+        values = np.where(v2 == 0, self.NaN, values)
+        is_zero = v1 == 0
+        values = np.where(is_zero, 0.0, values)
+        return self._new_columns(values, is_zero)
+
+    def _columns_rdiv(self, v1, is_int1, v2, is_int2):
+        return self._columns_div(v2, is_int2, v1, is_int1)
 
     def __sub__(self, other):
         if other is None:
@@ -51,7 +189,12 @@ class IdValues(object):
         return ret
 
     def __neg__(self):
-        return IdValues({k: -v for k, v in self._data.items()})
+        if self.is_columnar:
+            ret = IdValues.from_columns(self._index, -self._values,
+                                        self._is_int)
+        else:
+            ret = IdValues({k: -v for k, v in self._data.items()})
+        return ret
 
     @staticmethod
     def _add(op1, op2):
@@ -68,13 +211,18 @@ class IdValues(object):
             defaults = 0
             op = self._add
 
-            ret = self._apply_op(defaults, op, other)
+            ret = self._apply_op(defaults, op, other, self._columns_add)
         else:
             ret = self.copy()
         return ret
 
-    def _apply_op(self, defaults, op, other):
-        if isinstance(other, IdValues):
+    def _apply_op(self, defaults, op, other, columns_op=None):
+        ret = None
+        if columns_op is not None:
+            ret = self._apply_columns_op(columns_op, other)
+        if ret is not None:
+            pass
+        elif isinstance(other, IdValues):
             keys = self.keys_union(other)
             ret = IdValues(
                 {k: op(self.get(k, defaults), other.get(k, defaults))
@@ -104,11 +252,14 @@ class IdValues(object):
         return r
 
     def __div__(self, other):
-        return self._apply_op(self.NaN, self._div, other)
+        return self._apply_op(self.NaN, self._div, other, self._columns_div)
 
     def __rtruediv__(self, other):
-        return IdValues({k: self._div(other, v)
-                         for k, v in self._data.items()})
+        ret = self._apply_columns_op(self._columns_rdiv, other)
+        if ret is None:
+            ret = IdValues({k: self._div(other, v)
+                            for k, v in self._data.items()})
+        return ret
 
     def __rdiv__(self, other):
         return self.__rtruediv__(other)
@@ -125,7 +276,7 @@ class IdValues(object):
 
     def __mul__(self, other):
         if other is not None:
-            ret = self._apply_op(1, self._mul, other)
+            ret = self._apply_op(1, self._mul, other, self._columns_mul)
         else:
             ret = self.copy()
         return ret
@@ -134,10 +285,20 @@ class IdValues(object):
         return self.__mul__(other)
 
     def copy(self):
-        return IdValues({k: v for k, v in self._data.items()})
+        if self.is_columnar:
+            # arrays are never changed in place
+            ret = IdValues.from_columns(self._index, self._values,
+                                        self._is_int)
+        else:
+            ret = IdValues({k: v for k, v in self._data.items()})
+        return ret
 
     def __len__(self):
-        return len(self._data)
+        if self._dict is None:
+            ret = len(self._index)
+        else:
+            ret = len(self._dict)
+        return ret
 
     def __getitem__(self, item):
         return self._data.get(item, self.NaN)
@@ -150,6 +311,10 @@ class IdValues(object):
 
     def set(self, k, v):
         self._data[k] = v
+        # the dict is the only copy of the values after changed
+        self._index = None
+        self._values = None
+        self._is_int = None
 
     def __str__(self):
         return '{}({})'.format(self.__class__.__name__, self._data)
@@ -540,10 +705,18 @@ class UnityMetricConfigParser(MetricConfigParser):
     def get_folder(cls):
         return os.path.dirname(inspect.getfile(cls))
 
+    # config lists of the resource classes, built once.  the lookups are
+    # too frequent for `cache`.
+    _config_lists = {}
+
     @classmethod
     def get_config(cls, name):
         name = cls._get_clz_name(name)
-        return UnityMetricConfigList(cls._read_configs().get(name))
+        ret = cls._config_lists.get(name)
+        if ret is None:
+            ret = UnityMetricConfigList(cls._read_configs().get(name))
+            cls._config_lists[name] = ret
+        return ret
 
     @classmethod
     @cache
@@ -560,14 +733,64 @@ class UnityCalculatorMetaInfo(CalculatorMetaInfo):
         return UnityMetricConfigParser()
 
     def get_metric_value(self, clz, metric_name, cli, obj=None):
-        if not hasattr(cli, 'curr_counter'):
-            raise ValueError('cli should has "curr_counter" attribute.')
-        if not hasattr(cli, 'prev_counter'):
-            raise ValueError('cli should has "prev_counter" attribute.')
+        self.check_cli(cli)
 
         config = self.get_config(clz).get_metric_config(metric_name)
-        return config.calculator(config.paths, cli.prev_counter,
-                                 cli.curr_counter, obj)
+        if obj is not None and self._get_memo(cli) is None:
+            ret = config.calculator(config.paths, cli.prev_counter,
+                                    cli.curr_counter, obj)
+        else:
+            values = self._get_values_of_all(clz, metric_name, config, cli)
+            if obj is None:
+                ret = values.copy() if isinstance(values, IdValues) \
+                    else values
+            else:
+                ret = values[obj]
+        return ret
+
+    def get_metric_values(self, clz, metric_names, cli, objs):
+        self.check_cli(cli)
+
+        config_list = self.get_config(clz)
+        objs = list(objs)
+        columns = []
+        for name in metric_names:
+            config = config_list.get_metric_config(name)
+            values = self._get_values_of_all(clz, name, config, cli)
+            if isinstance(values, IdValues):
+                column = [values[obj] for obj in objs]
+            else:
+                column = [values] * len(objs)
+            columns.append(column)
+
+        if columns:
+            ret = [list(row) for row in zip(*columns)]
+        else:
+            ret = [[] for _ in objs]
+        return ret
+
+    def _get_values_of_all(self, clz, metric_name, config, cli):
+        # get the memo before the samples.  if the samples are rotated in
+        # between, the values are saved to the outdated memo.
+        memo = self._get_memo(cli)
+        prev, curr = cli.prev_counter, cli.curr_counter
+        if memo is None:
+            ret = config.calculator(config.paths, prev, curr)
+        else:
+            # values of all the objects are calculated once for each pair
+            # of samples.
+            key = (self._metric_config._get_clz_name(clz), metric_name,
+                   id(prev), id(curr))
+            ret = memo.get(key)
+            if ret is None:
+                ret = config.calculator(config.paths, prev, curr)
+                memo[key] = ret
+        return ret
+
+    @staticmethod
+    def _get_memo(cli):
+        records = getattr(cli, 'metric_counter_records', None)
+        return getattr(records, 'memo', None)
 
     def get_all_paths(self, clz_list=None):
         if clz_list is not None:
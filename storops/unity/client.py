@@ -16,7 +16,9 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import OrderedDict
 from functools import wraps
+from multiprocessing.pool import ThreadPool
 
 import six
 from six.moves import urllib
@@ -35,6 +37,11 @@ __author__ = 'Cedric Zhuang'
 
 log = logging.getLogger(__name__)
 
+# the request line limit of the web server is 8k, leave enough room for
+# the host and the encoding of the url.
+MAX_URL_LENGTH = 4096
+DEFAULT_QUERY_WORKERS = 4
+
 
 def wrap_not_supported(func):
     @wraps(func)
@@ -50,26 +57,41 @@ def wrap_not_supported(func):
 
 class UnityClient(PerfManager):
     def __init__(self, ip, username, password, port=443, verify=False,
-                 retries=None, cache_interval=0, application_type=None):
+                 retries=None, cache_interval=0, application_type=None,
+                 page_workers=None, pool_connections=None, pool_maxsize=None,
+                 pool_block=False, keep_alive=True):
         super(UnityClient, self).__init__()
         self.ip = ip
+        self.page_workers = page_workers
         self._rest = UnityRESTConnector(ip, port=port, user=username,
                                         password=password,
                                         verify=verify,
                                         retries=retries,
                                         cache_interval=cache_interval,
-                                        application_type=application_type)
+                                        application_type=application_type,
+                                        pool_connections=pool_connections,
+                                        pool_maxsize=pool_maxsize,
+                                        pool_block=pool_block,
+                                        keep_alive=keep_alive)
         self._system_version = None
 
+    @property
+    def pool_stats(self):
+        return self._rest.http_client.pool_stats
+
     @wrap_not_supported
     def get_all(self, type_name, base_fields=None, the_filter=None,
-                nested_fields=None):
+                nested_fields=None, page_workers=None):
         """Get the resource by resource id.
 
         :param nested_fields: nested resource fields
         :param base_fields: fields of this resource
-        :param the_filter: dictionary of filter like `{'name': 'abc'}`
+        :param the_filter: dictionary of filter like `{'name': 'abc'}`, or
+            the filter string.
         :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param page_workers: max number of pages fetched concurrently.
+            use the `page_workers` of the client if not specified.  pages
+            are fetched one by one if it's less than 2.
         :return: List of resource class objects
         """
         fields = self.get_fields(type_name, base_fields, nested_fields)
@@ -77,16 +99,181 @@ class UnityClient(PerfManager):
 
         url = '/api/types/{}/instances'.format(type_name)
 
-        resp = self.rest_get(url, fields=fields, filter=the_filter)
-        ret = resp
+        if page_workers is None:
+            page_workers = self.page_workers
+        if page_workers is not None and page_workers > 1:
+            pages = self._get_pages_parallel(url, fields, the_filter,
+                                             page_workers)
+        else:
+            pages = self._get_pages_serial(url, fields, the_filter)
+        return self._merge_pages(pages)
+
+    def _get_pages_serial(self, url, fields, the_filter, resp=None):
+        if resp is None:
+            resp = self.rest_get(url, fields=fields, filter=the_filter)
+        ret = [resp]
         while resp.has_next_page:
             resp = self.rest_get(url, fields=fields, filter=the_filter,
                                  page=resp.next_page)
-            ret.entries.extend(resp.entries)
+            ret.append(resp)
+        return ret
+
+    def _get_pages_parallel(self, url, fields, the_filter, page_workers):
+        resp = self.rest_get(url, fields=fields, filter=the_filter,
+                             with_entrycount=True)
+        page_count = resp.page_count
+        if not resp.has_next_page:
+            ret = [resp]
+        elif page_count is None:
+            log.debug('entry count not available for {}, '
+                      'fetch pages one by one.'.format(url))
+            ret = self._get_pages_serial(url, fields, the_filter, resp)
+        else:
+            def _get_page(page):
+                return self.rest_get(url, fields=fields, filter=the_filter,
+                                     page=page)
+
+            pages = list(range(resp.next_page, page_count + 1))
+            pool = ThreadPool(min(page_workers, len(pages)))
+            try:
+                # map keeps the order of the pages
+                ret = [resp] + pool.map(_get_page, pages)
+            finally:
+                pool.close()
+            if ret[-1].has_next_page:
+                # instances created after the entry count is retrieved
+                ret += self._get_pages_serial(url, fields, the_filter,
+                                              ret.pop())
+        return ret
+
+    @staticmethod
+    def _merge_pages(pages):
+        ret = pages[0]
+        if len(pages) > 1:
+            # do not extend the entries in place, the body of the first
+            # page may be shared by the response cache.
+            body = dict(ret.body)
+            body['entries'] = [entry for page in pages
+                               for entry in page.entries]
+            ret = RestResponse((ret.response, body))
+        return ret
+
+    @wrap_not_supported
+    def get_by_ids(self, type_name, ids, base_fields=None,
+                   nested_fields=None, workers=None):
+        """Get the resources of the ids in batches.
+
+        Ids are split into chunks of `id eq .. or id eq ..` filters which
+        keep the url shorter than `MAX_URL_LENGTH`.  Chunks are queried
+        concurrently.
+
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param ids: list of the resource ids
+        :param base_fields: fields of this resource
+        :param nested_fields: nested resource fields
+        :param workers: max number of chunks queried concurrently.
+        :return: `RestResponse` with the entries of all chunks
+        """
+        fields = self.get_fields(type_name, base_fields, nested_fields)
+        url = '/api/types/{}/instances'.format(type_name)
+        base_length = len(self.assemble_url(url, fields=fields, filter=''))
+        filters = self.get_id_filters(ids, MAX_URL_LENGTH - base_length)
+        if not filters:
+            return RestResponse({'entries': []})
+
+        if workers is None:
+            workers = self.page_workers or DEFAULT_QUERY_WORKERS
+
+        def _get_chunk(the_filter):
+            return self._get_pages_serial(url, fields, the_filter)
+
+        if len(filters) == 1 or workers < 2:
+            chunks = [_get_chunk(f) for f in filters]
+        else:
+            pool = ThreadPool(min(workers, len(filters)))
+            try:
+                chunks = pool.map(_get_chunk, filters)
+            finally:
+                pool.close()
+        return self._merge_pages([page for chunk in chunks
+                                  for page in chunk])
+
+    def get_many(self, type_name, ids, base_fields=None, nested_fields=None,
+                 workers=None):
+        """Get the resources of the ids with as few requests as possible.
+
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :param ids: list of the resource ids
+        :param base_fields: fields of this resource
+        :param nested_fields: nested resource fields
+        :param workers: max number of requests sent concurrently.
+        :return: ordered dictionary of id to the content of the resource.
+            ids not found are not included.
+        """
+        resp = self.get_by_ids(type_name, ids, base_fields=base_fields,
+                               nested_fields=nested_fields, workers=workers)
+        return OrderedDict((content.get('id'), content)
+                           for content in resp.contents)
+
+    @classmethod
+    def get_id_filters(cls, ids, max_length=None):
+        """Split the ids into filter strings not longer than `max_length`.
+
+        Length is counted after the url encoding of the filter.
+        """
+        if max_length is None:
+            max_length = MAX_URL_LENGTH
+        sep = ' or '
+        sep_length = len(urllib.parse.quote(sep))
+        ret = []
+        items = []
+        length = 0
+        for _id in OrderedDict.fromkeys(ids):
+            item = cls.dict_to_filter_string({'id': _id})
+            item_length = len(urllib.parse.quote(item))
+            if items and length + sep_length + item_length > max_length:
+                ret.append(sep.join(items))
+                items = []
+                length = 0
+            if items:
+                length += sep_length
+            items.append(item)
+            length += item_length
+        if items:
+            ret.append(sep.join(items))
         return ret
 
+    def iter_pages(self, type_name, base_fields=None, the_filter=None,
+                   nested_fields=None):
+        """Get the resources page by page.
+
+        Next page is requested only after the current one is consumed.
+
+        :param nested_fields: nested resource fields
+        :param base_fields: fields of this resource
+        :param the_filter: dictionary of filter like `{'name': 'abc'}`
+        :param type_name: Resource type. For example, pool, lun, nasServer.
+        :return: generator of `RestResponse`, one for each page
+        """
+        try:
+            fields = self.get_fields(type_name, base_fields, nested_fields)
+            the_filter = self.dict_to_filter_string(the_filter)
+            url = '/api/types/{}/instances'.format(type_name)
+            resp = self.rest_get(url, fields=fields, filter=the_filter)
+        except UnityResourceNotSupportedError:
+            return
+        yield resp
+        while resp.has_next_page:
+            resp = self.rest_get(url, fields=fields, filter=the_filter,
+                                 page=resp.next_page)
+            yield resp
+
     @classmethod
     def dict_to_filter_string(cls, the_filter):
+        if isinstance(the_filter, six.string_types):
+            # already a filter string, like `timestamp gt "..."`
+            return the_filter
+
         def _get_non_list_value(k, v):
             if isinstance(v, six.string_types):
                 # Don't encode : and space chars, they are known working with
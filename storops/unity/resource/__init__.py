@@ -22,7 +22,7 @@ from storops.exception import NoIndexException, UnityResourceNotFoundError, \
     UnityPerfMonNotEnabledError
 from storops.lib.common import clear_instance_cache, instance_cache, \
     get_local_folder
-from storops.lib.metric import MetricsDumper
+from storops.lib.metric import MetricsDumper, MetricsTable
 from storops.lib.resource import Resource, ResourceList
 from storops.unity import parser
 from storops.unity.calculator import calculators
@@ -164,6 +164,26 @@ class UnityResource(Resource):
         return calculators.get_metric_value(
             self.clz_name, item, self._cli, self.get_id())
 
+    def get_window_metric_value(self, item, window):
+        """ metric over the time window, like `5m`, `15m` or `900`.
+
+        Requires the samples of the window to be kept.  See the
+        `history_size` of `UnitySystem.enable_perf_stats`.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise UnityPerfMonNotEnabledError()
+        return calculators.get_window_metric_value(
+            self.clz_name, item, self._cli, window, self.get_id())
+
+    def get_metric_aggregates(self, item, window=None, percentiles=None):
+        """ min, max, avg and percentiles of the metric in the time window.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise UnityPerfMonNotEnabledError()
+        return calculators.get_metric_aggregates(
+            self.clz_name, item, self._cli, self.get_id(), window=window,
+            percentiles=percentiles)
+
     def get_metric_timestamp(self):
         curr = self._cli.curr_counter
         if curr is None or len(curr) == 0:
@@ -297,7 +317,7 @@ class UnityResourceList(UnityResource, ResourceList):
             item._cli = self._cli
         return ret
 
-    def _get_raw_resource(self):
+    def _get_rest_filter(self):
         the_filter = {}
         _parser = self._get_parser()
         for k, v in self._rsc_filter.items():
@@ -314,14 +334,52 @@ class UnityResourceList(UnityResource, ResourceList):
             if len(keys) == 2:
                 label = k
             the_filter[label] = v
+        return the_filter
+
+    def _get_raw_resource(self):
+        the_filter = self._get_rest_filter()
         nested_obj = self.get_resource_class().build_nested_properties_obj()
         nested_fields = nested_obj.query_fields if nested_obj else None
-        res = self._cli.get_all(
-            self.resource_class, the_filter=the_filter,
-            nested_fields=nested_fields)
+        ids = the_filter.get('id')
+        if len(the_filter) == 1 and isinstance(ids, (list, tuple, set)):
+            # query by id list in batches
+            res = self._cli.get_by_ids(self.resource_class, ids,
+                                       nested_fields=nested_fields)
+        else:
+            res = self._cli.get_all(
+                self.resource_class, the_filter=the_filter,
+                nested_fields=nested_fields)
         self.set_preloaded_properties(nested_obj)
         return res
 
+    def iter_pages(self):
+        """ Yields the resources of this list page by page.
+
+        Resources are parsed page by page and only the current page is
+        kept in memory.  The list itself is not updated.
+        :return: generator of resource list, one for each page
+        """
+        the_filter = self._get_rest_filter()
+        nested_obj = self.get_resource_class().build_nested_properties_obj()
+        nested_fields = nested_obj.query_fields if nested_obj else None
+        for resp in self._cli.iter_pages(self.resource_class,
+                                         the_filter=the_filter,
+                                         nested_fields=nested_fields):
+            items = self._parse_items(resp)
+            for item in items:
+                item._cli = self._cli
+                item.set_preloaded_properties(nested_obj)
+            yield items
+
+    def stream(self):
+        """ Yields the resources of this list one by one.
+
+        Same as `iter_pages` but flattens the pages.
+        """
+        for items in self.iter_pages():
+            for item in items:
+                yield item
+
     def set_cli(self, cli):
         super(UnityResourceList, self).set_cli(cli)
         for item in self:
@@ -332,6 +390,8 @@ class UnityResourceList(UnityResource, ResourceList):
     def get(cls, cli, _id=None, **filters):
         if _id is None:
             ret = cls(cli=cli, **filters)
+        elif isinstance(_id, (list, tuple, set)):
+            ret = cls(cli=cli, id=list(_id), **filters)
         else:
             ret = cls.get_resource_class().get(cli=cli, _id=_id)
         return ret
@@ -366,17 +426,47 @@ class UnityResourceList(UnityResource, ResourceList):
     def _get_resource_instance(self):
         return self.get_resource_class()(cli=self._cli)
 
-    def persist_metric_data(self, filename=None):
+    def persist_metric_data(self, filename=None, store=None):
+        """ persists the metrics of the resources.
+
+        :param filename: csv file to append the metrics.
+        :param store: `MetricStore` to save the metrics instead of the csv
+            file.
+        """
+        if store is not None:
+            return store.write(self.get_metric_store_name(),
+                               self.metrics_table())
         if filename is None:
             filename = self.get_default_metric_csv_filename()
         return self._metrics_dumper.persist_metric_data(filename)
 
+    def get_metric_store_name(self):
+        return '{}_{}'.format(self._cli.ip, self.resource_class_name)
+
     def get_metrics_csv(self, sep=None):
         return self._metrics_dumper.get_metrics_csv(sep=sep)
 
+    def metrics_table(self, names=None):
+        """ calculates the metrics of all the resources in the list.
+
+        Each metric is calculated once for all the resources instead of
+        once for each resource.
+
+        :param names: names of the metrics.  all the metrics if not set.
+        :return: `MetricsTable` with one row for each resource.
+        """
+        if names is None:
+            names = self.metric_names()
+        if names and not self._cli.is_perf_metric_enabled(self):
+            raise UnityPerfMonNotEnabledError()
+        ids = [rsc.get_id() for rsc in self]
+        rows = calculators.get_metric_values(self.clz_name, names,
+                                             self._cli, ids)
+        return MetricsTable(ids, names, rows)
+
     def get_default_metric_csv_filename(self):
         folder = get_local_folder()
-        name = '{}_{}.csv'.format(self._cli.ip, self.resource_class_name)
+        name = '{}.csv'.format(self.get_metric_store_name())
         return os.path.join(folder, name)
 
     @property
@@ -15,12 +15,30 @@
 #    under the License.
 from __future__ import unicode_literals
 
-from storops.lib.common import instance_cache, clear_instance_cache
+import json
+import logging
+import os
+import threading
+
+from dateutil import tz
+
+from storops.lib.common import instance_cache, clear_instance_cache, \
+    get_local_folder, assure_folder
 from storops.unity.calculator import IdValues
 from storops.unity.resource import UnityResource, UnityResourceList
 
 __author__ = 'Cedric Zhuang'
 
+log = logging.getLogger(__name__)
+
+
+def to_filter_timestamp(timestamp):
+    """ formats the timestamp in utc for the rest filter. """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(tz.tzutc()).replace(tzinfo=None)
+    return '{}.{:03d}Z'.format(timestamp.strftime('%Y-%m-%dT%H:%M:%S'),
+                               timestamp.microsecond // 1000)
+
 
 class UnityMetric(UnityResource):
     pass
@@ -34,9 +52,17 @@ class UnityMetricList(UnityResourceList):
 
 class UnityMetricRealTimeQuery(UnityResource):
     @classmethod
-    def get_query_list(cls, cli, interval, paths):
+    def get_query_list(cls, cli, interval, paths, registry=None):
+        """ gets the queries of the paths, creates one if not found.
+
+        :param registry: `UnityMetricQueryRegistry` of the queries used
+            before.  they are preferred to the other queries of the array,
+            and the queries used are saved to it.
+        """
         queries = UnityMetricRealTimeQueryList(cli=cli, interval=interval)
         queries.sort_by_path()
+        if registry is not None:
+            queries.prefer(registry.get_ids(cli.ip, interval))
         paths = set(paths)
         id_list = []
         for query in queries:
@@ -48,6 +74,8 @@ class UnityMetricRealTimeQuery(UnityResource):
             id_list.append(
                 cls.create(cli, interval, sorted(list(paths))).get_id())
             queries.update()
+        if registry is not None:
+            registry.set_ids(cli.ip, interval, id_list)
         return queries.set_id_list(id_list)
 
     @classmethod
@@ -67,6 +95,9 @@ class UnityMetricRealTimeQueryList(UnityResourceList):
         super(UnityMetricRealTimeQueryList, self).__init__(cli)
         self._interval = interval
         self._id_list = id_list
+        # {query id: {path: latest result}}, for the incremental fetch
+        self._latest_results = {}
+        self._last_timestamps = {}
 
     def set_id_list(self, id_list):
         self._id_list = id_list
@@ -83,6 +114,14 @@ class UnityMetricRealTimeQueryList(UnityResourceList):
         if self._list is not None:
             self._list.sort(key=lambda q: len(q.paths), reverse=reverse)
 
+    def prefer(self, id_list):
+        """ moves the queries of the ids to the front of the list. """
+        if self._list is None:
+            self.update()
+        if self._list is not None and id_list:
+            # sort is stable, other queries are kept in order
+            self._list.sort(key=lambda q: q.get_id() not in id_list)
+
     def _filter(self, item):
         ret = True
         if self._interval is not None:
@@ -92,7 +131,18 @@ class UnityMetricRealTimeQueryList(UnityResourceList):
 
         return ret
 
-    def get_query_result(self, paths=None):
+    def get_query_result(self, paths=None, incremental=False):
+        """ gets the results of all the queries.
+
+        :param paths: paths of the results.  all the paths if not set.
+        :param incremental: only fetches the results later than the ones
+            fetched last time by this list.  the latest result of each path
+            is kept, so the unchanged results are not downloaded again.
+        :return: `UnityMetricQueryResultList` of the results.
+        """
+        if incremental:
+            return self._get_incremental_query_result(paths)
+
         ret = None
         for query in self:
             result = query.get_query_result(paths)
@@ -102,6 +152,87 @@ class UnityMetricRealTimeQueryList(UnityResourceList):
                 ret.merge(result)
         return ret
 
+    def _get_incremental_query_result(self, paths):
+        if paths is not None:
+            paths = set(paths)
+        results = []
+        for query in self:
+            query_id = query.get_id()
+            latest = self._latest_results.setdefault(query_id, {})
+            for r in UnityMetricQueryResultList(
+                    cli=self._cli, query_id=query_id,
+                    since=self._last_timestamps.get(query_id)):
+                prev = latest.get(r.path)
+                if prev is None or r.timestamp >= prev.timestamp:
+                    latest[r.path] = r
+            if latest:
+                self._last_timestamps[query_id] = max(
+                    r.timestamp for r in latest.values())
+            results.extend(r for path, r in latest.items()
+                           if paths is None or path in paths)
+        return UnityMetricQueryResultList.from_results(self._cli, results)
+
+
+class UnityMetricQueryRegistry(object):
+    """ saves the ids of the real-time queries used by each array.
+
+    The queries are reused after the restart of the process, or by other
+    processes collecting the same array, instead of creating new ones.
+
+    :param filename: json file of the ids.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, filename=None):
+        if filename is None:
+            filename = os.path.join(get_local_folder(),
+                                    'unity_metric_queries.json')
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = UnityMetricQueryRegistry()
+            return cls._default
+
+    def _read(self):
+        ret = {}
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'r') as f:
+                    ret = json.load(f)
+            except (IOError, OSError, ValueError) as ex:
+                log.warning('failed to read metric query registry {}: '
+                            '{}'.format(self.filename, ex))
+        return ret
+
+    def _write(self, data):
+        try:
+            assure_folder(os.path.dirname(self.filename))
+            # write to a temp file to avoid partial file read by other
+            # processes.
+            tmp = '{}.{}.tmp'.format(self.filename, os.getpid())
+            with open(tmp, 'w') as f:
+                json.dump(data, f)
+            os.rename(tmp, self.filename)
+        except (IOError, OSError) as ex:
+            log.warning('failed to write metric query registry {}: '
+                        '{}'.format(self.filename, ex))
+
+    def get_ids(self, ip, interval):
+        return self._read().get(ip, {}).get(str(interval), [])
+
+    def set_ids(self, ip, interval, id_list):
+        with self._lock:
+            data = self._read()
+            intervals = data.setdefault(ip, {})
+            if intervals.get(str(interval)) != id_list:
+                intervals[str(interval)] = id_list
+                self._write(data)
+
 
 class UnityMetricQueryResult(UnityResource):
     @instance_cache
@@ -114,8 +245,14 @@ class UnityMetricQueryResult(UnityResource):
         if self.values is None:
             ret = []
         else:
-            ret = [IdValues({k: int(v) for k, v in value.items()})
-                   for value in self.values.values()]
+            ret = []
+            index = None
+            for value in self.values.values():
+                if index is None or len(index) != len(value) or \
+                        any(k not in value for k in index):
+                    index = tuple(sorted(value.keys()))
+                # share the ids of the SPs so that they are added faster
+                ret.append(IdValues.from_counters(value, index))
         return ret
 
     @property
@@ -191,9 +328,8 @@ class UnityMetricQueryResult(UnityResource):
         if self.values is None:
             ret = IdValues()
         else:
-            ret = sum([IdValues(
-                {k: int(v) * int(other.values[key]) for k, v in value.items()})
-                for key, value in self.values.items()])
+            ret = sum([values * int(other.values[key]) for key, values in
+                       zip(self.values.keys(), self.numeric_values)])
         return ret
 
     def combine_sp_values(self, other):
@@ -235,24 +371,52 @@ class UnityMetricQueryResult(UnityResource):
 
 
 class UnityMetricQueryResultList(UnityResourceList):
-    def __init__(self, cli=None, **the_filter):
+    def __init__(self, cli=None, since=None, **the_filter):
+        """
+        :param since: only gets the results later than this timestamp.
+        """
         super(UnityMetricQueryResultList, self).__init__(cli, **the_filter)
+        self._since = since
         self._path_result_map = {}
 
     @classmethod
     def get_resource_class(cls):
         return UnityMetricQueryResult
 
+    @classmethod
+    def from_results(cls, cli, results):
+        ret = cls(cli=cli)
+        ret._list = []
+        ret.merge(results)
+        return ret
+
+    def _get_raw_resource(self):
+        if self._since is None:
+            ret = super(UnityMetricQueryResultList, self)._get_raw_resource()
+        else:
+            the_filter = '{} and timestamp gt "{}"'.format(
+                self._cli.dict_to_filter_string(self._get_rest_filter()),
+                to_filter_timestamp(self._since))
+            ret = self._cli.get_all(self.resource_class,
+                                    the_filter=the_filter)
+        # an expired query gives an error instead of the results, raise it
+        # so that the queries are looked up again.
+        ret.raise_if_err()
+        return ret
+
     @clear_instance_cache
     def update(self, data=None):
         super(UnityMetricQueryResultList, self).update(data)
         self._path_result_map = {}
 
-    def by_path(self, path):
+    def _get_path_index(self):
         if not self._path_result_map:
             for r in self:
                 self._path_result_map[r.path] = r
-        return self._path_result_map.get(path)
+        return self._path_result_map
+
+    def by_path(self, path):
+        return self._get_path_index().get(path)
 
     def diff_seconds(self, other):
         if other is None or len(other) == 0 or len(self) == 0:
@@ -263,13 +427,16 @@ class UnityMetricQueryResultList(UnityResourceList):
 
     def filtered_by_path(self, paths=None):
         if paths is not None:
+            paths = set(paths)
             self._list = [q for q in self if q.path in paths]
+            self._path_result_map = {}
         return self
 
     def merge(self, other):
         if other is not None:
-            my_paths = self.path
-            to_add = [r for r in other if r.path not in my_paths]
-            if self._list is None:
-                self._list = []
-            self._list.extend(to_add)
+            # the list is loaded when the index is built
+            index = self._get_path_index()
+            for r in other:
+                if r.path not in index:
+                    index[r.path] = r
+                    self._list.append(r)
@@ -41,7 +41,8 @@ from storops.unity.resource.import_session import UnityImportSessionList
 from storops.unity.resource.interface import UnityFileInterfaceList
 from storops.unity.resource.job import UnityJobList
 from storops.unity.resource.lun import UnityLunList
-from storops.unity.resource.metric import UnityMetricRealTimeQuery
+from storops.unity.resource.metric import UnityMetricRealTimeQuery, \
+    UnityMetricQueryRegistry
 from storops.unity.resource.move_session import UnityMoveSessionList
 from storops.unity.resource.nas_server import UnityNasServerList
 from storops.unity.resource.nfs_server import UnityNfsServerList
@@ -76,13 +77,20 @@ LOG = logging.getLogger(__name__)
 class UnitySystem(UnitySingletonResource):
     def __init__(self, host=None, username=None, password=None,
                  port=443, cli=None, verify=False, retries=None,
-                 cache_interval=0, application_type=None):
+                 cache_interval=0, application_type=None,
+                 page_workers=None, pool_connections=None, pool_maxsize=None,
+                 pool_block=False, keep_alive=True):
         super(UnitySystem, self).__init__(cli=cli)
         if cli is None:
             self._cli = UnityClient(host, username, password, port,
                                     verify=verify, retries=retries,
                                     cache_interval=cache_interval,
-                                    application_type=application_type)
+                                    application_type=application_type,
+                                    page_workers=page_workers,
+                                    pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block,
+                                    keep_alive=keep_alive)
         else:
             self._cli = cli
 
@@ -454,29 +462,55 @@ class UnitySystem(UnitySingletonResource):
                                    name=name,
                                    **filters)
 
-    def enable_perf_stats(self, interval=None, rsc_clz_list=None):
+    def enable_perf_stats(self, interval=None, rsc_clz_list=None,
+                          history_size=None, scheduler=None, registry=None,
+                          incremental=False):
+        """ starts to collect the metrics of the system.
+
+        The real-time queries are looked up or created once.  Each
+        collection only fetches the query results, and the queries are
+        looked up again only when any of them expires.
+
+        :param registry: `UnityMetricQueryRegistry` to reuse the queries
+            across the processes.  the one in the local folder if not set.
+        :param incremental: only fetch the results newer than the last
+            collection, instead of all the results of the queries.
+        :return: the real-time queries.
+        """
         if interval is None:
             interval = 60
         if rsc_clz_list is None:
             rsc_list_collection = self._default_rsc_list_with_perf_stats()
             rsc_clz_list = ResourceList.get_rsc_clz_list(rsc_list_collection)
+        if registry is None:
+            registry = UnityMetricQueryRegistry.get_default()
+        paths = calculators.get_all_paths(rsc_clz_list)
 
         def get_real_time_query_list():
-            paths = calculators.get_all_paths(rsc_clz_list)
             return UnityMetricRealTimeQuery.get_query_list(
-                self._cli, interval, paths=paths)
+                self._cli, interval, paths=paths, registry=registry)
+
+        queries = get_real_time_query_list()
+        query_lists = [queries]
 
         def f():
-            query_list = get_real_time_query_list()
+            query_list = query_lists[0]
             if query_list:
-                paths = calculators.get_all_paths(rsc_clz_list)
-                ret = query_list.get_query_result(paths)
+                try:
+                    ret = query_list.get_query_result(paths, incremental)
+                except storops.exception.UnityMetricQueryNotFoundError:
+                    LOG.info('metric queries of unity {} expired, look up '
+                             'them again.'.format(self._cli.ip))
+                    query_list = get_real_time_query_list()
+                    query_lists[0] = query_list
+                    ret = query_list.get_query_result(paths, incremental)
             else:
                 ret = None
             return ret
 
-        queries = get_real_time_query_list()
-        self._cli.enable_perf_metric(interval, f, rsc_clz_list)
+        self._cli.enable_perf_metric(interval, f, rsc_clz_list,
+                                     history_size=history_size,
+                                     scheduler=scheduler)
         return queries
 
     def disable_perf_stats(self):
@@ -492,9 +526,15 @@ class UnitySystem(UnitySingletonResource):
     def add_metric_record(self, record):
         self._cli.add_metric_record(record)
 
-    def enable_persist_perf_stats(self):
+    def enable_persist_perf_stats(self, store=None):
+        """ persists the metrics each interval.
+
+        :param store: `MetricStore` to save the metrics, like
+            `BinaryMetricStore` or `OpenMetricsExporter`.  appended to
+            the csv files if not set.
+        """
         rsc_list = self._default_rsc_list_with_perf_stats()
-        self._cli.persist_perf_stats(rsc_list)
+        self._cli.persist_perf_stats(rsc_list, store=store)
 
     def disable_persist_perf_stats(self):
         self._cli.persist_perf_stats(None)
@@ -15,6 +15,8 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import math
+
 from storops.exception import get_rest_exception
 from storops.unity.resource import health
 from storops.unity.resource import job
@@ -80,6 +82,31 @@ class RestResponse(object):
     def is_ok(self):
         return not self.has_error()
 
+    @property
+    def entry_count(self):
+        """ total count of the entries of all pages.
+
+        only available when the query is sent with `with_entrycount=True`.
+        """
+        return self.body.get('entryCount')
+
+    @property
+    def page_count(self):
+        """ total page count calculated from the entry count.
+
+        the size of current page is used as the page size, so only the
+        response of a full page (not the last one) gives the correct count.
+        """
+        count = self.entry_count
+        size = len(self.entries)
+        if count is None:
+            ret = None
+        elif size == 0:
+            ret = 1
+        else:
+            ret = int(math.ceil(float(count) / size))
+        return ret
+
     @property
     def has_next_page(self):
         return self.next_page is not None
@@ -15,8 +15,10 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import contextlib
 import functools
 import logging
+import threading
 from multiprocessing.pool import ThreadPool
 
 import six
@@ -39,6 +41,8 @@ __author__ = 'Cedric Zhuang'
 
 log = logging.getLogger(__name__)
 
+DEFAULT_MAX_WORKERS_PER_SP = 2
+
 
 def _get_commands(f, self, *argv, **kwargs):
     if not isinstance(self, CliClient):
@@ -93,7 +97,17 @@ def duel_command(f):
 class CliClient(PerfManager):
     def __init__(self, ip=None, username=None, password=None, scope=None,
                  sec_file=None, timeout=None, heartbeat_interval=None,
-                 naviseccli=None):
+                 naviseccli=None, max_workers_per_sp=None, sp_policy=None):
+        """ initializes the naviseccli client.
+
+        :param max_workers_per_sp: max number of naviseccli commands
+            sent by `map` running concurrently on each SP.  Other
+            commands are not limited.
+        :param sp_policy: policy to select the SP of the commands without
+            an ip, name in `SP_POLICIES` or a `SPPolicy` instance.
+            `first` if not set, which always selects the SP with the
+            smallest ip.
+        """
         super(CliClient, self).__init__()
         if heartbeat_interval is None:
             heartbeat_interval = 60
@@ -106,15 +120,107 @@ class CliClient(PerfManager):
             sec_file=sec_file,
             interval=heartbeat_interval,
             timeout=timeout,
-            naviseccli=naviseccli)
+            naviseccli=naviseccli,
+            sp_policy=sp_policy)
         self._heart_beat.add(VNXSPEnum.SP_A, ip)
         self._system_version = None
+        if max_workers_per_sp is None:
+            max_workers_per_sp = DEFAULT_MAX_WORKERS_PER_SP
+        self.max_workers_per_sp = max_workers_per_sp
+        self._init_executor()
+
+    def _init_executor(self):
+        self._executor = None
+        self._sp_semaphores = {}
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _get_executor(self):
+        """ returns the thread pool shared by the concurrent commands.
+
+        It is created at the first use and bounded by the max workers of
+        both SPs.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPool(self.max_workers_per_sp * 2)
+        return self._executor
+
+    def _get_sp_semaphore(self, ip):
+        semaphore = self._sp_semaphores.get(ip)
+        if semaphore is None:
+            with self._executor_lock:
+                semaphore = self._sp_semaphores.get(ip)
+                if semaphore is None:
+                    semaphore = threading.BoundedSemaphore(
+                        self.max_workers_per_sp)
+                    self._sp_semaphores[ip] = semaphore
+        return semaphore
+
+    def _in_executor(self):
+        return getattr(self._local, 'in_executor', False)
+
+    @contextlib.contextmanager
+    def _on_sp(self, ip):
+        """ sends the commands without ip of this thread to the sp. """
+        self._local.ip = ip
+        self._local.in_executor = True
+        try:
+            yield
+        finally:
+            self._local.ip = None
+            self._local.in_executor = False
+
+    def map(self, func, items):
+        """ calls `func` with each item concurrently.
+
+        Items are assigned to the alive SPs in turn.  Commands sent by
+        `func` without an ip go to the SP assigned to the item.  Calls
+        made inside `func` run in the calling thread to avoid waiting for
+        the busy workers of the pool.
+
+        :param func: function to call.
+        :param items: arguments of the function.
+        :return: list of the results.
+        """
+        items = list(items)
+        ip_list = self._heart_beat.get_all_alive_sps_ip()
+        if len(items) < 2 or not ip_list or self._in_executor():
+            ret = list(map(func, items))
+        else:
+            def _run(args):
+                index, item = args
+                with self._on_sp(ip_list[index % len(ip_list)]):
+                    return func(item)
+
+            ret = self._get_executor().map(_run, list(enumerate(items)))
+        return ret
+
+    def close(self):
+        executor = getattr(self, '_executor', None)
+        if executor is not None:
+            executor.terminate()
+            self._executor = None
+
+    # `__getstate__` and `__setstate__` are used by Pickle.
+    # the thread pool and locks are not picklable, create new ones.
+    def __getstate__(self):
+        state = vars(self).copy()
+        for key in ('_executor', '_sp_semaphores', '_executor_lock',
+                    '_local', '_self_cache_lock_', '_self_cache_'):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self._init_executor()
 
     def persist_rsc_list_metrics(self):
         persist_rsc_list = self.get_persist_rsc_list()
         if self.prev_counter and persist_rsc_list:
             for rsc_list in persist_rsc_list:
-                rsc_list.persist_metric_data()
+                rsc_list.persist_metric_data(store=self.metric_store)
 
     def get_persist_rsc_list(self):
         if self.curr_counter is not None:
@@ -135,6 +241,7 @@ class CliClient(PerfManager):
         self._heart_beat.set_credential(username, password, scope, sec_file)
 
     def __del__(self):
+        self.close()
         del self._heart_beat
 
     def set_ip(self, spa, spb=None, cs=None):
@@ -1160,11 +1267,17 @@ class CliClient(PerfManager):
     def ip(self):
         return self._heart_beat.get_alive_sp_ip()
 
+    def _get_assigned_ip(self):
+        ret = getattr(self._local, 'ip', None)
+        if ret is None or ret not in self._heart_beat.get_all_alive_sps_ip():
+            ret = self._heart_beat.select_sp_ip()
+        return ret
+
     @retry(on_error=ex.VNXSPDownError)
     def execute(self, params, ip=None):
         if params is not None and len(params) > 0:
             if ip is None:
-                ip = self.ip
+                ip = self._get_assigned_ip()
             output = self.do(ip, params)
         else:
             log.info('no command to execute.  return empty.')
@@ -1174,6 +1287,10 @@ class CliClient(PerfManager):
     @retry(on_error=ex.VNXDropConnectionError)
     def do(self, ip, params):
         cmd = self._heart_beat.get_cmd_prefix(ip) + params
+        if self._in_executor():
+            # only the commands sent by `map` are capped on each SP
+            with self._get_sp_semaphore(ip):
+                return self._heart_beat.execute_cmd(ip, cmd)
         return self._heart_beat.execute_cmd(ip, cmd)
 
     def execute_dual(self, params):
@@ -1185,8 +1302,11 @@ class CliClient(PerfManager):
 
         output = []
         if params is not None and len(params) > 0:
-            pool = ThreadPool(len(ip_list))
-            output = pool.map(lambda ip: self.do(ip, params), ip_list)
+            if self._in_executor():
+                output = [self.do(ip, params) for ip in ip_list]
+            else:
+                output = self._get_executor().map(
+                    lambda ip: self.do(ip, params), ip_list)
         return tuple(output)
 
     def set_system_version(self, version):
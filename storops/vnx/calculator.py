@@ -36,6 +36,19 @@ def get_counter(props):
     return props
 
 
+def get_value(rsc, counter):
+    """ reads the counter of the resource.
+
+    The parsed value is read directly, instead of going through the
+    `__getattr__` of the resource.
+    """
+    parsed = getattr(rsc, '_parsed_resource', None)
+    ret = parsed.get(counter) if parsed is not None else None
+    if ret is None:
+        ret = getattr(rsc, counter)
+    return ret
+
+
 NaN = float('nan')
 
 
@@ -124,6 +137,24 @@ def instance_stats_calculator(per_second=False):
                 ret = NaN
             return ret
 
+        def calc_all(rsc_pairs, counters, dt):
+            """ calculates the stats of the resources found in both samples.
+
+            :param rsc_pairs: list of the previous and current resources.
+            :param dt: rounded delta seconds of the samples.
+            """
+            ret = []
+            for prev_rsc, curr_rsc in rsc_pairs:
+                if all_not_none(prev_rsc, curr_rsc):
+                    value = func(prev_rsc, curr_rsc, counters)
+                    if per_second:
+                        value = div(value, dt)
+                else:
+                    value = NaN
+                ret.append(value)
+            return ret
+
+        wrapper.calc_all = calc_all
         return wrapper
 
     return decorator
@@ -131,7 +162,7 @@ def instance_stats_calculator(per_second=False):
 
 @instance_stats_calculator
 def stats_total(prev, curr, counters):
-    return reduce(add, (getattr(curr, counter) for counter in counters), 0)
+    return reduce(add, (get_value(curr, counter) for counter in counters), 0)
 
 
 @instance_stats_calculator
@@ -149,11 +180,11 @@ def utilization(prev, curr, counters):
     """
     busy_prop, idle_prop = counters
 
-    pb = getattr(prev, busy_prop)
-    pi = getattr(prev, idle_prop)
+    pb = get_value(prev, busy_prop)
+    pi = get_value(prev, idle_prop)
 
-    cb = getattr(curr, busy_prop)
-    ci = getattr(curr, idle_prop)
+    cb = get_value(curr, busy_prop)
+    ci = get_value(curr, idle_prop)
 
     db = minus(cb, pb)
     di = minus(ci, pi)
@@ -178,8 +209,8 @@ def delta_ps(prev, curr, counters):
     """
     counter = get_counter(counters)
 
-    pv = getattr(prev, counter)
-    cv = getattr(curr, counter)
+    pv = get_value(prev, counter)
+    cv = get_value(curr, counter)
     return minus(cv, pv)
 
 
@@ -194,13 +225,13 @@ def io_size_kb(prev, curr, counters):
     :return: value, NaN if invalid
     """
     bw_stats, io_stats = counters
-    size_mb = div(getattr(curr, bw_stats), getattr(curr, io_stats))
+    size_mb = div(get_value(curr, bw_stats), get_value(curr, io_stats))
     return mul(size_mb, 1024)
 
 
 def self_io_size_kb(obj, counters):
     left, right = counters
-    return mul(div(getattr(obj, left), getattr(obj, right)), 1024)
+    return mul(div(get_value(obj, left), get_value(obj, right)), 1024)
 
 
 def block_to_mbps(prev, curr, obj, counters):
@@ -243,10 +274,18 @@ class VNXMetricConfigList(MetricConfigList):
 
 
 class VNXMetricConfigParser(MetricConfigParser):
+    # config lists of the resource classes, built once.  the lookups are
+    # too frequent for `cache`.
+    _config_lists = {}
+
     @classmethod
     def get_config(cls, name):
         name = cls._get_clz_name(name)
-        return VNXMetricConfigList(cls._read_configs().get(name))
+        ret = cls._config_lists.get(name)
+        if ret is None:
+            ret = VNXMetricConfigList(cls._read_configs().get(name))
+            cls._config_lists[name] = ret
+        return ret
 
     @classmethod
     def get_folder(cls):
@@ -258,10 +297,7 @@ class VNXCalculatorMetaInfo(CalculatorMetaInfo):
         return VNXMetricConfigParser()
 
     def get_metric_value(self, clz, metric_name, cli, obj=None):
-        if not hasattr(cli, 'curr_counter'):
-            raise ValueError('cli should has "curr_counter" attribute.')
-        if not hasattr(cli, 'prev_counter'):
-            raise ValueError('cli should has "prev_counter" attribute.')
+        self.check_cli(cli)
 
         config = self.get_config(clz).get_metric_config(metric_name)
         if config.is_aggregated_stats():
@@ -270,6 +306,45 @@ class VNXCalculatorMetaInfo(CalculatorMetaInfo):
             ret = self._get_calculated_stats(cli, config, obj)
         return ret
 
+    def get_metric_values(self, clz, metric_names, cli, objs):
+        self.check_cli(cli)
+
+        config_list = self.get_config(clz)
+        configs = [config_list.get_metric_config(name)
+                   for name in metric_names]
+        objs = list(objs)
+        prev = cli.prev_counter
+        curr = cli.curr_counter
+        if all_not_none(prev, curr):
+            # look up the resources and the delta time once for all the
+            # metrics.
+            rsc_pairs = [(prev.get_rsc(obj), curr.get_rsc(obj))
+                         for obj in objs]
+            dt = round_60(curr.delta_seconds(prev))
+        else:
+            rsc_pairs = dt = None
+
+        columns = []
+        for config in configs:
+            if config.is_aggregated_stats():
+                column = [self._get_aggregated_stats(config, obj)
+                          for obj in objs]
+            elif rsc_pairs is None:
+                column = [NaN] * len(objs)
+            elif hasattr(config.calculator, 'calc_all'):
+                column = config.calculator.calc_all(rsc_pairs,
+                                                    config.counters, dt)
+            else:
+                column = [config.calculator(prev, curr, obj, config.counters)
+                          for obj in objs]
+            columns.append(column)
+
+        if columns:
+            ret = [list(row) for row in zip(*columns)]
+        else:
+            ret = [[] for _ in objs]
+        return ret
+
     @staticmethod
     def _get_calculated_stats(cli, config, obj):
         prev = cli.prev_counter
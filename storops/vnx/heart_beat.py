@@ -16,6 +16,7 @@
 from __future__ import unicode_literals
 
 import logging
+import threading
 from time import time, sleep
 
 import six
@@ -30,6 +31,8 @@ __author__ = 'Cedric Zhuang'
 
 log = logging.getLogger(__name__)
 
+_outstanding_lock = threading.Lock()
+
 
 class NodeInfo(object):
     def __init__(self, name, ip, available=None, working=False):
@@ -48,6 +51,8 @@ class NodeInfo(object):
         self._available = available
         self.timestamp = None
         self.working = working
+        # number of the commands running on the node
+        self.outstanding = 0
         self._latency = WeightedAverage()
 
     @property
@@ -76,6 +81,14 @@ class NodeInfo(object):
     def latency(self, value):
         self._latency.add(value)
 
+    def begin_command(self):
+        with _outstanding_lock:
+            self.outstanding += 1
+
+    def end_command(self):
+        with _outstanding_lock:
+            self.outstanding = max(self.outstanding - 1, 0)
+
     def __repr__(self):
         props_to_print = ['name', 'ip', 'available',
                           'working', 'latency', 'timestamp']
@@ -133,13 +146,109 @@ class NodeInfoMap(object):
         return self.__repr__()
 
 
+class SPPolicy(object):
+    """ selects the sp to run the naviseccli command. """
+
+    def select(self, nodes):
+        """ selects one of the alive sps.
+
+        :param nodes: `NodeInfo` of the alive sps, not empty.
+        :return: the selected `NodeInfo`.
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return self.__class__.__name__
+
+
+class FirstSPPolicy(SPPolicy):
+    """ always selects the sp with the smallest ip, no load balance. """
+
+    def select(self, nodes):
+        return min(nodes, key=lambda node: node.ip)
+
+
+class RoundRobinSPPolicy(SPPolicy):
+    """ selects the sps in turn. """
+
+    def __init__(self):
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def select(self, nodes):
+        nodes = sorted(nodes, key=lambda node: node.ip)
+        with self._lock:
+            count = self._count
+            self._count += 1
+        ret = nodes[count % len(nodes)]
+        return ret
+
+    # `__getstate__` and `__setstate__` are used by Pickle.
+    # the lock is not picklable, create a new one.
+    def __getstate__(self):
+        return {'_count': self._count}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._count = state['_count']
+
+
+class LeastOutstandingSPPolicy(SPPolicy):
+    """ selects the sp running the least commands.
+
+    The sp with lower latency is selected if they run the same number of
+    commands.
+    """
+
+    def select(self, nodes):
+        return min(nodes, key=lambda node: (node.outstanding, node.latency,
+                                            node.ip))
+
+
+class LowestLatencySPPolicy(SPPolicy):
+    """ selects the sp with the lowest weighted average latency. """
+
+    def select(self, nodes):
+        return min(nodes, key=lambda node: (node.latency, node.outstanding,
+                                            node.ip))
+
+
+SP_POLICIES = {
+    'first': FirstSPPolicy,
+    'round_robin': RoundRobinSPPolicy,
+    'least_outstanding': LeastOutstandingSPPolicy,
+    'lowest_latency': LowestLatencySPPolicy,
+}
+
+
+def get_sp_policy(policy=None):
+    """ gets the sp policy.
+
+    :param policy: name in `SP_POLICIES` or a `SPPolicy` instance.
+        `first` if not set, which is the behavior before the policies
+        were added.
+    """
+    if policy is None:
+        policy = 'first'
+    if isinstance(policy, SPPolicy):
+        ret = policy
+    elif policy in SP_POLICIES:
+        ret = SP_POLICIES[policy]()
+    else:
+        raise ValueError('invalid sp policy: {}.  available policies are: '
+                         '{}.'.format(policy, ', '.join(sorted(SP_POLICIES))))
+    return ret
+
+
 class NodeHeartBeat(NaviCommand):
     def __init__(self, username=None, password=None, scope=0,
-                 sec_file=None, interval=60, timeout=30, naviseccli=None):
+                 sec_file=None, interval=60, timeout=30, naviseccli=None,
+                 sp_policy=None):
         super(NodeHeartBeat, self).__init__(username, password, scope,
                                             sec_file=sec_file,
                                             timeout=timeout,
                                             naviseccli=naviseccli)
+        self.sp_policy = get_sp_policy(sp_policy)
         self._node_map = NodeInfoMap()
         self._interval = interval
         self._heartbeat_thread = None
@@ -163,18 +272,25 @@ class NodeHeartBeat(NaviCommand):
                     unavailable_sp.append(node)
         return available_sp, unavailable_sp
 
-    def get_alive_sp_ip(self):
-        def get_sp_from_list(sp_list):
-            ips = [sp.ip for sp in sp_list]
-            return sorted(ips)[0]
-
-        available, unavailable = self._get_sp_by_category()
+    def _get_available_sp(self):
+        available, _ = self._get_sp_by_category()
         if len(available) == 0:
             raise ex.VNXSystemDownError(
                 'no storage processor available.')
-        else:
-            ret = get_sp_from_list(available)
-        return ret
+        return available
+
+    def get_alive_sp_ip(self):
+        """ ip of the alive sp with the smallest ip.
+
+        It does not change with the load of the sps.  Use `select_sp_ip`
+        to get the ip to run the command.
+        """
+        ips = [sp.ip for sp in self._get_available_sp()]
+        return sorted(ips)[0]
+
+    def select_sp_ip(self):
+        """ ip of the alive sp selected by the sp policy. """
+        return self.sp_policy.select(self._get_available_sp()).ip
 
     def is_all_sps_alive(self):
         _, unavailable = self._get_sp_by_category()
@@ -222,7 +338,14 @@ class NodeHeartBeat(NaviCommand):
         if not self.is_credential_valid:
             raise ex.VNXCredentialError(
                 'cannot authenticate with user {}.'.format(self._username))
-        out = self.execute_naviseccli(cmd)
+        node = self.get_node_by_ip(ip)
+        if node is not None:
+            node.begin_command()
+        try:
+            out = self.execute_naviseccli(cmd)
+        finally:
+            if node is not None:
+                node.end_command()
         try:
             ex.check_error(out,
                            ex.VNXSpNotAvailableError,
@@ -18,6 +18,7 @@ from __future__ import unicode_literals
 import functools
 import logging
 import re
+import threading
 
 import six
 from retryz import retry
@@ -26,7 +27,7 @@ from storops.connection import connector
 from storops.exception import VNXBackendError, VNXLockRequiredException, \
     VNXNasObjectNotFound, VNXInvalidMoverID, VNXException, \
     get_xmlapi_exception, VNXFileCredentialError
-from storops.lib.common import Enum, check_int
+from storops.lib.common import Enum, check_int, allow_omit_parentheses
 from storops.lib.converter import to_int, to_hex
 from storops.vnx.nas_cmd import NasCommand
 from storops.vnx.resource.cifs_share import CifsAccessControl
@@ -38,6 +39,12 @@ __author__ = 'Jay Xu'
 log = logging.getLogger(__name__)
 
 
+def _to_text(value):
+    if isinstance(value, six.binary_type):
+        value = value.decode('utf-8', 'replace')
+    return value
+
+
 class VNXNasConnections(object):
     retry_patterns = [(r'unable to acquire lock\(s\)',
                        VNXLockRequiredException())]
@@ -51,14 +58,19 @@ class VNXNasConnections(object):
         self._ssh_timeout = None
 
         self._ssh = None
+        self._ssh_lock = threading.Lock()
         self._xml_connector = None
         self._xml_parser = None
 
     @property
     def ssh(self):
         if self._ssh is None:
-            self._ssh = self._ssh = connector.SSHConnector(
-                self.host, self.username, self.password, self.ssh_port)
+            # concurrent commands share the connections of one connector.
+            with self._ssh_lock:
+                if self._ssh is None:
+                    self._ssh = connector.SSHConnector(
+                        self.host, self.username, self.password,
+                        self.ssh_port)
         return self._ssh
 
     def set_ssh_timeout(self, value):
@@ -82,20 +94,23 @@ class VNXNasConnections(object):
         base = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>{}'
         return base.format(req)
 
-    @retry(on_error=VNXLockRequiredException)
-    def _request(self, req, retry_patterns=None):
-
+    def _post(self, req):
         req_xml = self._get_req_xml(req)
         log.debug('request: \n{}'.format(req_xml))
 
         rsp_xml = self.xml_connector.post(req_xml)
 
         if isinstance(rsp_xml, tuple):
-            rsp_xml = rsp_xml[1]
-        log.debug('response: \n{}'.format(rsp_xml))
-
-        response = NasXmlResponse(self.xml_parser.parse(rsp_xml))
-
+            resp, rsp_xml = rsp_xml
+            content = getattr(resp, 'content', None)
+            if isinstance(content, six.binary_type):
+                # parse the raw bytes, the xml declares its encoding.
+                rsp_xml = content
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('response: \n{}'.format(_to_text(rsp_xml)))
+        return rsp_xml
+
+    def _check_retry_patterns(self, response, retry_patterns=None):
         if not retry_patterns:
             retry_patterns = self.retry_patterns
         if response.is_error():
@@ -105,8 +120,47 @@ class VNXNasConnections(object):
                 if re.search(to_match, messages):
                     raise to_raise
 
+    @retry(on_error=VNXLockRequiredException)
+    def _request(self, req, retry_patterns=None):
+        rsp_xml = self._post(req)
+        response = NasXmlResponse(self.xml_parser.parse(rsp_xml))
+        self._check_retry_patterns(response, retry_patterns)
         return response
 
+    @retry(on_error=VNXLockRequiredException)
+    def _request_batch(self, reqs, retry_patterns=None):
+        rsp_xml = self._post(NasXmlBuilder.batch_package(reqs))
+        results = self.xml_parser.parse_all(rsp_xml)
+        if len(results) == 1 and len(reqs) > 1:
+            # the whole packet is rejected, like a malformed request.
+            results = [dict(results[0]) for _ in reqs]
+        elif len(results) != len(reqs):
+            raise VNXBackendError(
+                'got {} responses for {} requests.'.format(
+                    len(results), len(reqs)))
+
+        ret = [NasXmlResponse(result) for result in results]
+        for response in ret:
+            self._check_retry_patterns(response, retry_patterns)
+        return ret
+
+    def request_batch(self, reqs, retry_patterns=None):
+        """ sends the query requests in one request packet.
+
+        :param reqs: list of the query packages built by `NasXmlBuilder`.
+        :param retry_patterns: the batch is sent again if the problem of
+            any response matches.
+        :return: list of `NasXmlResponse` in the order of the requests.
+        """
+        reqs = list(reqs)
+        if not reqs:
+            ret = []
+        elif len(reqs) == 1:
+            ret = [self._request(reqs[0], retry_patterns)]
+        else:
+            ret = self._request_batch(reqs, retry_patterns)
+        return ret
+
     def request(self, req, check_object=False, check_invalid_data_mover=False,
                 error_desc=None, retry_patterns=None):
         response = self._request(req, retry_patterns)
@@ -123,6 +177,14 @@ class VNXNasConnections(object):
         out, _ = self.ssh.execute(commands, self._ssh_timeout, check_exit_code)
         return out
 
+    def ssh_iter_lines(self, commands, check_exit_code=True):
+        """ runs the commands and yields the lines of the output.
+
+        The output is read as it arrives instead of kept in memory.
+        """
+        return self.ssh.iter_lines(commands, self._ssh_timeout,
+                                   check_exit_code)
+
 
 def xml_request(check_object=False, check_invalid_data_mover=False):
     """ indicate the return value is a xml api request
@@ -140,6 +202,8 @@ def xml_request(check_object=False, check_invalid_data_mover=False):
                 request, check_object=check_object,
                 check_invalid_data_mover=check_invalid_data_mover)
 
+        # the request could be built without sending it, see `batch_get`.
+        func_wrapper.build_request = f
         return func_wrapper
 
     return decorator
@@ -149,22 +213,52 @@ xml_get_request = xml_request()
 xml_set_request = xml_request(check_invalid_data_mover=True)
 
 
-def nas_command(f):
+@allow_omit_parentheses
+def nas_command(lines=False):
     """ indicate it's a command of nas command run with ssh
 
-    :param f: function that returns the command in list
+    :param lines: yields the lines of the output instead of returning the
+        whole output, for the commands with large output.
     :return: command execution result
     """
 
-    @functools.wraps(f)
-    def func_wrapper(self, *argv, **kwargs):
-        commands = f(self, *argv, **kwargs)
-        return self.ssh_execute(['env', 'NAS_DB=/nas'] + commands)
+    def decorator(f):
+        @functools.wraps(f)
+        def func_wrapper(self, *argv, **kwargs):
+            commands = ['env', 'NAS_DB=/nas'] + f(self, *argv, **kwargs)
+            if lines:
+                ret = self.ssh_iter_lines(commands)
+            else:
+                ret = self.ssh_execute(commands)
+            return ret
 
-    return func_wrapper
+        return func_wrapper
+
+    return decorator
 
 
 class VNXNasClient(VNXNasConnections):
+    def batch_get(self, *queries):
+        """ sends several queries in one request.
+
+        :param queries: names of the get methods, like `get_filesystem`,
+            or tuples of the name and the dict of the arguments, like
+            `('get_mover', {'full': False})`.
+        :return: list of `NasXmlResponse` in the order of the queries.
+        """
+        reqs = []
+        for query in queries:
+            if isinstance(query, six.string_types):
+                name, kwargs = query, {}
+            else:
+                name, kwargs = query
+            build = getattr(getattr(type(self), name, None),
+                            'build_request', None)
+            if build is None:
+                raise ValueError('{} is not a xml api query.'.format(name))
+            reqs.append(build(self, **kwargs))
+        return self.request_batch(reqs)
+
     @xml_get_request
     def get_filesystem(self, name=None, fs_id=None):
         return NasXmlBuilder.get_filesystem(name, fs_id=fs_id)
@@ -267,7 +361,7 @@ class VNXNasClient(VNXNasConnections):
     def delete_mover_interface(self, mover_id, ip):
         return NasXmlBuilder.delete_mover_interface(mover_id, ip)
 
-    @nas_command
+    @nas_command(lines=True)
     def get_mover_interconnect_id_list(self):
         return NasCommand.nas_cel_list()
 
@@ -366,6 +460,8 @@ class NasXmlResponse(object):
 
     @staticmethod
     def _check_credential_error(resp):
+        if isinstance(resp, six.binary_type):
+            resp = _to_text(resp)
         if 'Session timeout. Relogin and try this operation again.' in resp:
             raise VNXFileCredentialError()
 
@@ -373,7 +469,7 @@ class NasXmlResponse(object):
     def _parse_resp(parser, resp):
         if parser is None:
             parser = XMLAPIParser()
-        if isinstance(resp, six.string_types):
+        if isinstance(resp, (six.string_types, six.binary_type)):
             resp = parser.parse(resp)
         return resp
 
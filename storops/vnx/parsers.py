@@ -21,7 +21,7 @@ import re
 
 import six
 
-from storops.lib.common import Dict, cache
+from storops.lib.common import Dict
 from storops.lib.parser import OutputParser, PropDescriptor, \
     ParserConfigFactory
 
@@ -56,14 +56,21 @@ class VNXParserConfigFactory(ParserConfigFactory):
 _factory_singleton = VNXParserConfigFactory()
 
 
-@cache
 def get_vnx_parser(name):
+    # the parsers are cached by the factory
     return _factory_singleton.get(name)
 
 
 class VNXCliParser(OutputParser):
     data_src = 'cli'
 
+    # parse the output with one scan of the lines instead of a regex
+    # search for each property.  set to `False` to use the regex search.
+    single_pass = True
+
+    # lookup table of the properties of this parser, built lazily.
+    _label_table = None
+
     def _split_by_index(self, output):
         instances = []
 
@@ -89,7 +96,123 @@ class VNXCliParser(OutputParser):
             instances = [output]
         return instances
 
+    def add_property(self, *props):
+        super(VNXCliParser, self).add_property(*props)
+        self._label_table = None
+
+    def compile(self):
+        for prop in self.properties:
+            prop.compile()
+        self._label_table = self._build_label_table(list(self.properties))
+        return self
+
+    @staticmethod
+    def _build_label_table(properties):
+        """ builds the lookup table of the labels for the line scan.
+
+        Labels are grouped by their first characters so that only a few
+        of them are compared with each line.  Properties with regex labels
+        or multi-line values could not be found by the label at the
+        beginning of a line.  They still use the regex search.
+
+        :return: tuple of the length of the prefix, the prefix to labels
+            dict, the number of the properties in it and the properties
+            to search with regex.
+        """
+        labels = OrderedDict()
+        regex_props = []
+        for p in properties:
+            if p.is_regex or p.end_pattern is not None or \
+                    p.label != p.label.lstrip(' \t'):
+                regex_props.append(p)
+            else:
+                labels.setdefault(p.label.lower(), []).append(p)
+
+        prefix_len = min([len(label) for label in labels] or [0])
+        buckets = {}
+        for label, props in labels.items():
+            buckets.setdefault(label[:prefix_len], []).append((label, props))
+        count = len(properties) - len(regex_props)
+        return prefix_len, buckets, count, regex_props
+
+    def _get_label_table(self, properties=None):
+        if properties is None:
+            if self._label_table is None:
+                self._label_table = self._build_label_table(
+                    list(self.properties))
+            ret = self._label_table
+        else:
+            ret = self._build_label_table(list(properties))
+        return ret
+
     def parse_single(self, output, properties=None):
+        if self.single_pass:
+            ret = self._parse_single_by_line(output, properties)
+        else:
+            ret = self._parse_single_by_regex(output, properties)
+        return ret
+
+    @staticmethod
+    def _get_matched_value(p, output):
+        matched = re.search(p.pattern, output)
+        if matched is not None:
+            if len(matched.groups()) == 1:
+                value = matched.group(1)
+                value = value.strip()
+            else:
+                value = matched.groups()
+            ret = p.convert(value)
+        else:
+            ret = None
+        return matched is not None, ret
+
+    def _parse_single_by_line(self, output, properties=None):
+        """ parses one instance with one scan of the lines.
+
+        Returns the same result as the regex search: the value is read
+        from the first line starting with the label (case insensitive,
+        leading blanks ignored).
+        """
+        if not isinstance(output, six.string_types):
+            return output
+
+        prefix_len, buckets, count, regex_props = self._get_label_table(
+            properties)
+        if properties is None:
+            properties = self.properties
+
+        output = output.strip()
+        values = {}
+        for line in output.split('\n'):
+            if len(values) >= count:
+                break
+            text = line.lstrip(' \t')
+            candidates = buckets.get(text[:prefix_len].lower())
+            if candidates is None:
+                continue
+            for label, props in candidates:
+                if text[:len(label)].lower() == label:
+                    for p in props:
+                        if p not in values:
+                            values[p] = text[len(label):].strip()
+
+        ret = Dict()
+        for p in properties:
+            if p in values:
+                ret[p.key] = p.convert(values[p])
+                continue
+            if p in regex_props:
+                matched, value = self._get_matched_value(p, output)
+            else:
+                matched, value = False, None
+            if not matched and p.is_index:
+                # index must have a match, skip this invalid input
+                ret = Dict()
+                break
+            ret[p.key] = value
+        return ret
+
+    def _parse_single_by_regex(self, output, properties=None):
         if isinstance(output, six.string_types):
             output = output.strip()
             ret = Dict()
@@ -98,22 +221,12 @@ class VNXCliParser(OutputParser):
                 properties = self.properties
 
             for p in properties:
-                matched = re.search(p.pattern, output)
-
-                matched_value = None
-                if matched is not None:
-                    if len(matched.groups()) == 1:
-                        value = matched.group(1)
-                        value = value.strip()
-                    else:
-                        value = matched.groups()
-                    value = p.convert(value)
-                    matched_value = value
-                elif p.is_index:
+                matched, value = self._get_matched_value(p, output)
+                if not matched and p.is_index:
                     # index must have a match, skip this invalid input
                     ret = Dict()
                     break
-                ret[p.key] = matched_value
+                ret[p.key] = value
         else:
             ret = output
         return ret
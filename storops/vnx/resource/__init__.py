@@ -21,7 +21,7 @@ from datetime import datetime
 from storops.exception import VNXPerMonNotEnabledError
 from storops.lib.common import instance_cache, clear_instance_cache, \
     get_local_folder
-from storops.lib.metric import MetricsDumper
+from storops.lib.metric import MetricsDumper, MetricsTable
 from storops.lib.resource import Resource, ResourceList
 from storops.vnx.calculator import calculators
 from storops.vnx.parsers import get_vnx_parser
@@ -107,7 +107,7 @@ class VNXCliResource(VNXResource):
         return ret
 
     def _get_property_from_raw(self, item):
-        if item in self.metric_names():
+        if calculators.is_metric(self.resource_class_name(), item):
             value = self.get_metric_value(item)
         else:
             value = super(VNXCliResource, self)._get_property_from_raw(item)
@@ -130,6 +130,26 @@ class VNXCliResource(VNXResource):
         return calculators.get_metric_value(
             self.resource_class_name(), item, self._cli, self)
 
+    def get_window_metric_value(self, item, window):
+        """ metric over the time window, like `5m`, `15m` or `900`.
+
+        Requires the samples of the window to be kept.  See the
+        `history_size` of `VNXSystem.enable_perf_stats`.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise VNXPerMonNotEnabledError()
+        return calculators.get_window_metric_value(
+            self.resource_class_name(), item, self._cli, window, self)
+
+    def get_metric_aggregates(self, item, window=None, percentiles=None):
+        """ min, max, avg and percentiles of the metric in the time window.
+        """
+        if not self._cli.is_perf_metric_enabled(self):
+            raise VNXPerMonNotEnabledError()
+        return calculators.get_metric_aggregates(
+            self.resource_class_name(), item, self._cli, self,
+            window=window, percentiles=percentiles)
+
 
 class WithListPoll(object):
     def __init__(self, rsc_list):
@@ -146,15 +166,18 @@ class WithListPoll(object):
             rsc.poll = self._orig_polls[rsc]
 
 
-def _hdr_cb(rsc):
+def _get_rsc_name(rsc):
     if hasattr(rsc, 'name'):
         name = rsc.name
     elif hasattr(rsc, 'index'):
         name = rsc.index
     else:
         raise AttributeError('resource should have "name" or "index" defined.')
+    return name
 
-    return [rsc.timestamp.isoformat(str(' ')), str(name)]
+
+def _hdr_cb(rsc):
+    return [rsc.timestamp.isoformat(str(' ')), str(_get_rsc_name(rsc))]
 
 
 class VNXCliResourceList(VNXCliResource, ResourceList):
@@ -220,15 +243,47 @@ class VNXCliResourceList(VNXCliResource, ResourceList):
             if isinstance(item, VNXCliResource):
                 item.set_cli(cli)
 
-    def persist_metric_data(self, filename=None):
+    def persist_metric_data(self, filename=None, store=None):
+        """ persists the metrics of the resources.
+
+        :param filename: csv file to append the metrics.
+        :param store: `MetricStore` to save the metrics instead of the csv
+            file.
+        """
+        if store is not None:
+            return store.write(self.get_metric_store_name(),
+                               self.metrics_table())
         if filename is None:
             filename = self.get_default_metric_csv_filename()
         return self._metrics_dumper.persist_metric_data(filename)
 
+    def get_metric_store_name(self):
+        return '{}_{}'.format(self._cli.ip, self.resource_class_name())
+
     def get_default_metric_csv_filename(self):
         folder = get_local_folder()
-        name = '{}_{}.csv'.format(self._cli.ip, self.resource_class_name())
+        name = '{}.csv'.format(self.get_metric_store_name())
         return os.path.join(folder, name)
 
     def get_metrics_csv(self, sep=None):
         return self._metrics_dumper.get_metrics_csv(sep=sep)
+
+    def metrics_table(self, names=None):
+        """ calculates the metrics of all the resources in the list.
+
+        The resources are looked up in the previous and current samples
+        once, and each metric is calculated for all of them in one pass.
+
+        :param names: names of the metrics.  all the metrics if not set.
+        :return: `MetricsTable` with one row for each resource, the ids
+            are the names (or indices) of the resources.
+        """
+        if names is None:
+            names = self.metric_names()
+        if names and not self._cli.is_perf_metric_enabled(self):
+            raise VNXPerMonNotEnabledError()
+        items = list(self)
+        rows = calculators.get_metric_values(self.resource_class_name(),
+                                             names, self._cli, items)
+        return MetricsTable([_get_rsc_name(rsc) for rsc in items], names,
+                            rows)
@@ -121,9 +121,11 @@ class VNXMoverRef(VNXResource):
         if destination is None:
             destination = self.name
 
-        out = self._cli.get_mover_interconnect_id_list()
+        lines = self._cli.get_mover_interconnect_id_list()
 
-        for line in out.strip().split('\n'):
+        for line in lines:
+            if not line.strip():
+                continue
             _id, name, src, dest_system, dest = line.strip().split()
             if src == source and dest == destination:
                 conn_id = check_int(_id)
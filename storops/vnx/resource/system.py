@@ -78,7 +78,8 @@ class VNXSystem(VNXCliResource):
                  timeout=None,
                  heartbeat_interval=None,
                  naviseccli=None,
-                 file_username=None, file_password=None):
+                 file_username=None, file_password=None,
+                 max_workers_per_sp=None, sp_policy=None):
         """ initialize a `VNXSystem` instance
 
         The `VNXSystem` instance act as a entry point for all
@@ -97,6 +98,12 @@ class VNXSystem(VNXCliResource):
         username
         :param file_password: password for control station login, default to
         password
+        :param max_workers_per_sp: max number of naviseccli commands running
+        concurrently on each sp when the perf records are collected.  other
+        commands are not limited.
+        :param sp_policy: policy to select the sp to run the naviseccli
+        commands, could be `first` (default), `least_outstanding`,
+        `lowest_latency` or `round_robin`.
         :return: vnx system instance
         """
         super(VNXSystem, self).__init__()
@@ -108,6 +115,8 @@ class VNXSystem(VNXCliResource):
         self._timeout = timeout
         self._hb_interval = heartbeat_interval
         self._naviseccli = naviseccli
+        self._max_workers_per_sp = max_workers_per_sp
+        self._sp_policy = sp_policy
 
         self._file_username = file_username
         self._file_password = file_password
@@ -122,7 +131,9 @@ class VNXSystem(VNXCliResource):
             self._ip,
             self._username, self._password, self._scope, self._sec_file,
             self._timeout, heartbeat_interval=self._hb_interval,
-            naviseccli=self._naviseccli)
+            naviseccli=self._naviseccli,
+            max_workers_per_sp=self._max_workers_per_sp,
+            sp_policy=self._sp_policy)
 
     def _init_file_cli(self):
         return VNXNasClient(self.control_station_ip,
@@ -132,7 +143,9 @@ class VNXSystem(VNXCliResource):
     def __getstate__(self):
         d = {'ip': self._ip, 'username': self._username,
              'password': self._password, 'scope': self._scope,
-             'sec_file': self._sec_file, 'naviseccli': self._naviseccli}
+             'sec_file': self._sec_file, 'naviseccli': self._naviseccli,
+             'max_workers_per_sp': self._max_workers_per_sp,
+             'sp_policy': self._sp_policy}
         return d
 
     def __setstate__(self, state):
@@ -535,15 +548,19 @@ class VNXSystem(VNXCliResource):
         start = time.time()
         rsc_list_2 = self.get_rsc_list_2(clz_list)
         record = ResourceListCollection(rsc_list_2)
-        record.update()
+        # the lists are updated concurrently on both sps
+        record.update(executor=self._cli)
         log.info('end collecting counters of vnx {}.  collection took '
                  '{:.3f} seconds.'.format(self._ip, time.time() - start))
         return record
 
-    def enable_perf_stats(self, rsc_clz_list=None):
+    def enable_perf_stats(self, rsc_clz_list=None, history_size=None,
+                          scheduler=None):
         VNXStats.get(self._cli).enable_stats()
         f = functools.partial(self.collect_perf_record, clz_list=rsc_clz_list)
-        self._cli.enable_perf_metric(60, f, rsc_clz_list)
+        self._cli.enable_perf_metric(60, f, rsc_clz_list,
+                                     history_size=history_size,
+                                     scheduler=scheduler)
         return self.get_rsc_list_2(rsc_clz_list)
 
     def disable_perf_stats(self, disable_counter_collection=False):
@@ -557,9 +574,15 @@ class VNXSystem(VNXCliResource):
     def is_counter_collection_enabled(self):
         return VNXStats.get(self._cli).is_enabled()
 
-    def enable_persist_perf_stats(self):
+    def enable_persist_perf_stats(self, store=None):
+        """ persists the metrics each interval.
+
+        :param store: `MetricStore` to save the metrics, like
+            `BinaryMetricStore` or `OpenMetricsExporter`.  appended to
+            the csv files if not set.
+        """
         rsc_list = self._default_rsc_list_with_perf_stats()
-        self._cli.persist_perf_stats(rsc_list)
+        self._cli.persist_perf_stats(rsc_list, store=store)
 
     def disable_persist_perf_stats(self):
         self._cli.persist_perf_stats(None)
@@ -63,6 +63,22 @@ class NasXmlBuilder(object):
         return _xb.RequestPacket(_xb.Request(_xb.Query(body)),
                                  xmlns=XML_NS)
 
+    @staticmethod
+    def batch_package(packages):
+        """ packs the requests of the query packages in one packet.
+
+        The responses are returned in the same order as the requests.
+        """
+        requests = []
+        for package in packages:
+            for request in package:
+                if len(request) != 1 or request[0].tag != 'Query':
+                    raise ValueError('only queries could be batched.')
+                requests.append(request)
+        if not requests:
+            raise ValueError('no query to batch.')
+        return _xb.RequestPacket(*requests, xmlns=XML_NS)
+
     @staticmethod
     def task_package(body):
         return _xb.RequestPacket(
@@ -16,10 +16,11 @@
 from __future__ import unicode_literals
 
 import logging
-
 import re
+import threading
+
 import six
-from xml import etree
+from xml.etree import ElementTree
 
 __author__ = 'Jay Xu'
 
@@ -27,6 +28,20 @@ log = logging.getLogger(__name__)
 
 
 class XMLAPIParser(object):
+    """ parses the responses of the VNX File XML API.
+
+    Each element is dispatched to the handler named after its tag, like
+    `start_file_system` for the start of `<FileSystem>`.  The handlers of
+    the tags are looked up once and kept in a table.
+
+    The state of each parse is kept in a new parser, so that one parser
+    could be shared by the concurrent requests.
+    """
+
+    # {(action, tag): name of the handler or None}
+    _handlers = {}
+    _handlers_lock = threading.Lock()
+
     def __init__(self):
         # The following Boolean acts as the flag for the common sub-element.
         # For instance:
@@ -40,6 +55,10 @@ class XMLAPIParser(object):
 
         self.elt = {}
         self.stack = []
+        # {identifier: {value: [objects]}} of the parsed objects, except the
+        # last one which may still get new properties.
+        self._index = {}
+        self._indexed = {}
 
     @staticmethod
     def _delete_ns(tag):
@@ -48,8 +67,37 @@ class XMLAPIParser(object):
             tag = tag[i + 1:]
         return tag
 
+    @classmethod
+    def _get_handler(cls, action, tag):
+        key = (action, tag)
+        try:
+            ret = cls._handlers[key]
+        except KeyError:
+            func = cls._get_func(action, tag)
+            ret = func if func in vars(XMLAPIParser) else None
+            with cls._handlers_lock:
+                cls._handlers[key] = ret
+        return ret
+
     def parse(self, xml):
-        result = {
+        """ parses the response.
+
+        :param xml: response in bytes or text.
+        :return: dict of the response.
+        """
+        return self.__class__()._parse(xml)[0]
+
+    def parse_all(self, xml):
+        """ parses the response of a packet with several requests.
+
+        :param xml: response in bytes or text.
+        :return: list of the dicts, one for each `<Response>`.
+        """
+        return self.__class__()._parse(xml, split=True)
+
+    @staticmethod
+    def _new_result():
+        return {
             'type': None,
             'taskId': None,
             'maxSeverity': None,
@@ -57,29 +105,40 @@ class XMLAPIParser(object):
             'problems': [],
         }
 
-        events = ("start", "end")
+    def _parse(self, xml, split=False):
+        result = self._new_result()
+        ret = [result]
+        response_count = 0
 
-        context = etree.ElementTree.iterparse(six.BytesIO(xml.encode('utf-8')),
-                                              events=events)
+        if isinstance(xml, six.text_type):
+            xml = xml.encode('utf-8')
+        events = ("start", "end")
+        context = ElementTree.iterparse(six.BytesIO(xml), events=events)
+        ns_tags = {}
         for action, elem in context:
-            self.tag = self._delete_ns(elem.tag)
-
-            func = self._get_func(action, self.tag)
-            self.track_stack(action, elem)
-
-            if func in vars(XMLAPIParser):
-                if action == 'start':
-                    eval('self.' + func)(elem, result)
-                elif action == 'end':
-                    eval('self.' + func)(elem, result)
+            try:
+                tag = ns_tags[elem.tag]
+            except KeyError:
+                tag = ns_tags[elem.tag] = self._delete_ns(elem.tag)
+            self.tag = tag
+
+            if action == 'start':
+                self.stack.append(elem)
+                if split and tag == 'Response':
+                    response_count += 1
+                    if response_count > 1:
+                        result = self._new_result()
+                        ret.append(result)
+                        self.elt = {}
+                        self._index = {}
+                        self._indexed = {}
+            func = self._get_handler(action, tag)
+            if func is not None:
+                getattr(self, func)(elem, result)
+            if action == 'end':
+                self.stack.pop()
 
-        return result
-
-    def track_stack(self, action, elem):
-        if action == 'start':
-            self.stack.append(elem)
-        elif action == 'end':
-            self.stack.pop()
+        return ret
 
     @staticmethod
     def _get_func(action, tag):
@@ -98,12 +157,37 @@ class XMLAPIParser(object):
         for key in source:
             target[key] = source[key]
 
-    @classmethod
-    def _append_elm_property(cls, elm, result, identifier):
-        for obj in result['objects']:
-            if cls.has_identifier(obj, elm, identifier):
-                for key, value in elm.attrib.items():
-                    obj[key] = value
+    def _get_objects(self, elm, result, identifier):
+        """ objects with the same identifier as the element. """
+        value = elm.attrib.get(identifier)
+        if value is None:
+            return []
+
+        objects = result['objects']
+        index = self._index.setdefault(identifier, {})
+        # the last object is checked directly, it could still be updated.
+        end = len(objects) - 1
+        for obj in objects[self._indexed.get(identifier, 0):end]:
+            if identifier in obj:
+                index.setdefault(obj[identifier], []).append(obj)
+        self._indexed[identifier] = max(end, self._indexed.get(identifier, 0))
+
+        ret = list(index.get(value, []))
+        if objects and self.has_identifier(objects[-1], elm, identifier):
+            ret.append(objects[-1])
+        return ret
+
+    def _update_object(self, obj, attrib):
+        for key, value in attrib.items():
+            if key in self._index and obj.get(key) != value:
+                # the index of the identifier is built again when used.
+                del self._index[key]
+                del self._indexed[key]
+            obj[key] = value
+
+    def _append_elm_property(self, elm, result, identifier):
+        for obj in self._get_objects(elm, result, identifier):
+            self._update_object(obj, elm.attrib)
 
     @staticmethod
     def has_identifier(obj, elm, identifier):
@@ -115,12 +199,11 @@ class XMLAPIParser(object):
         sub_elm = {}
         self._copy_property(elm.attrib, sub_elm)
 
-        for obj in result['objects']:
-            if self.has_identifier(obj, elm, identifier):
-                if self.tag in obj:
-                    obj[self.tag].append(sub_elm)
-                else:
-                    obj[self.tag] = [sub_elm]
+        for obj in self._get_objects(elm, result, identifier):
+            if self.tag in obj:
+                obj[self.tag].append(sub_elm)
+            else:
+                obj[self.tag] = [sub_elm]
 
     def start_task_response(self, elm, result):
         result['type'] = 'TaskResponse'
@@ -154,13 +237,14 @@ class XMLAPIParser(object):
         self._copy_property(elm.attrib, self.elt)
         result['problems'].append(self.elt)
 
-    def start_description(self, elm, _):
+    # text of the element is only available at its end.
+    def end_description(self, elm, _):
         self.elt['Description'] = elm.text
 
-    def start_action(self, elm, _):
+    def end_action(self, elm, _):
         self.elt['Action'] = elm.text
 
-    def start_diagnostics(self, elm, _):
+    def end_diagnostics(self, elm, _):
         self.elt['Diagnostics'] = elm.text
 
     def start_file_system(self, elm, result):
@@ -218,7 +302,7 @@ class XMLAPIParser(object):
             self.elt[name] = []
         self.elt[name].append(item)
 
-    def start_li(self, elm, _):
+    def end_li(self, elm, _):
         parent_tag = self._parent_tag()
         host_nodes = ('AccessHosts', 'RwHosts', 'RoHosts', 'RootHosts')
         if parent_tag == 'CifsServers':
@@ -0,0 +1,170 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the overhead of `HTTPClient.request`.
+
+The requests are sent to a fake session, so only the time spent by the
+client is measured.  The request path before the headers and options
+copies were removed is timed as the `legacy_request` stage.  The results
+are stored and compared like the ones of `metric_benchmark`:
+
+    python -m storops_test.connection.client_benchmark --number 2000
+"""
+from __future__ import unicode_literals, print_function
+
+import argparse
+import copy
+import json
+import os
+import timeit
+from datetime import datetime
+
+from storops.connection import client
+from storops.connection.connector import UnityRESTConnector
+from storops.lib.common import get_local_folder
+from storops_test import metric_benchmark
+
+__author__ = 'Cedric Zhuang'
+
+DEFAULT_NUMBER = 2000
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    @property
+    def text(self):
+        # `requests` detects the encoding when decoding the text
+        return self.content.decode('utf-8')
+
+
+class FakeSession(object):
+    def __init__(self, content):
+        self.resp = FakeResponse(content)
+        self.last_call = None
+
+    def request(self, method, url, **kwargs):
+        self.last_call = (method, url, kwargs)
+        return self.resp
+
+    def close(self):
+        pass
+
+
+class LegacyHTTPClient(client.HTTPClient):
+    """ the request path before the headers/options copies were removed. """
+
+    def request(self, full_url, method, **kwargs):
+        headers = copy.deepcopy(self.headers)
+        headers.update(kwargs.get('headers', {}))
+        options = copy.deepcopy(self.request_options)
+        content_type = headers.get('Content-Type', None)
+        if kwargs.get('body', None):
+            if content_type == 'application/json':
+                options['data'] = json.dumps(kwargs['body'])
+            else:
+                options['data'] = kwargs['body']
+        self.log_request(full_url, method, options.get('data', None))
+        resp = self.session.request(method, full_url, headers=headers,
+                                    files=None, **options)
+        body = None
+        if resp.text:
+            if content_type == 'application/json':
+                body = json.loads(resp.text)
+            else:
+                body = resp.text
+        return resp, body
+
+
+STAGES = {'legacy_request': LegacyHTTPClient,
+          'request': client.HTTPClient}
+
+
+def get_default_output():
+    return os.path.join(get_local_folder(), 'benchmark',
+                        'client_benchmark.jsonl')
+
+
+def new_client(clz, count=5):
+    """ client of `clz` whose session returns a list of `count` entries. """
+    body = {'entries': [{'content': {'id': 'sv_{}'.format(i)}}
+                        for i in range(count)]}
+    ret = clz('https://10.10.10.10', dict(UnityRESTConnector.HEADERS),
+              auth=('admin', 'password'), timeout=(30, None))
+    ret.session = FakeSession(json.dumps(body).encode('utf-8'))
+    return ret
+
+
+def _time(clz, number, repeat):
+    cli = new_client(clz)
+
+    def _get():
+        cli.request('https://10.10.10.10/api/types/lun/instances', 'GET')
+
+    return min(timeit.repeat(_get, number=number, repeat=repeat))
+
+
+def run(number=None, stages=None, repeat=5):
+    """ runs the benchmark.
+
+    :param number: number of the requests timed in each repeat.
+    :param stages: names in `STAGES`, all if not set.
+    :param repeat: the best of the repeats is recorded.
+    :return: list of the results, one for each stage.
+    """
+    if number is None:
+        number = DEFAULT_NUMBER
+    if stages is None:
+        stages = sorted(STAGES)
+    env = metric_benchmark.get_environment()
+    timestamp = datetime.now().isoformat()
+    ret = []
+    for stage in stages:
+        seconds = _time(STAGES[stage], number, repeat)
+        ret.append(dict(env, timestamp=timestamp, platform='unity',
+                        objects=number, stage=stage, seconds=seconds,
+                        repeat=repeat))
+    return ret
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='benchmark of the overhead of HTTPClient.request.')
+    parser.add_argument('--number', type=int, default=DEFAULT_NUMBER,
+                        help='number of the requests timed in each repeat.')
+    parser.add_argument('--stages', nargs='+', choices=sorted(STAGES),
+                        help='stages to benchmark, all by default.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='the best of the repeats is recorded.')
+    parser.add_argument('--output', default=None,
+                        help='json lines file of the results.  default is '
+                             '{}.'.format(get_default_output()))
+    args = parser.parse_args(args)
+
+    output = args.output
+    if output is None:
+        output = get_default_output()
+    results = run(args.number, args.stages, args.repeat)
+    metric_benchmark.report(metric_benchmark.compare(
+        results, metric_benchmark.load(output)))
+    metric_benchmark.save(results, output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -17,14 +17,18 @@ from __future__ import unicode_literals
 
 import unittest
 
-from hamcrest import assert_that, calling, equal_to, raises
+from hamcrest import assert_that, calling, equal_to, raises, has_length
 import mock
+import pickle
 from requests import exceptions
 import tempfile
+import time
 
 from storops.connection import client
 from storops.connection import exceptions as storops_ex
 from storops.exception import StoropsConnectTimeoutError
+from storops_test.connection.client_benchmark import LegacyHTTPClient, \
+    new_client
 
 
 class FakeOpener(dict):
@@ -37,6 +41,7 @@ class FakeOpener(dict):
 class MockResponse(object):
     def __init__(self, text, status_code):
         self.text = text
+        self.content = text.encode('utf-8')
         self.status_code = status_code
 
 
@@ -264,3 +269,172 @@ class HTTPClientTest(unittest.TestCase):
         mocked_cs_request.assert_called_with(
             '/api/types/instance',
             'DELETE')
+
+    @mock.patch(
+        'storops.connection.client.HTTPClient._cs_request')
+    def test_get_cached(self, mocked_cs_request):
+        mocked_cs_request.return_value = ('resp', {'id': 'lun_1'})
+        self.client.cache_interval = 60
+        self.client.cache.ttl = 60
+        self.client.get('/api/instances/lun/sv_1')
+        result = self.client.get('/api/instances/lun/sv_1')
+
+        assert_that(result, equal_to(('resp', {'id': 'lun_1'})))
+        assert_that(mocked_cs_request.call_count, equal_to(1))
+        assert_that(self.client.cache_stats['hits'], equal_to(1))
+        assert_that(self.client.cache_stats['misses'], equal_to(1))
+
+    @mock.patch(
+        'storops.connection.client.HTTPClient._cs_request')
+    def test_get_cached_invalidated_by_post(self, mocked_cs_request):
+        self.client.cache_interval = 60
+        self.client.cache.ttl = 60
+        self.client.get('/api/types/lun/instances?compact=True')
+        self.client.get('/api/instances/pool/pool_1?compact=True')
+        self.client.post('/api/instances/lun/sv_1/action/modify')
+        self.client.get('/api/types/lun/instances?compact=True')
+        self.client.get('/api/instances/pool/pool_1?compact=True')
+
+        # the pool response is still cached
+        assert_that(mocked_cs_request.call_count, equal_to(4))
+        assert_that(self.client.cache_stats['hits'], equal_to(1))
+
+
+class HTTPClientPoolTest(unittest.TestCase):
+    def test_default_adapter(self):
+        cli = client.HTTPClient('https://10.10.10.10', {})
+        adapter = cli.session.get_adapter('https://10.10.10.10')
+        assert_that(adapter._pool_maxsize, equal_to(10))
+        assert_that(adapter._pool_block, equal_to(False))
+
+    def test_pool_configured(self):
+        cli = client.HTTPClient('https://10.10.10.10', {},
+                                pool_connections=2, pool_maxsize=50,
+                                pool_block=True)
+        for url in ('https://10.10.10.10', 'http://10.10.10.10'):
+            adapter = cli.session.get_adapter(url)
+            assert_that(adapter._pool_connections, equal_to(2))
+            assert_that(adapter._pool_maxsize, equal_to(50))
+            assert_that(adapter._pool_block, equal_to(True))
+
+    def test_keep_alive_disabled(self):
+        headers = {'Accept': 'application/json'}
+        cli = client.HTTPClient('https://10.10.10.10', headers,
+                                keep_alive=False)
+        assert_that(cli.headers, equal_to({'Accept': 'application/json',
+                                           'Connection': 'close'}))
+        # the headers passed in are not changed
+        assert_that(headers, equal_to({'Accept': 'application/json'}))
+
+    def test_pool_stats_empty(self):
+        cli = client.HTTPClient('https://10.10.10.10', {})
+        assert_that(cli.pool_stats, equal_to([]))
+
+    def test_pool_stats(self):
+        cli = client.HTTPClient('https://10.10.10.10', {}, pool_maxsize=4)
+        adapter = cli.session.get_adapter('https://10.10.10.10')
+        pool = adapter.poolmanager.connection_from_url(
+            'https://10.10.10.10')
+        conn = pool._get_conn()
+        stats = cli.pool_stats
+        assert_that(len(stats), equal_to(1))
+        assert_that(stats[0]['host'], equal_to('10.10.10.10'))
+        assert_that(stats[0]['maxsize'], equal_to(4))
+        assert_that(stats[0]['in_use'], equal_to(1))
+        pool._put_conn(conn)
+        stats = cli.pool_stats
+        assert_that(stats[0]['in_use'], equal_to(0))
+        assert_that(stats[0]['idle'], equal_to(1))
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_get_type_name(self):
+        get_type_name = client.ResponseCache.get_type_name
+        assert_that(get_type_name('/api/types/lun/instances?compact=True'),
+                    equal_to('lun'))
+        assert_that(get_type_name('/api/types/lun?compact=True'),
+                    equal_to('lun'))
+        assert_that(get_type_name('/api/instances/lun/sv_1/action/modify'),
+                    equal_to('lun'))
+        assert_that(get_type_name('/servlets/CelerraManagementServices'),
+                    equal_to(None))
+
+    def test_picklable(self):
+        cache = client.ResponseCache(10, max_size=5)
+        cache.put('key', '/api/types/lun/instances', 'value')
+        cache_new = pickle.loads(pickle.dumps(cache))
+        assert_that(cache_new.ttl, equal_to(10))
+        assert_that(cache_new.max_size, equal_to(5))
+        assert_that(len(cache_new), equal_to(0))
+        cache_new.put('key', '/api/types/lun/instances', 'value')
+        assert_that(cache_new.get('key'), equal_to('value'))
+
+    def test_get_key_with_params(self):
+        key1 = client.ResponseCache.get_key('/api/a', body={'b': 1, 'a': 2})
+        key2 = client.ResponseCache.get_key('/api/a', body={'a': 2, 'b': 1})
+        assert_that(key1, equal_to(key2))
+        assert_that(client.ResponseCache.get_key('/api/a'),
+                    equal_to('/api/a'))
+
+    def test_expired(self):
+        cache = client.ResponseCache(60)
+        cache.put('a', '/api/types/lun/instances', 1)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            assert_that(cache.get('a'), equal_to(None))
+        assert_that(cache.misses, equal_to(1))
+
+    def test_lru_eviction(self):
+        cache = client.ResponseCache(60, max_size=2)
+        cache.put('a', '/api/types/lun/instances', 1)
+        cache.put('b', '/api/types/lun/instances', 2)
+        cache.get('a')
+        cache.put('c', '/api/types/lun/instances', 3)
+        assert_that(len(cache), equal_to(2))
+        assert_that(cache.get('a'), equal_to(1))
+        assert_that(cache.get('b'), equal_to(None))
+        assert_that(cache.get('c'), equal_to(3))
+
+    def test_invalidate(self):
+        cache = client.ResponseCache(60)
+        cache.put('a', '/api/types/lun/instances', 1)
+        cache.put('b', '/api/instances/lun/sv_1', 2)
+        cache.put('c', '/api/instances/pool/pool_1', 3)
+        cache.invalidate('/api/types/lun/instances')
+        assert_that(len(cache), equal_to(1))
+        assert_that(cache.get('c'), equal_to(3))
+        assert_that(cache.stats, equal_to({'hits': 1, 'misses': 0,
+                                           'size': 1, 'max_size': 1024}))
+
+
+class HTTPClientLegacyTest(unittest.TestCase):
+    """ the request path sends the same requests as the legacy one. """
+
+    url = 'https://10.10.10.10/api/types/lun/instances'
+
+    def request(self, clz, method, **kwargs):
+        cli = new_client(clz)
+        headers = dict(cli.headers)
+        options = dict(cli.request_options)
+        resp, body = cli.request(self.url, method, **kwargs)
+        # the shared headers and options are not changed
+        assert_that(cli.headers, equal_to(headers))
+        assert_that(cli.request_options, equal_to(options))
+        return body, cli.session.last_call
+
+    def check(self, method, **kwargs):
+        ret = self.request(client.HTTPClient, method, **kwargs)
+        assert_that(ret, equal_to(self.request(LegacyHTTPClient, method,
+                                               **kwargs)))
+        return ret
+
+    def test_get(self):
+        body, _ = self.check('GET')
+        assert_that(body['entries'], has_length(5))
+
+    def test_post_body(self):
+        _, (_, _, kwargs) = self.check('POST', body={'name': 'lun_1'})
+        assert_that(kwargs['data'], equal_to('{"name": "lun_1"}'))
+
+    def test_extra_headers(self):
+        _, (_, _, kwargs) = self.check('GET', headers={'X-EMC-REST': 'x'})
+        assert_that(kwargs['headers']['X-EMC-REST'], equal_to('x'))
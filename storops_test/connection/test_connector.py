@@ -16,12 +16,17 @@
 
 from __future__ import unicode_literals
 
+import socket
+import threading
+import time
 import unittest
 
 import mock
-from hamcrest import assert_that, equal_to
+from hamcrest import assert_that, equal_to, has_length, calling, raises, \
+    only_contains, same_instance, not_, greater_than
 
 from storops.connection import connector
+from storops.connection.exceptions import SSHExecutionError
 
 
 class UnityRESTConnectorTest(unittest.TestCase):
@@ -40,6 +45,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             ca_cert_path=None,
             cache_interval=0,
             timeout=(30, None),
+            pool_connections=None,
+            pool_maxsize=None,
+            pool_block=False,
+            keep_alive=True,
         )
 
     @mock.patch('storops.connection.client.HTTPClient')
@@ -56,6 +65,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             ca_cert_path=None,
             cache_interval=0,
             timeout=(30, None),
+            pool_connections=None,
+            pool_maxsize=None,
+            pool_block=False,
+            keep_alive=True,
         )
 
     @mock.patch('storops.connection.client.HTTPClient')
@@ -72,6 +85,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             ca_cert_path='/tmp/ca_cert.crt',
             cache_interval=0,
             timeout=(30, None),
+            pool_connections=None,
+            pool_maxsize=None,
+            pool_block=False,
+            keep_alive=True,
         )
 
     @mock.patch('storops.connection.client.HTTPClient')
@@ -88,6 +105,10 @@ class UnityRESTConnectorTest(unittest.TestCase):
             ca_cert_path=None,
             cache_interval=0,
             timeout=(99, None),
+            pool_connections=None,
+            pool_maxsize=None,
+            pool_block=False,
+            keep_alive=True,
         )
 
     @mock.patch('storops.connection.client.HTTPClient')
@@ -110,4 +131,246 @@ class UnityRESTConnectorTest(unittest.TestCase):
             ca_cert_path=None,
             cache_interval=0,
             timeout=(99, None),
+            pool_connections=None,
+            pool_maxsize=None,
+            pool_block=False,
+            keep_alive=True,
         )
+
+
+def _delayed(data, seconds):
+    """ output arriving the seconds after it is read the first time. """
+    start = []
+
+    def _read():
+        if not start:
+            start.append(time.time())
+        return data if time.time() - start[0] >= seconds else None
+
+    return _read
+
+
+class FakeChannel(object):
+    def __init__(self, transport, stdout=None, stderr=None, exit_status=0):
+        self.transport = transport
+        # None in the stdout means no output in time.  a callable is
+        # called on each read till it returns the output.
+        self.stdout = list(stdout or [])
+        self.stderr = list(stderr or [])
+        self.exit_status = exit_status
+        self.command = None
+        self.closed = False
+
+    def exec_command(self, command):
+        self.command = command
+        for key, value in FakeTransport.outputs.get(command, {}).items():
+            setattr(self, key,
+                    list(value) if isinstance(value, list) else value)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        if not self.stdout:
+            return b''
+        ret = self.stdout[0]
+        if callable(ret):
+            ret = ret()
+        if ret is not None or not callable(self.stdout[0]):
+            self.stdout.pop(0)
+        if ret is None:
+            raise socket.timeout()
+        return ret
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0) if self.stderr else b''
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport(object):
+    # {command: kwargs of the channel}
+    outputs = {}
+    instances = []
+
+    def __init__(self, address):
+        self.address = address
+        self.active = True
+        self.keepalive = None
+        self.channels = []
+        self.fail_session = False
+        FakeTransport.instances.append(self)
+
+    def connect(self, username, password):
+        self.username = username
+
+    def set_keepalive(self, interval):
+        self.keepalive = interval
+
+    def is_active(self):
+        return self.active
+
+    def open_session(self):
+        if self.fail_session or not self.active:
+            raise EOFError('transport closed.')
+        ret = FakeChannel(self)
+        self.channels.append(ret)
+        return ret
+
+    def close(self):
+        self.active = False
+
+
+class SSHConnectorTest(unittest.TestCase):
+    def setUp(self):
+        FakeTransport.instances = []
+        FakeTransport.outputs = self.outputs = {}
+        fake = mock.Mock(Transport=FakeTransport)
+        self.patcher = mock.patch.object(connector, 'paramiko', fake)
+        self.patcher.start()
+        self.ssh = connector.SSHConnector('10.10.10.10', 'nasadmin', 'pwd',
+                                          pool_size=2)
+        self.ssh.poll_interval = 0.01
+
+    def tearDown(self):
+        self.ssh.close()
+        self.patcher.stop()
+
+    def test_init(self):
+        assert_that(FakeTransport.instances, has_length(1))
+        transport = FakeTransport.instances[0]
+        assert_that(transport.address, equal_to(('10.10.10.10', 22)))
+        assert_that(transport.keepalive, equal_to(30))
+
+    def test_execute(self):
+        self.outputs['ls -l'] = dict(stdout=[b'a\n', None, b'b\n'],
+                                     stderr=[b'warn'])
+        out, err = self.ssh.execute(['ls', '-l'])
+        assert_that(out, equal_to('a\nb\n'))
+        assert_that(err, equal_to('warn'))
+        channel = FakeTransport.instances[0].channels[0]
+        assert_that(channel.closed, equal_to(True))
+
+    def test_execute_split_utf8(self):
+        data = '中文'.encode('utf-8')
+        self.outputs['cat'] = dict(stdout=[data[:2], data[2:]])
+        out, _ = self.ssh.execute(['cat'])
+        assert_that(out, equal_to('中文'))
+
+    def test_execute_error(self):
+        self.outputs['false'] = dict(stdout=[b'out'], stderr=[b'err'],
+                                     exit_status=1)
+        assert_that(calling(self.ssh.execute).with_args(['false']),
+                    raises(SSHExecutionError))
+        out, _ = self.ssh.execute(['false'], check_exit_code=False)
+        assert_that(out, equal_to('out'))
+
+    def test_execute_timeout(self):
+        self.outputs['sleep'] = dict(stdout=[lambda: None])
+        assert_that(calling(self.ssh.execute).with_args(['sleep'], 0.01),
+                    raises(SSHExecutionError, 'No output in 0.01 seconds'))
+        assert_that(self.ssh._channels.values(), only_contains(0))
+
+    def test_execute_timeout_without_output(self):
+        # the command runs longer than the timeout, but the output never
+        # stops longer than it.
+        self.outputs['slow'] = dict(stdout=[_delayed(b'a', 0.15)
+                                            for _ in range(4)])
+        start = time.time()
+        out, _ = self.ssh.execute(['slow'], 0.4)
+        assert_that(out, equal_to('aaaa'))
+        assert_that(time.time() - start, greater_than(0.4))
+
+    def test_iter_lines(self):
+        self.outputs['ls'] = dict(stdout=[b'a\nb', b'c\n', b'd'])
+        lines = list(self.ssh.iter_lines(['ls']))
+        assert_that(lines, equal_to(['a', 'bc', 'd']))
+
+    def test_iter_lines_stopped(self):
+        self.outputs['ls'] = dict(stdout=[b'a\nb\n', b'c\n'])
+        lines = self.ssh.iter_lines(['ls'])
+        assert_that(next(lines), equal_to('a'))
+        lines.close()
+        channel = FakeTransport.instances[0].channels[0]
+        assert_that(channel.closed, equal_to(True))
+        assert_that(channel.stdout, has_length(1))
+        assert_that(self.ssh._channels.values(), only_contains(0))
+
+    def test_stream_error_after_output(self):
+        self.outputs['false'] = dict(stdout=[b'a', b'b'], exit_status=2)
+        stream = self.ssh.stream(['false'])
+        assert_that(next(stream), equal_to('a'))
+        assert_that(next(stream), equal_to('b'))
+        assert_that(calling(next).with_args(stream),
+                    raises(SSHExecutionError))
+
+    def test_reconnect_dropped(self):
+        FakeTransport.instances[0].active = False
+        self.outputs['ls'] = dict(stdout=[b'a'])
+        out, _ = self.ssh.execute(['ls'])
+        assert_that(out, equal_to('a'))
+        assert_that(FakeTransport.instances, has_length(2))
+        assert_that(list(self.ssh._channels),
+                    equal_to([FakeTransport.instances[1]]))
+
+    def test_reconnect_session_failed(self):
+        FakeTransport.instances[0].fail_session = True
+        self.outputs['ls'] = dict(stdout=[b'a'])
+        out, _ = self.ssh.execute(['ls'])
+        assert_that(out, equal_to('a'))
+        assert_that(FakeTransport.instances, has_length(2))
+
+    def test_pool(self):
+        first = self.ssh._acquire_transport()
+        second = self.ssh._acquire_transport()
+        third = self.ssh._acquire_transport()
+        assert_that(FakeTransport.instances, has_length(2))
+        assert_that(second, not_(same_instance(first)))
+        assert_that(third, same_instance(first))
+        for transport in (first, second, third):
+            self.ssh._release_transport(transport)
+        assert_that(self.ssh._channels.values(), only_contains(0))
+
+    def test_pool_trimmed(self):
+        transports = [self.ssh._acquire_transport(new=True)
+                      for _ in range(3)]
+        assert_that(self.ssh._channels, has_length(4))
+        for transport in transports:
+            self.ssh._release_transport(transport)
+        assert_that(self.ssh._channels, has_length(2))
+
+    def test_concurrent(self):
+        count = 4
+        started = set()
+
+        def _wait():
+            # no output until all the commands are running.
+            started.add(threading.current_thread())
+            if len(started) < count:
+                return None
+            return b'done'
+
+        self.outputs['wait'] = dict(stdout=[_wait])
+        results = []
+
+        def _execute():
+            results.append(self.ssh.execute(['wait'], 5)[0])
+
+        threads = [threading.Thread(target=_execute) for _ in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert_that(results, equal_to(['done'] * count))
+        assert_that(FakeTransport.instances, has_length(2))
+
+    def test_close(self):
+        self.ssh.close()
+        assert_that(FakeTransport.instances[0].active, equal_to(False))
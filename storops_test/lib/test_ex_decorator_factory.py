@@ -0,0 +1,181 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import io
+import os
+import re
+import unittest
+
+import six
+from hamcrest import assert_that, equal_to, none, calling, raises, \
+    same_instance, not_
+
+from storops.exception import VNXException, _cli_exception_factory
+from storops.lib.ex_decorator_factory import ExceptionListDecoratorFactory, \
+    ExceptionMatcher, _trie_pattern
+
+__author__ = 'Cedric Zhuang'
+
+
+def _find_in_order(exception_list, output):
+    """ the exception class found by checking the classes one by one. """
+    for clz in exception_list:
+        msg = clz.get_error_message()
+        if isinstance(msg, (tuple, list, set)):
+            found = any(m in output for m in msg)
+        elif isinstance(msg, six.string_types):
+            found = msg in output
+        else:
+            found = msg.search(output) is not None
+        if found:
+            return clz
+    return None
+
+
+def _error(name, **attrs):
+    return type(str(name), (VNXException,), attrs)
+
+
+class TriePatternTest(unittest.TestCase):
+    def test_match_words(self):
+        pattern = re.compile(_trie_pattern(['abc', 'ab', 'abd', 'x.y']))
+        assert_that([m.group() for m in pattern.finditer('ab abd abc xzy')],
+                    equal_to(['ab', 'abd', 'abc']))
+        assert_that(pattern.search('x.y').group(), equal_to('x.y'))
+
+    def test_prefix_of_other(self):
+        pattern = re.compile(_trie_pattern(['ab', 'abcd']))
+        assert_that(pattern.search('abc').group(), equal_to('ab'))
+        assert_that(pattern.search('abcd').group(), equal_to('abcd'))
+
+
+class ExceptionMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.errors = [
+            _error('CodeError', error_code=0x712d8d04),
+            _error('ShortError', error_message='in use'),
+            _error('LongError', error_message='Storage Group name in use'),
+            _error('ListError', error_message=('time out', 'timed out')),
+            _error('RegexError', error_regex=r'interface .* not exist'),
+            _error('LaterError', error_message='name'),
+        ]
+        self.matcher = ExceptionMatcher(self.errors)
+
+    def match(self, output):
+        ret = self.matcher.match(output)
+        assert_that(ret, equal_to(_find_in_order(self.errors, output)))
+        return ret
+
+    def test_hex_code(self):
+        assert_that(self.match('Error: 0x712d8d04 blah').__name__,
+                    equal_to('CodeError'))
+
+    def test_list(self):
+        assert_that(self.match('Request timed out.').__name__,
+                    equal_to('ListError'))
+
+    def test_regex(self):
+        assert_that(self.match('Network Interface if0 does\n not exist')
+                    .__name__, equal_to('RegexError'))
+
+    def test_regex_before_literal(self):
+        output = 'interface a not exist, name'
+        assert_that(self.match(output).__name__, equal_to('RegexError'))
+
+    def test_overlapped(self):
+        # the pattern reports the long one, the short one comes first.
+        output = 'Storage Group name in use'
+        assert_that(self.match(output).__name__, equal_to('ShortError'))
+
+    def test_first_class(self):
+        output = 'name, in use, 0x712d8d04'
+        assert_that(self.match(output).__name__, equal_to('CodeError'))
+
+    def test_not_found(self):
+        assert_that(self.match('LOGICAL UNIT NUMBER 1'), none())
+
+    def test_not_string(self):
+        assert_that(self.match(['0x712d8d04']).__name__,
+                    equal_to('CodeError'))
+
+    def test_invalid_message(self):
+        errors = [_error('InvalidError', error_message=1)]
+        assert_that(calling(ExceptionMatcher).with_args(errors),
+                    raises(ValueError, 'not a valid message'))
+
+    def test_no_message(self):
+        errors = [_error('NoMessageError')]
+        assert_that(calling(ExceptionMatcher).with_args(errors),
+                    raises(AttributeError, 'must be specified'))
+
+
+class ExceptionListDecoratorFactoryTest(unittest.TestCase):
+    def test_register(self):
+        factory = ExceptionListDecoratorFactory(VNXException)
+        decorator = factory.clz_decorator()
+        decorator(_error('AError', error_message='a'))
+        assert_that(factory.get_exception('a b').__name__, equal_to('AError'))
+        matcher = factory.get_matcher()
+        assert_that(factory.get_matcher(), same_instance(matcher))
+
+        decorator(_error('BError', error_message='b'))
+        assert_that(factory.get_matcher(), not_(same_instance(matcher)))
+        assert_that(factory.get_exception('b').__name__, equal_to('BError'))
+
+    def test_matcher_not_compare_list(self):
+        class NoCompareList(list):
+            def __eq__(self, other):
+                raise AssertionError('exception list compared.')
+
+            __ne__ = __eq__
+
+        factory = ExceptionListDecoratorFactory(VNXException,
+                                                NoCompareList())
+        factory.clz_decorator()(_error('AError', error_message='a'))
+        matcher = factory.get_matcher()
+        assert_that(factory.get_matcher(), same_instance(matcher))
+        assert_that(factory.get_exception('a').__name__, equal_to('AError'))
+
+    def test_matcher_list_appended(self):
+        factory = ExceptionListDecoratorFactory(VNXException)
+        factory.clz_decorator()(_error('AError', error_message='a'))
+        matcher = factory.get_matcher()
+        factory.exception_list.append(_error('BError', error_message='b'))
+        assert_that(factory.get_matcher(), not_(same_instance(matcher)))
+        assert_that(factory.get_exception('b').__name__, equal_to('BError'))
+
+    def test_default(self):
+        factory = ExceptionListDecoratorFactory(VNXException)
+        assert_that(factory.get_exception('a'), equal_to(VNXException))
+        assert_that(factory.get_exception(None, KeyError), equal_to(KeyError))
+
+    def test_same_as_in_order(self):
+        exception_list = _cli_exception_factory.exception_list
+        matcher = ExceptionMatcher(exception_list)
+        outputs = []
+        folder = os.path.join(os.path.dirname(__file__), os.pardir, 'vnx',
+                              'testdata', 'block_output')
+        for name in sorted(os.listdir(folder)):
+            with io.open(os.path.join(folder, name), encoding='utf-8') as f:
+                outputs.append(f.read())
+        for clz in exception_list:
+            msg = clz.get_error_message()
+            if isinstance(msg, six.string_types):
+                outputs.append('Error: {}\n'.format(msg))
+        for output in outputs:
+            assert_that(matcher.match(output),
+                        equal_to(_find_in_order(exception_list, output)))
@@ -17,15 +17,18 @@ from __future__ import unicode_literals
 
 import os
 import unittest
+from datetime import datetime, timedelta
 from time import sleep
 
 from hamcrest import assert_that, less_than, greater_than, none, equal_to, \
-    has_items, contains_string
+    has_items, contains_string, calling, raises, close_to
 
 from storops.lib.common import get_data_file
-from storops.lib.metric import PerfManager, MetricCounterRecords, MetricsDumper
+from storops.lib.metric import PerfManager, MetricCounterRecords, \
+    MetricsDumper, MetricsTable, to_seconds, aggregate_values
 from storops.unity.resource.disk import UnityDiskList, UnityDisk
 from storops.unity.resource.lun import UnityLun, UnityLunList
+from storops_test.utils import is_nan
 
 __author__ = 'Cedric Zhuang'
 
@@ -99,6 +102,30 @@ class PerfManagerTest(unittest.TestCase):
         assert_that(cli._is_perf_monitored(UnityLunList(cli=cli)),
                     equal_to(False))
 
+    def test_persist_rsc_list_metrics_to_store(self):
+        class RscList(object):
+            stores = []
+
+            def update(self):
+                pass
+
+            def persist_metric_data(self, store=None):
+                self.stores.append(store)
+
+        cli = self.perf_mon()
+        cli.enable_perf_metric(0, lambda: 1)
+        cli.add_metric_record(1)
+        cli.add_metric_record(2)
+        store = object()
+        cli.persist_perf_stats([RscList()], store=store)
+        cli.persist_rsc_list_metrics()
+        assert_that(RscList.stores, equal_to([store]))
+
+    def test_enable_perf_metric_history_size(self):
+        cli = self.perf_mon()
+        cli.enable_perf_metric(0, lambda: 1, history_size=16)
+        assert_that(cli.metric_counter_records.maximum, equal_to(16))
+
 
 class MetricCounterRecordsTest(unittest.TestCase):
     def test_max_count(self):
@@ -147,6 +174,124 @@ class MetricCounterRecordsTest(unittest.TestCase):
         assert_that(records.curr, none())
         assert_that(records.prev, none())
 
+    def test_memo_cleared_when_rotated(self):
+        records = MetricCounterRecords()
+        records.add_results(1)
+        records.memo['a'] = 1
+        records.add_results(None)
+        assert_that(records.memo, equal_to({'a': 1}))
+        records.add_results(2)
+        assert_that(records.memo, equal_to({}))
+
+    def test_memo_cleared_when_reset(self):
+        records = MetricCounterRecords()
+        records.add_results(1)
+        records.memo['a'] = 1
+        records.reset()
+        assert_that(records.memo, equal_to({}))
+
+
+def _records(count, maximum=None, interval=60):
+    records = MetricCounterRecords(maximum)
+    start = datetime(2016, 11, 21, 9, 0, 0)
+    for i in range(count):
+        records.add_results(i, start + timedelta(seconds=interval * i))
+    return records
+
+
+class MetricCounterRecordsHistoryTest(unittest.TestCase):
+    def test_ring_buffer(self):
+        records = _records(20, 15)
+        assert_that(len(records), equal_to(15))
+        assert_that(records.curr, equal_to(19))
+        assert_that(records.prev, equal_to(18))
+        assert_that([v for _, v in records.samples()],
+                    equal_to(list(range(19, 4, -1))))
+
+    def test_resize(self):
+        records = _records(5, 5)
+        records.resize(3)
+        assert_that([v for _, v in records.samples()], equal_to([4, 3, 2]))
+        records.resize(4)
+        records.add_results(5)
+        assert_that([v for _, v in records.samples()],
+                    equal_to([5, 4, 3, 2]))
+
+    def test_resize_too_small(self):
+        records = MetricCounterRecords()
+        assert_that(calling(records.resize).with_args(1),
+                    raises(ValueError, 'at least 2'))
+
+    def test_samples_window(self):
+        records = _records(20, 20)
+        assert_that([v for _, v in records.samples('5m')],
+                    equal_to([19, 18, 17, 16, 15, 14]))
+        assert_that([v for _, v in records.samples(60)], equal_to([19, 18]))
+
+    def test_samples_window_jitter(self):
+        records = MetricCounterRecords(20)
+        start = datetime(2016, 11, 21, 9, 0, 0)
+        for i, delay in enumerate([0, 61, 119, 182]):
+            records.add_results(i, start + timedelta(seconds=delay))
+        assert_that([v for _, v in records.samples('2m')],
+                    equal_to([3, 2, 1]))
+
+    def test_samples_window_longer_than_history(self):
+        records = _records(3, 3)
+        assert_that([v for _, v in records.samples('15m')],
+                    equal_to([2, 1, 0]))
+
+    def test_samples_disabled(self):
+        records = _records(3, 3)
+        records.reset()
+        assert_that(records.samples(), equal_to([]))
+
+    def test_window_pair(self):
+        records = _records(20, 20)
+        pair = records.window_pair('15m')
+        assert_that(pair.prev_counter, equal_to(4))
+        assert_that(pair.curr_counter, equal_to(19))
+        assert_that(pair.metric_counter_records, equal_to(records))
+
+    def test_window_pair_one_sample(self):
+        pair = _records(1, 5).window_pair('5m')
+        assert_that(pair.prev_counter, none())
+        assert_that(pair.curr_counter, equal_to(0))
+
+    def test_pairs(self):
+        pairs = _records(5, 5).pairs('2m')
+        assert_that([(p.prev_counter, p.curr_counter) for p in pairs],
+                    equal_to([(3, 4), (2, 3)]))
+
+
+class MetricAggregateTest(unittest.TestCase):
+    def test_to_seconds(self):
+        assert_that(to_seconds('1m'), equal_to(60))
+        assert_that(to_seconds('15m'), equal_to(900))
+        assert_that(to_seconds('30s'), equal_to(30))
+        assert_that(to_seconds('1h'), equal_to(3600))
+        assert_that(to_seconds('90'), equal_to(90))
+        assert_that(to_seconds(300), equal_to(300))
+
+    def test_to_seconds_error(self):
+        assert_that(calling(to_seconds).with_args('-1m'), raises(ValueError))
+        assert_that(calling(to_seconds).with_args('abc'), raises(ValueError))
+
+    def test_aggregate_values(self):
+        r = aggregate_values([4, None, 1, float('nan'), 3, 2], [50, 90])
+        assert_that(r['count'], equal_to(4))
+        assert_that(r['min'], equal_to(1))
+        assert_that(r['max'], equal_to(4))
+        assert_that(r['avg'], equal_to(2.5))
+        assert_that(r['p50'], equal_to(2.5))
+        assert_that(r['p90'], close_to(3.7, 1e-9))
+
+    def test_aggregate_values_empty(self):
+        r = aggregate_values([None, float('nan')], [50])
+        assert_that(r['count'], equal_to(0))
+        assert_that(r['avg'], is_nan())
+        assert_that(r['p50'], is_nan())
+
 
 class SampleRscList(object):
     def __init__(self):
@@ -165,6 +310,39 @@ class SampleRscList(object):
         return list(map(str, [rsc['time'], rsc['name']]))
 
 
+class SampleTableRscList(SampleRscList):
+    def __init__(self):
+        super(SampleTableRscList, self).__init__()
+        self.table_names = []
+
+    def metrics_table(self, names):
+        self.table_names.append(names)
+        ids = [rsc['name'] for rsc in self.list]
+        # values different from the ones of the resources
+        rows = [[rsc[name] * 2 for name in names] for rsc in self.list]
+        return MetricsTable(ids, names, rows)
+
+
+class MetricsTableTest(unittest.TestCase):
+    table = MetricsTable(['a', 'b'], ['ma', 'mb'], [[1, 2.0], [4, 5.0]])
+
+    def test_len(self):
+        assert_that(len(self.table), equal_to(2))
+
+    def test_get(self):
+        assert_that(self.table.get('b', 'mb'), equal_to(5.0))
+        assert_that(self.table.get_row('a'), equal_to([1, 2.0]))
+
+    def test_iter(self):
+        assert_that(list(self.table),
+                    equal_to([('a', [1, 2.0]), ('b', [4, 5.0])]))
+
+    def test_to_dict(self):
+        assert_that(self.table.to_dict(),
+                    equal_to({'a': {'ma': 1, 'mb': 2.0},
+                              'b': {'ma': 4, 'mb': 5.0}}))
+
+
 class MetricsDumperTest(unittest.TestCase):
     dumper = MetricsDumper(SampleRscList(), ['time', 'name'],
                            SampleRscList._hdr_cb)
@@ -199,3 +377,11 @@ class MetricsDumperTest(unittest.TestCase):
         self.dumper.persist_metric_data(filename)
         exists = os.path.exists(filename)
         assert_that(exists, equal_to(True), '{} not found.'.format(filename))
+
+    def test_get_metrics_csv_data_from_table(self):
+        rsc_list = SampleTableRscList()
+        dumper = MetricsDumper(rsc_list, ['time', 'name'],
+                               SampleRscList._hdr_cb)
+        data = dumper.get_metrics_csv_data()
+        assert_that(data, equal_to('1,a,2,4.0,aaaaaa\n1,b,8,10.0,bbbbbb'))
+        assert_that(rsc_list.table_names, equal_to([['ma', 'mb', 'mc']]))
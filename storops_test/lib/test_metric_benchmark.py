@@ -0,0 +1,77 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from hamcrest import assert_that, equal_to, has_length, only_contains, \
+    greater_than_or_equal_to, none, close_to
+from six.moves import StringIO
+
+from storops.unity.calculator import calculators as unity_calculators
+from storops.unity.resource.lun import UnityLun
+from storops_test import metric_benchmark as benchmark
+
+__author__ = 'Cedric Zhuang'
+
+
+class MetricBenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(suffix='storops_test')
+        self.output = os.path.join(self.folder, 'benchmark', 'result.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_unity_sample(self):
+        lun_list = benchmark.unity_lun_list(3)
+        assert_that(lun_list, has_length(3))
+        value = unity_calculators.get_metric_value(
+            UnityLun, 'read_iops', lun_list._cli)
+        assert_that(sorted(value.keys()), equal_to(['sv_0', 'sv_1', 'sv_2']))
+        assert_that(value['sv_0'], greater_than_or_equal_to(0))
+
+    def test_vnx_sample(self):
+        lun_list = benchmark.vnx_lun_list(3)
+        assert_that(lun_list, has_length(3))
+        # up to 10000 reads per second of each sp
+        assert_that(lun_list[0].read_iops, close_to(10000, 10000))
+
+    def test_main(self):
+        args = ['--sizes', '2', '--repeat', '1', '--output', self.output]
+        results = benchmark.main(args)
+        assert_that(results, has_length(2 * len(benchmark.STAGES)))
+        assert_that([r['seconds'] for r in results],
+                    only_contains(greater_than_or_equal_to(0)))
+        assert_that(benchmark.load(self.output), equal_to(results))
+
+        benchmark.main(args + ['--platforms', 'unity'])
+        assert_that(benchmark.load(self.output),
+                    has_length(3 * len(benchmark.STAGES)))
+
+    def test_compare(self):
+        history = benchmark.run([2], ['unity'], ['metrics_table'], 1)
+        results = benchmark.run([2, 3], ['unity'], ['metrics_table'], 1)
+        comparison = benchmark.compare(results, history)
+        assert_that(comparison[0][1], equal_to(history[0]['seconds']))
+        assert_that(comparison[1][1], none())
+
+        stream = StringIO()
+        benchmark.report(comparison, stream)
+        assert_that(stream.getvalue().splitlines(), has_length(3))
@@ -0,0 +1,146 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import pickle
+import unittest
+
+from hamcrest import assert_that, equal_to, contains_string, calling, \
+    raises, not_, same_instance
+from six.moves import urllib
+
+from storops.lib.metric import MetricsTable
+from storops.lib.metric_exporter import OpenMetricsExporter, CONTENT_TYPE
+
+__author__ = 'Cedric Zhuang'
+
+
+def _table(ids=None, rows=None):
+    if ids is None:
+        ids = ['sv_1', 'sv_2']
+    if rows is None:
+        rows = [[1, 2.5], [3, 4]]
+    return MetricsTable(ids, ['read_iops', 'write_iops'], rows)
+
+
+class OpenMetricsExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.exporter = OpenMetricsExporter()
+
+    def tearDown(self):
+        self.exporter.close()
+
+    @property
+    def text(self):
+        return self.exporter.render().decode('utf-8')
+
+    def test_render_empty(self):
+        assert_that(self.text, equal_to('# EOF\n'))
+
+    def test_render(self):
+        self.exporter.write('10.244.223.61_UnityLun', _table(), 1479718800)
+        assert_that(self.text, equal_to(
+            '# TYPE storops_read_iops gauge\n'
+            'storops_read_iops{array="10.244.223.61",type="UnityLun",'
+            'id="sv_1"} 1\n'
+            'storops_read_iops{array="10.244.223.61",type="UnityLun",'
+            'id="sv_2"} 3\n'
+            '# TYPE storops_write_iops gauge\n'
+            'storops_write_iops{array="10.244.223.61",type="UnityLun",'
+            'id="sv_1"} 2.5\n'
+            'storops_write_iops{array="10.244.223.61",type="UnityLun",'
+            'id="sv_2"} 4\n'
+            '# TYPE storops_collection_timestamp_seconds gauge\n'
+            '# UNIT storops_collection_timestamp_seconds seconds\n'
+            'storops_collection_timestamp_seconds{array="10.244.223.61",'
+            'type="UnityLun"} 1479718800\n'
+            '# EOF\n'))
+
+    def test_families_of_lists(self):
+        self.exporter.write('10.244.223.61_UnityLun', _table(), 0)
+        self.exporter.write('10.244.211.30_VNXLun', _table(['LUN 1']), 0)
+        text = self.text
+        # one family for each metric
+        assert_that(text.count('# TYPE storops_read_iops gauge'),
+                    equal_to(1))
+        read_iops = text.split('# TYPE storops_write_iops')[0]
+        assert_that(read_iops, contains_string('type="VNXLun",id="LUN 1"'))
+        assert_that(read_iops, contains_string('type="UnityLun",id="sv_1"'))
+
+    def test_update_list(self):
+        name = '10.244.223.61_UnityLun'
+        self.exporter.write(name, _table(), 0)
+        self.exporter.write(name, _table(rows=[[5, 6], [7, 8]]), 0)
+        assert_that(self.text, contains_string('id="sv_1"} 5\n'))
+        assert_that(self.text, not_(contains_string('id="sv_1"} 1\n')))
+
+    def test_invalid_values(self):
+        self.exporter.write('10.244.223.61_UnityLun',
+                            _table(rows=[[None, 'abc'], [float('nan'), 1]]),
+                            0)
+        text = self.text
+        assert_that(text, not_(contains_string('id="sv_1"')))
+        assert_that(text, contains_string('id="sv_2"} NaN\n'))
+
+    def test_escape_labels(self):
+        self.exporter.write('10.244.223.61_UnityLun',
+                            _table(['a"b\\c\nd'], [[1, 2]]), 0)
+        assert_that(self.text, contains_string('id="a\\"b\\\\c\\nd"} 1\n'))
+
+    def test_prefix(self):
+        exporter = OpenMetricsExporter(prefix='unity')
+        exporter.write('10.244.223.61_UnityLun', _table(), 0)
+        assert_that(exporter.render().decode('utf-8'),
+                    contains_string('# TYPE unity_read_iops gauge\n'))
+
+    def test_remove(self):
+        self.exporter.write('10.244.223.61_UnityLun', _table(), 0)
+        self.exporter.remove('10.244.223.61_UnityLun')
+        assert_that(self.text, equal_to('# EOF\n'))
+
+    def test_render_cached(self):
+        self.exporter.write('10.244.223.61_UnityLun', _table(), 0)
+        assert_that(self.exporter.render(),
+                    same_instance(self.exporter.render()))
+
+    def test_picklable(self):
+        exporter = pickle.loads(pickle.dumps(OpenMetricsExporter('unity')))
+        assert_that(exporter.prefix, equal_to('unity'))
+
+    def test_http_server(self):
+        self.exporter.write('10.244.223.61_UnityLun', _table(), 0)
+        server = self.exporter.start_http_server(0, '127.0.0.1')
+        url = 'http://127.0.0.1:{}/metrics'.format(server.port)
+        resp = urllib.request.urlopen(url)
+        try:
+            assert_that(resp.info()['Content-Type'], equal_to(CONTENT_TYPE))
+            assert_that(resp.read(), equal_to(self.exporter.render()))
+        finally:
+            resp.close()
+
+    def test_http_server_not_found(self):
+        server = self.exporter.start_http_server(0, '127.0.0.1')
+        url = 'http://127.0.0.1:{}/abc'.format(server.port)
+
+        def f():
+            urllib.request.urlopen(url)
+
+        assert_that(calling(f), raises(urllib.error.HTTPError, '404'))
+
+    def test_http_server_started(self):
+        self.exporter.start_http_server(0, '127.0.0.1')
+        assert_that(calling(self.exporter.start_http_server).with_args(0),
+                    raises(ValueError, 'already started'))
@@ -0,0 +1,253 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, tzinfo
+
+from hamcrest import assert_that, equal_to, only_contains, calling, raises, \
+    has_length
+
+from storops.lib.metric import MetricsTable
+from storops.lib.metric_store import BinaryMetricStore, \
+    BinaryMetricReader, to_epoch
+from storops_test.utils import is_nan
+
+__author__ = 'Cedric Zhuang'
+
+
+class _UTC(tzinfo):
+    def utcoffset(self, dt):
+        return timedelta(0)
+
+    def tzname(self, dt):
+        return 'UTC'
+
+    def dst(self, dt):
+        return timedelta(0)
+
+
+utc = _UTC()
+
+# partitions are aligned to the epoch
+T0 = datetime.fromtimestamp(1479718800)
+
+
+def _table(i, ids=None, names=None):
+    if ids is None:
+        ids = ['sv_1', 'sv_2']
+    if names is None:
+        names = ['read_iops', 'write_iops']
+    rows = [[i * 10 + r * 2 + c for c in range(len(names))]
+            for r in range(len(ids))]
+    return MetricsTable(ids, names, rows)
+
+
+class BinaryMetricStoreTest(unittest.TestCase):
+    name = '10.244.223.61_UnityLun'
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(suffix='storops')
+        self.store = BinaryMetricStore(self.folder, partition_seconds=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write(self, count, start=0, **kwargs):
+        for i in range(start, start + count):
+            self.store.write(self.name, _table(i, **kwargs),
+                             T0 + timedelta(minutes=i))
+
+    @property
+    def reader(self):
+        return BinaryMetricReader.from_store(self.store, self.name)
+
+    def get_partitions(self):
+        folder = self.store.get_folder(self.name)
+        return [os.path.join(folder, p) for p in sorted(os.listdir(folder))
+                if os.path.isdir(os.path.join(folder, p))]
+
+    def test_read_all(self):
+        self.write(3)
+        ret = self.reader.read()
+        assert_that(ret, has_length(3))
+        t, table = ret[1]
+        assert_that(t, equal_to(T0 + timedelta(minutes=1)))
+        assert_that(table.to_dict(),
+                    equal_to({'sv_1': {'read_iops': 10, 'write_iops': 11},
+                              'sv_2': {'read_iops': 12, 'write_iops': 13}}))
+
+    def test_read_time_range(self):
+        self.write(10)
+        ret = self.reader.read(T0 + timedelta(minutes=3),
+                               T0 + timedelta(minutes=5))
+        assert_that([t for t, _ in ret],
+                    equal_to([T0 + timedelta(minutes=i) for i in (3, 4, 5)]))
+
+    def test_read_ids_and_names(self):
+        self.write(2)
+        ret = self.reader.read(ids=['sv_2', 'sv_x'], names=['write_iops'])
+        assert_that([table.to_dict() for _, table in ret],
+                    equal_to([{'sv_2': {'write_iops': 3}},
+                              {'sv_2': {'write_iops': 13}}]))
+
+    def test_series(self):
+        self.write(3)
+        assert_that(self.reader.series('sv_1', 'read_iops'),
+                    equal_to([(T0 + timedelta(minutes=i), i * 10.0)
+                              for i in range(3)]))
+
+    def test_new_segment_when_ids_changed(self):
+        self.write(2)
+        self.write(2, start=2, ids=['sv_1', 'sv_3'])
+        partition = self.get_partitions()[0]
+        assert_that(sorted(os.listdir(partition)),
+                    equal_to(['0.0.bin', '0.1.bin', '0.json', '0.time.bin',
+                              '1.0.bin', '1.1.bin', '1.json',
+                              '1.time.bin']))
+        assert_that([v for _, v in self.reader.series('sv_1', 'read_iops')],
+                    equal_to([0.0, 10.0, 20.0, 30.0]))
+        assert_that([v for _, v in self.reader.series('sv_3', 'read_iops')],
+                    equal_to([22.0, 32.0]))
+
+    def test_continue_segment_of_other_store(self):
+        self.write(2)
+        self.store = BinaryMetricStore(self.folder, partition_seconds=3600)
+        self.write(1, start=2)
+        assert_that(self.reader.read(), has_length(3))
+
+    def test_columns(self):
+        self.write(3)
+        partition = self.get_partitions()[0]
+        with open(os.path.join(partition, '0.1.bin'), 'rb') as f:
+            data = f.read()
+        # the write_iops of sv_1 and sv_2 of each write
+        assert_that(data, equal_to(struct.pack(
+            str('<6d'), 1, 3, 11, 13, 21, 23)))
+
+    def test_series_read_metric_file_only(self):
+        self.write(3)
+        partition = self.get_partitions()[0]
+        os.remove(os.path.join(partition, '0.1.bin'))
+        assert_that([v for _, v in self.reader.series('sv_2', 'read_iops')],
+                    equal_to([2.0, 12.0, 22.0]))
+
+    def test_partitions(self):
+        self.write(3, start=59)
+        assert_that(self.get_partitions(), has_length(2))
+        ret = self.reader.read(T0 + timedelta(minutes=60))
+        assert_that(ret, has_length(2))
+
+    def test_retention(self):
+        self.store.retention = 2
+        for hour in range(4):
+            self.write(1, start=hour * 60)
+        ret = self.reader.read()
+        assert_that([t for t, _ in ret],
+                    equal_to([T0 + timedelta(hours=2),
+                              T0 + timedelta(hours=3)]))
+
+    def test_retention_error(self):
+        assert_that(calling(BinaryMetricStore).with_args(retention=0),
+                    raises(ValueError, 'at least 1'))
+
+    def test_invalid_values(self):
+        table = MetricsTable(['sv_1'], ['read_iops', 'write_iops'],
+                             [[None, 'abc']])
+        self.store.write(self.name, table, T0)
+        _, ret = self.reader.read()[0]
+        assert_that(ret.rows[0], only_contains(is_nan()))
+
+    def test_skip_partial_write(self):
+        self.write(2)
+        partition = self.get_partitions()[0]
+        with open(os.path.join(partition, '0.0.bin'), 'ab') as f:
+            f.write(b'\x00' * 16)
+        with open(os.path.join(partition, '0.time.bin'), 'ab') as f:
+            f.write(b'\x00' * 4)
+        assert_that(self.reader.read(), has_length(2))
+
+    def test_truncate_partial_write(self):
+        self.write(2)
+        partition = self.get_partitions()[0]
+        with open(os.path.join(partition, '0.0.bin'), 'ab') as f:
+            f.write(b'\x00' * 16)
+        self.store = BinaryMetricStore(self.folder, partition_seconds=3600)
+        self.write(1, start=2)
+        assert_that([v for _, v in self.reader.series('sv_2', 'read_iops')],
+                    equal_to([2.0, 12.0, 22.0]))
+
+    def test_partition_name_in_utc(self):
+        self.store.write(self.name, _table(0), 1479718800 + 5)
+        assert_that([os.path.basename(p) for p in self.get_partitions()],
+                    equal_to(['20161121090000']))
+
+    @unittest.skipIf(not hasattr(time, 'tzset'), 'time zone not changeable.')
+    def test_partitions_dst_end(self):
+        tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            # 1:00 am EDT and 1:00 am EST of 2016-11-06
+            for i, epoch in enumerate((1478408400, 1478412000)):
+                self.store.write(self.name, _table(i), epoch)
+            assert_that(self.get_partitions(), has_length(2))
+            ret = self.reader.read(start=1478412000)
+            assert_that([table.rows for _, table in ret],
+                        equal_to([_table(1).rows]))
+        finally:
+            if tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = tz
+            time.tzset()
+
+    def test_read_without_meta(self):
+        for hour in range(3):
+            self.write(2, start=hour * 60)
+        os.remove(os.path.join(self.store.get_folder(self.name),
+                               'store.json'))
+        reader = self.reader
+        assert_that(reader.partition_seconds, equal_to(None))
+        ret = reader.read(T0 + timedelta(minutes=61))
+        assert_that([t for t, _ in ret],
+                    equal_to([T0 + timedelta(minutes=m)
+                              for m in (61, 120, 121)]))
+        ret = reader.read(T0, T0 + timedelta(minutes=30))
+        assert_that(ret, has_length(2))
+
+    def test_read_not_found(self):
+        reader = BinaryMetricReader(self.folder, 'not_found')
+        assert_that(reader.read(), equal_to([]))
+
+    def test_picklable(self):
+        store = pickle.loads(pickle.dumps(self.store))
+        assert_that(store.folder, equal_to(self.folder))
+        assert_that(store.partition_seconds, equal_to(3600))
+
+    def test_to_epoch(self):
+        assert_that(to_epoch(12.5), equal_to(12.5))
+        assert_that(datetime.fromtimestamp(to_epoch(T0)), equal_to(T0))
+
+    def test_to_epoch_aware(self):
+        t = datetime(2016, 11, 21, 9, 0, 0, 500000, tzinfo=utc)
+        assert_that(to_epoch(t), equal_to(1479718800.5))
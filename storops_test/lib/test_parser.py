@@ -15,12 +15,19 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
 import six
-from hamcrest import assert_that, equal_to, none, only_contains
+from hamcrest import assert_that, equal_to, none, only_contains, \
+    same_instance, has_length, greater_than
+from mock import patch
 
-from storops.lib.parser import PropMapper, PropDescriptor, OutputParser
+from storops.lib.parser import PropMapper, PropDescriptor, OutputParser, \
+    ParserConfigFactory
+from storops.vnx.parsers import VNXParserConfigFactory
 
 __author__ = 'Cedric Zhuang'
 
@@ -105,3 +112,53 @@ class OutputParserTest(TestCase):
         parser = DemoParser()
         assert_that(parser.property_names,
                     only_contains('id', 'prop_a', 'prop_b', 'prop_c'))
+
+
+class ParserConfigFactoryTest(TestCase):
+    def test_configs_read_once(self):
+        factory = VNXParserConfigFactory()
+        with patch.object(factory, '_load_configs',
+                          wraps=factory._load_configs) as load:
+            factory.get('VNXLun')
+            factory.get('VNXPool')
+            factory.get('VNXLun')
+            assert_that(load.call_count, equal_to(1))
+
+    def test_parser_shared(self):
+        factory = VNXParserConfigFactory()
+        assert_that(factory.get('VNXLun'),
+                    same_instance(factory.get('VNXLun')))
+
+    def test_patterns_compiled(self):
+        parser = VNXParserConfigFactory().get('VNXLun')
+        for prop in parser.properties:
+            # the compiled pattern is cached on the property
+            assert_that(prop.pattern, same_instance(prop.pattern))
+
+    def test_build_all(self):
+        factory = VNXParserConfigFactory()
+        parsers = factory.build_all()
+        assert_that(parsers, has_length(len(factory._read_configs())))
+        assert_that(parsers['VNXLun'], same_instance(factory.get('VNXLun')))
+
+    def test_config_cache(self):
+        folder = tempfile.mkdtemp()
+        try:
+            ParserConfigFactory.enable_config_cache(folder)
+            expected = VNXParserConfigFactory()._read_configs()
+            assert_that(os.listdir(folder), has_length(1))
+
+            with patch('yaml.load') as load:
+                configs = VNXParserConfigFactory()._read_configs()
+                assert_that(load.called, equal_to(False))
+            assert_that(configs, equal_to(expected))
+            assert_that(len(configs), greater_than(0))
+        finally:
+            ParserConfigFactory.disable_config_cache()
+            shutil.rmtree(folder)
+
+    def test_config_cache_disabled(self):
+        factory = VNXParserConfigFactory()
+        assert_that(factory.cache_folder, none())
+        filename = os.path.join(factory.get_folder(), factory.config_filename)
+        assert_that(factory._get_cache_filename(filename), none())
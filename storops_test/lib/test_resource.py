@@ -16,9 +16,10 @@
 from __future__ import unicode_literals
 
 import unittest
+from multiprocessing.pool import ThreadPool
 
 from hamcrest import assert_that, instance_of, has_items, equal_to, raises, \
-    is_not
+    is_not, greater_than
 
 from storops.lib.common import instance_cache
 from storops.lib.resource import ResourceListCollection
@@ -65,6 +66,18 @@ class ResourceListCollectionTest(unittest.TestCase):
         rlc.update()
         assert_that(t0, is_not(equal_to(rlc.timestamp)))
 
+    @patch_rest
+    def test_update_with_executor(self):
+        rlc = ResourceListCollection(
+            (t_unity().get_sp(), t_unity().get_lun()))
+        pool = ThreadPool(2)
+        try:
+            rlc.update(executor=pool)
+        finally:
+            pool.terminate()
+        for rsc_list in rlc.get_rsc_list_collection():
+            assert_that(len(rsc_list), greater_than(0))
+
 
 class ResourceListTest(unittest.TestCase):
     @patch_rest
@@ -0,0 +1,307 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from hamcrest import assert_that, equal_to, greater_than, less_than, \
+    calling, raises, same_instance, less_than_or_equal_to, none, not_none
+
+from storops.lib.metric import PerfManager
+from storops.lib.scheduler import CollectionScheduler, CollectionJob
+
+__author__ = 'Cedric Zhuang'
+
+
+class FakeClock(object):
+    """ clock moved by the tests.
+
+    The scheduler sleeping on it waits till `wake` moves the time to the
+    end of the sleep.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.wake_at = None
+        self.is_closed = False
+        self._cond = threading.Condition()
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        with self._cond:
+            self.now += seconds
+
+    def sleep(self, seconds):
+        with self._cond:
+            self.wake_at = self.now + seconds
+            self._cond.notify_all()
+            while self.wake_at is not None and not self.is_closed:
+                self._cond.wait(1)
+
+    def wake(self):
+        """ moves the time to the end of the sleep of the scheduler.
+
+        :return: the new time.
+        """
+        end = time.time() + 5
+        with self._cond:
+            while self.wake_at is None:
+                assert_that(time.time(), less_than(end))
+                self._cond.wait(0.1)
+            self.now = self.wake_at
+            self.wake_at = None
+            self._cond.notify_all()
+            return self.now
+
+    def close(self):
+        with self._cond:
+            self.is_closed = True
+            self._cond.notify_all()
+
+
+def wait_for(predicate, timeout=5):
+    """ waits for the worker threads of the scheduler. """
+    end = time.time() + timeout
+    while not predicate():
+        assert_that(time.time(), less_than(end))
+        time.sleep(0.001)
+
+
+class Counter(object):
+    def __init__(self, clock=time.time, duration=0, event=None):
+        self.clock = clock
+        self.duration = duration
+        self.event = event
+        self.times = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.times.append(self.clock())
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        if self.event is not None:
+            self.event.wait(5)
+        with self._lock:
+            self.running -= 1
+
+
+class CollectionJobTest(unittest.TestCase):
+    def test_get_next_run(self):
+        job = CollectionJob(None, 'a', 60, None, 5)
+        assert_that(job.get_next_run(1000), equal_to(1025))
+        assert_that(job.get_next_run(1025), equal_to(1085))
+        assert_that(job.get_next_run(1024.9), equal_to(1025))
+
+    def test_run_error(self):
+        def f():
+            raise ValueError('error')
+
+        job = CollectionJob(None, 'a', 60, f, 0)
+        job.run()
+        assert_that(job.errors, equal_to(1))
+        assert_that(job.runs, equal_to(1))
+        assert_that(job.stats['last_latency'], not_none())
+
+
+class CollectionSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = CollectionScheduler(max_workers=2, jitter=0,
+                                             clock=self.clock.time,
+                                             sleep=self.clock.sleep)
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+        self.clock.close()
+
+    def run_job(self, job, count):
+        """ wakes the scheduler till the job runs `count` times. """
+        ret = []
+        for i in range(count):
+            ret.append(self.clock.wake())
+            wait_for(lambda: job.runs == i + 1)
+        return ret
+
+    def test_run_aligned(self):
+        counter = Counter(self.clock.time)
+        job = self.scheduler.add(60, counter, name='a')
+        # scheduled at the boundaries of the interval
+        assert_that(job.next_run, equal_to(1020))
+        fired = self.run_job(job, 3)
+        assert_that(fired, equal_to([1020, 1080, 1140]))
+        assert_that(counter.times, equal_to([1020, 1080, 1140]))
+        assert_that(job.next_run, equal_to(1200))
+
+    def test_run_with_offset(self):
+        scheduler = CollectionScheduler(jitter=0, clock=self.clock.time,
+                                        sleep=self.clock.sleep)
+        scheduler._get_offset = lambda interval: 5
+        try:
+            job = scheduler.add(60, Counter(self.clock.time))
+            assert_that(self.run_job(job, 2), equal_to([1025, 1085]))
+        finally:
+            scheduler.shutdown()
+
+    def test_no_drift(self):
+        counter = Counter(self.clock.time)
+        job = self.scheduler.add(60, counter)
+        for i in range(3):
+            self.clock.wake()
+            wait_for(lambda: job.runs == i + 1)
+            wait_for(lambda: self.clock.wake_at is not None)
+            # the collection takes half of the interval
+            self.clock.advance(30)
+        # a late run does not delay the ones after it
+        assert_that(counter.times, equal_to([1020, 1080, 1140]))
+        assert_that(job.next_run, equal_to(1200))
+
+    def test_skip_overrun(self):
+        event = threading.Event()
+        counter = Counter(self.clock.time, event=event)
+        job = self.scheduler.add(60, counter)
+        self.clock.wake()
+        wait_for(lambda: counter.running == 1)
+        self.clock.wake()
+        self.clock.wake()
+        # waits for the scheduler to sleep after the skipped runs
+        self.clock.wake()
+        wait_for(lambda: self.clock.wake_at is not None)
+        event.set()
+        wait_for(lambda: job.runs == 1)
+        assert_that(counter.times, equal_to([1020]))
+        assert_that(counter.max_running, equal_to(1))
+        assert_that(job.overruns, equal_to(3))
+        assert_that(job.stats['overruns'], equal_to(3))
+
+    def test_bounded_workers(self):
+        event = threading.Event()
+        counter = Counter(self.clock.time, event=event)
+        jobs = [self.scheduler.add(60, counter, name=str(i))
+                for i in range(5)]
+        self.clock.wake()
+        wait_for(lambda: counter.running == 2)
+        wait_for(lambda: self.clock.wake_at is not None)
+        assert_that(counter.max_running, equal_to(2))
+        event.set()
+        wait_for(lambda: all(job.runs == 1 for job in jobs))
+        assert_that(counter.max_running, equal_to(2))
+        assert_that(counter.times, equal_to([1020] * 5))
+        assert_that(len(self.scheduler.stats()), equal_to(5))
+
+    def test_jitter(self):
+        scheduler = CollectionScheduler(jitter=3)
+        offsets = [scheduler._get_offset(60) for _ in range(20)]
+        assert_that(max(offsets), less_than_or_equal_to(3))
+        assert_that(len(set(offsets)), greater_than(1))
+
+    def test_default_jitter(self):
+        scheduler = CollectionScheduler()
+        assert_that(scheduler._get_offset(60), less_than_or_equal_to(6))
+        assert_that(scheduler._get_offset(3600), less_than_or_equal_to(10))
+
+    def test_stop(self):
+        counter = Counter(self.clock.time)
+        job = self.scheduler.add(60, counter)
+        self.run_job(job, 2)
+        job.stop()
+        assert_that(self.scheduler.jobs, equal_to([]))
+        self.clock.wake()
+        # stopped job is removed from the heap when it is due
+        wait_for(lambda: not self.scheduler._heap)
+        assert_that(counter.times, equal_to([1020, 1080]))
+        assert_that(job.runs, equal_to(2))
+
+    def test_latency(self):
+        def collect():
+            self.clock.advance(20)
+
+        job = self.scheduler.add(60, collect, name='10.244.211.30')
+        self.run_job(job, 1)
+        stats = job.stats
+        assert_that(stats['name'], equal_to('10.244.211.30'))
+        assert_that(stats['last_run'], equal_to(1020))
+        assert_that(stats['last_latency'], equal_to(20))
+        assert_that(stats['runs'], equal_to(1))
+
+    def test_real_clock(self):
+        scheduler = CollectionScheduler(jitter=0)
+        try:
+            event = threading.Event()
+            scheduler.add(0.05, event.set)
+            assert_that(event.wait(5), equal_to(True))
+        finally:
+            scheduler.shutdown()
+
+    def test_shutdown_when_dispatching(self):
+        dispatch = self.scheduler._dispatch
+        errors = []
+        dispatched = threading.Event()
+
+        def _dispatch(job):
+            t = threading.Thread(target=self.scheduler.shutdown)
+            t.start()
+            t.join()
+            try:
+                dispatch(job)
+            except Exception as e:
+                errors.append(e)
+                raise
+            finally:
+                dispatched.set()
+
+        self.scheduler._dispatch = _dispatch
+        counter = Counter(self.clock.time)
+        job = self.scheduler.add(60, counter)
+        thread = self.scheduler._thread
+        self.clock.wake()
+        assert_that(dispatched.wait(5), equal_to(True))
+        thread.join(5)
+        assert_that(thread.is_alive(), equal_to(False))
+        assert_that(errors, equal_to([]))
+        assert_that(job.is_running, equal_to(False))
+        assert_that(counter.times, equal_to([]))
+
+    def test_invalid_interval(self):
+        assert_that(calling(self.scheduler.add).with_args(0, Counter()),
+                    raises(ValueError, 'positive'))
+
+    def test_add_after_shutdown(self):
+        self.scheduler.shutdown()
+        assert_that(calling(self.scheduler.add).with_args(1, Counter()),
+                    raises(RuntimeError, 'shut down'))
+
+    def test_get_default(self):
+        assert_that(CollectionScheduler.get_default(),
+                    same_instance(CollectionScheduler.get_default()))
+
+    def test_perf_manager(self):
+        counter = Counter(self.clock.time)
+        cli = PerfManager()
+        assert_that(cli.metric_collection_stats, none())
+        cli.enable_perf_metric(60, counter, scheduler=self.scheduler)
+        self.run_job(cli.metric_collector, 1)
+        assert_that(cli.metric_collection_stats['runs'], equal_to(1))
+        assert_that(counter.times, equal_to([1020]))
+        cli.disable_perf_metric()
+        assert_that(cli.metric_collection_stats, none())
+        assert_that(self.scheduler.jobs, equal_to([]))
@@ -0,0 +1,373 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" offline benchmark of the metric pipeline.
+
+Samples of Unity luns and VNX luns are synthesized, and the time of each
+stage is measured without any array:
+
+* `get_metric_value`: each metric by `calculators.get_metric_value`.
+* `metrics_table`: all the metrics of the list at once.
+* `get_metrics_csv`: csv of the list.
+* `persist_csv`: `persist_metric_data` to a new csv file.
+* `persist_store`: `persist_metric_data` to a `BinaryMetricStore`.
+
+The results are appended to a json lines file, and compared with the
+latest results of the same host and python version:
+
+    python -m storops_test.metric_benchmark --sizes 1000 10000 50000
+"""
+from __future__ import unicode_literals, print_function, division
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from storops.lib.common import get_local_folder
+from storops.lib.metric import PerfManager
+from storops.lib.metric_store import BinaryMetricStore
+from storops.lib.resource import ResourceListCollection
+from storops.unity.calculator import calculators as unity_calculators
+from storops.unity.client import RestResponse
+from storops.unity.resource.lun import UnityLun, UnityLunList
+from storops.unity.resource.metric import UnityMetricQueryResultList
+from storops.vnx.block_cli import CliClient
+from storops.vnx.calculator import calculators as vnx_calculators
+from storops.vnx.resource.lun import VNXLun, VNXLunList
+
+__author__ = 'Cedric Zhuang'
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+
+STAGES = ('get_metric_value', 'metrics_table', 'get_metrics_csv',
+          'persist_csv', 'persist_store')
+
+_T0 = datetime(2016, 11, 21, 9, 0, 0)
+_INTERVAL = 60
+
+_VNX_COUNTERS = ('Read Requests', 'Write Requests', 'Blocks Read',
+                 'Blocks Written', 'Busy Ticks', 'Idle Ticks',
+                 'Sum of Outstanding Requests',
+                 'Non-Zero Request Count Arrivals', 'Implicit Trespasses',
+                 'Explicit Trespasses')
+
+
+def get_default_output():
+    return os.path.join(get_local_folder(), 'benchmark',
+                        'metric_benchmark.jsonl')
+
+
+class _UnityPerfCli(PerfManager):
+    ip = '10.244.223.61'
+
+
+def _counter(rand, i):
+    """ counter value of the i-th sample.
+
+    The same random generator gives the same base and rate of each
+    counter in all the samples.
+    """
+    base = rand.randint(0, 1 << 30)
+    rate = rand.randint(0, 10000)
+    return base + i * rate * _INTERVAL
+
+
+def unity_sample(count, i, seed=0):
+    """ synthesized `UnityMetricQueryResultList` of the lun paths.
+
+    :param count: number of the luns.
+    :param i: index of the sample.
+    """
+    rand = random.Random(seed)
+    timestamp = _T0 + timedelta(seconds=_INTERVAL * i)
+    entries = []
+    for path in sorted(set(unity_calculators.get_all_paths([UnityLun]))):
+        if path.count('*') > 1:
+            values = {}
+            for sp in ('spa', 'spb'):
+                values[sp] = {
+                    'sv_{}'.format(n): str(_counter(rand, i))
+                    for n in range(count)}
+        else:
+            # system level counters, like the block size
+            values = {'spa': '512', 'spb': '512'}
+        entries.append({'content': {
+            'queryId': 1,
+            'path': path,
+            'timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+            'values': values}})
+    ret = UnityMetricQueryResultList()
+    ret.update(RestResponse({'entries': entries}))
+    return ret
+
+
+def unity_lun_list(count, cli=None):
+    if cli is None:
+        cli = _UnityPerfCli()
+        for i in range(2):
+            cli.metric_counter_records.add_results(
+                unity_sample(count, i), _T0 + timedelta(minutes=i))
+    entries = [{'content': {'id': 'sv_{}'.format(n),
+                            'name': 'lun_{}'.format(n)}}
+               for n in range(count)]
+    return UnityLunList(cli=cli).update(RestResponse({'entries': entries}))
+
+
+def vnx_lun_output(count, i, seed=0):
+    """ synthesized output of `naviseccli lun -list -all`. """
+    rand = random.Random(seed)
+    timestamp = _T0 + timedelta(seconds=_INTERVAL * i)
+    blocks = []
+    for n in range(count):
+        lines = ['LOGICAL UNIT NUMBER {}'.format(n),
+                 'Name:  LUN {}'.format(n),
+                 'Current Owner:  SP {}'.format('AB'[n % 2]),
+                 'User Capacity (GBs):  10.000',
+                 'Pool Name:  Pool_{}'.format(n % 8),
+                 'Current State:  Ready',
+                 'Statistics Logging Current Time:  {}'.format(
+                     timestamp.strftime('%m/%d/%y %H:%M:%S'))]
+        for name in _VNX_COUNTERS:
+            sp_a = _counter(rand, i)
+            sp_b = _counter(rand, i)
+            lines.append('{}:  {}'.format(name, sp_a + sp_b))
+            lines.append('{} SP A:  {}'.format(name, sp_a))
+            lines.append('{} SP B:  {}'.format(name, sp_b))
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks) + '\n'
+
+
+def vnx_lun_list(count):
+    cli = CliClient('10.244.212.182', heartbeat_interval=0)
+    ret = None
+    for i in range(2):
+        ret = VNXLunList(cli=cli).update(vnx_lun_output(count, i))
+        record = ResourceListCollection([ret])
+        record.timestamp = _T0 + timedelta(seconds=_INTERVAL * i)
+        cli.add_metric_record(record)
+    return ret
+
+
+def _clear_memo(rsc_list):
+    rsc_list._cli.metric_counter_records.memo.clear()
+
+
+def _unity_get_metric_value(rsc_list):
+    cli = rsc_list._cli
+    for name in rsc_list.metric_names():
+        unity_calculators.get_metric_value(UnityLun, name, cli)
+
+
+def _vnx_get_metric_value(rsc_list):
+    cli = rsc_list._cli
+    for name in rsc_list.metric_names():
+        for lun in rsc_list:
+            vnx_calculators.get_metric_value(VNXLun, name, cli, lun)
+
+
+def _get_stage_functions(get_metric_value, folder):
+    counter = [0]
+
+    def persist_csv(rsc_list):
+        counter[0] += 1
+        filename = os.path.join(folder, '{}.csv'.format(counter[0]))
+        rsc_list.persist_metric_data(filename=filename)
+
+    def persist_store(rsc_list):
+        counter[0] += 1
+        store = BinaryMetricStore(
+            os.path.join(folder, 'store_{}'.format(counter[0])))
+        rsc_list.persist_metric_data(store=store)
+
+    return {'get_metric_value': get_metric_value,
+            'metrics_table': lambda rsc_list: rsc_list.metrics_table(),
+            'get_metrics_csv': lambda rsc_list: rsc_list.get_metrics_csv(),
+            'persist_csv': persist_csv,
+            'persist_store': persist_store}
+
+
+PLATFORMS = {
+    'unity': (unity_lun_list, _unity_get_metric_value),
+    'vnx': (vnx_lun_list, _vnx_get_metric_value),
+}
+
+
+def _time(func, rsc_list, repeat):
+    ret = None
+    for _ in range(repeat):
+        # values calculated by the previous run are not reused
+        _clear_memo(rsc_list)
+        start = time.time()
+        func(rsc_list)
+        elapsed = time.time() - start
+        if ret is None or elapsed < ret:
+            ret = elapsed
+    return ret
+
+
+def get_environment():
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {'host': socket.gethostname(),
+            'machine': platform.machine(),
+            'cpu_count': _cpu_count(),
+            'python': platform.python_version(),
+            'numpy': numpy_version}
+
+
+def _cpu_count():
+    try:
+        import multiprocessing
+        ret = multiprocessing.cpu_count()
+    except NotImplementedError:
+        ret = None
+    return ret
+
+
+def run(sizes=None, platforms=None, stages=None, repeat=3):
+    """ runs the benchmark.
+
+    :param sizes: numbers of the objects.
+    :param platforms: `unity` and/or `vnx`.
+    :param stages: stages to measure, all if not set.
+    :param repeat: the best of the repeats is recorded.
+    :return: list of the results, one for each platform, size and stage.
+    """
+    if sizes is None:
+        sizes = DEFAULT_SIZES
+    if platforms is None:
+        platforms = sorted(PLATFORMS)
+    if stages is None:
+        stages = STAGES
+    env = get_environment()
+    timestamp = datetime.now().isoformat()
+    folder = tempfile.mkdtemp(suffix='storops_benchmark')
+    ret = []
+    try:
+        for name in platforms:
+            get_list, get_metric_value = PLATFORMS[name]
+            functions = _get_stage_functions(get_metric_value, folder)
+            for size in sizes:
+                start = time.time()
+                rsc_list = get_list(size)
+                log.info('synthesized {} {} luns in {:.3f}s.'.format(
+                    size, name, time.time() - start))
+                for stage in stages:
+                    seconds = _time(functions[stage], rsc_list, repeat)
+                    result = dict(env, timestamp=timestamp, platform=name,
+                                  objects=size, stage=stage,
+                                  seconds=seconds, repeat=repeat)
+                    ret.append(result)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return ret
+
+
+def _key(result):
+    return (result['host'], result['python'], result['platform'],
+            result['objects'], result['stage'])
+
+
+def load(filename):
+    ret = []
+    if os.path.exists(filename):
+        with open(filename, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    ret.append(json.loads(line))
+    return ret
+
+
+def save(results, filename):
+    folder = os.path.dirname(filename)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+    with open(filename, 'a') as f:
+        for result in results:
+            f.write(json.dumps(result, sort_keys=True))
+            f.write('\n')
+
+
+def compare(results, history):
+    """ compares the results with the latest ones of the same key.
+
+    :return: list of `(result, previous seconds or None)`.
+    """
+    latest = {}
+    for result in history:
+        latest[_key(result)] = result['seconds']
+    return [(result, latest.get(_key(result))) for result in results]
+
+
+def report(comparison, stream=None):
+    if stream is None:
+        stream = sys.stdout
+    print('{:<8}{:>9}  {:<18}{:>12}{:>12}{:>9}'.format(
+        'platform', 'objects', 'stage', 'seconds', 'previous', 'ratio'),
+        file=stream)
+    for result, prev in comparison:
+        if prev:
+            prev_text = '{:.4f}'.format(prev)
+            ratio_text = '{:.2f}'.format(result['seconds'] / prev)
+        else:
+            prev_text = ratio_text = '-'
+        print('{:<8}{:>9}  {:<18}{:>12.4f}{:>12}{:>9}'.format(
+            result['platform'], result['objects'], result['stage'],
+            result['seconds'], prev_text, ratio_text), file=stream)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='benchmark of the storops metric pipeline.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES),
+                        help='numbers of the objects.')
+    parser.add_argument('--platforms', nargs='+', choices=sorted(PLATFORMS),
+                        help='platforms to benchmark, all by default.')
+    parser.add_argument('--stages', nargs='+', choices=STAGES,
+                        help='stages to benchmark, all by default.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the best of the repeats is recorded.')
+    parser.add_argument('--output', default=None,
+                        help='json lines file of the results.  default is '
+                             '{}.'.format(get_default_output()))
+    args = parser.parse_args(args)
+
+    output = args.output
+    if output is None:
+        output = get_default_output()
+    results = run(args.sizes, args.platforms, args.stages, args.repeat)
+    report(compare(results, load(output)))
+    save(results, output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
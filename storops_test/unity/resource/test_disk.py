@@ -23,6 +23,7 @@ from hamcrest import assert_that, equal_to, has_items, close_to, \
 from storops import DiskTechnologyEnum, TierTypeEnum, HotSparePolicyStatusEnum
 from storops.unity.resource.disk import UnityDiskList, UnityDisk, \
     UnityDiskGroup, UnityDiskGroupList
+from storops.unity.parser import NestedProperties
 from storops_test.unity.rest_mock import t_rest, patch_rest, t_unity
 
 __author__ = 'Cedric Zhuang'
@@ -36,6 +37,18 @@ class UnityDiskTest(TestCase):
         self.verify_dae_0_1_disk_0(
             *filter(lambda d: d.id == 'dae_0_1_disk_0', disks))
 
+    @patch_rest
+    def test_iter_pages_nested_properties(self):
+        disks = UnityDiskList(cli=t_rest())
+        pages = list(disks.iter_pages())
+        assert_that(pages, has_length(1))
+        assert_that(pages[0], has_length(40))
+        disk = next(d for d in pages[0] if d.id == 'dpe_disk_12')
+        # the nested properties are preloaded like the ones of the list
+        assert_that(disk._preloaded_properties, instance_of(NestedProperties))
+        assert_that(disk._preloaded_properties.query_fields,
+                    equal_to(('pool.name',)))
+
     @patch_rest
     def test_properties(self):
         disk = UnityDisk(_id='dae_0_1_disk_0', cli=t_rest())
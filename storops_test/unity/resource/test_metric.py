@@ -15,15 +15,23 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
+from datetime import datetime
 from unittest import TestCase
 
-from hamcrest import assert_that, equal_to, has_items, raises, instance_of
+from dateutil import tz
+from hamcrest import assert_that, equal_to, has_items, raises, instance_of, \
+    is_not, same_instance, calling
 
 from storops import MetricTypeEnum
 from storops.exception import UnityMetricQueryNotFoundError
 from storops.unity.calculator import IdValues
 from storops.unity.resource.metric import UnityMetric, UnityMetricList, \
-    UnityMetricRealTimeQuery, UnityMetricRealTimeQueryList
+    UnityMetricRealTimeQuery, UnityMetricRealTimeQueryList, \
+    UnityMetricQueryRegistry, UnityMetricQueryResult, \
+    UnityMetricQueryResultList, to_filter_timestamp
 from storops_test.unity.rest_mock import t_rest, patch_rest
 
 __author__ = 'Cedric Zhuang'
@@ -78,6 +86,27 @@ class UnityMetricTest(TestCase):
         self.verify_metric_14732(*filter(lambda m: m.id == 14732, metrics))
         self.verify_metric_10234(*filter(lambda m: m.id == 10234, metrics))
 
+    @patch_rest
+    def test_iter_pages(self):
+        metrics = UnityMetricList(cli=t_rest())
+        pages = list(metrics.iter_pages())
+        assert_that(len(pages), equal_to(2))
+        assert_that(len(pages[0]), equal_to(2000))
+        assert_that(len(pages[1]), equal_to(411))
+        assert_that(pages[0][0], instance_of(UnityMetric))
+        assert_that(pages[0][0]._cli, equal_to(t_rest()))
+        self.verify_metric_14732(*filter(lambda m: m.id == 14732, pages[1]))
+
+    @patch_rest
+    def test_stream(self):
+        metrics = UnityMetricList(cli=t_rest())
+        stream = metrics.stream()
+        self.verify_metric_10234(
+            next(m for m in stream if m.id == 10234))
+        assert_that(len(list(metrics.stream())), equal_to(2411))
+        # the list itself is not loaded by the stream
+        assert_that(metrics._list, equal_to(None))
+
 
 class UnityMetricRealTimeQueryTest(TestCase):
     @patch_rest
@@ -174,6 +203,93 @@ class UnityMetricRealTimeQueryTest(TestCase):
                  'not.found']
         assert_that(len(queries.get_query_result(paths)), equal_to(3))
 
+    @patch_rest
+    def test_get_query_result_incremental(self):
+        queries = UnityMetricRealTimeQueryList(cli=t_rest(), interval=300)
+        r1 = queries.get_query_result(incremental=True)
+        assert_that(len(r1), equal_to(90))
+        reads = r1.by_path('sp.*.physical.disk.*.reads')
+        assert_that(reads.timestamp.minute, equal_to(55))
+
+        # only the results later than the last ones are fetched
+        r2 = queries.get_query_result(incremental=True)
+        assert_that(r2, is_not(same_instance(r1)))
+        assert_that(len(r2), equal_to(90))
+        reads = r2.by_path('sp.*.physical.disk.*.reads')
+        assert_that(reads.timestamp.minute, equal_to(0))
+        assert_that(reads.values['spa']['dpe_disk_1'], equal_to('1061941'))
+        writes = r2.by_path('sp.*.physical.disk.*.writes')
+        assert_that(writes, same_instance(
+            r1.by_path('sp.*.physical.disk.*.writes')))
+
+    @patch_rest
+    def test_get_query_result_incremental_filter_by_path(self):
+        queries = UnityMetricRealTimeQueryList(cli=t_rest(), interval=300)
+        paths = ['sp.*.physical.disk.*.reads', 'not.found']
+        queries.get_query_result(paths, incremental=True)
+        ret = queries.get_query_result(paths, incremental=True)
+        assert_that(ret.path, equal_to(['sp.*.physical.disk.*.reads']))
+
+
+class UnityMetricQueryRegistryTest(TestCase):
+    ip = '10.244.223.61'
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(suffix='storops')
+        self.registry = UnityMetricQueryRegistry(
+            os.path.join(self.folder, 'queries.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_get_ids_not_found(self):
+        assert_that(self.registry.get_ids(self.ip, 60), equal_to([]))
+
+    def test_set_ids(self):
+        self.registry.set_ids(self.ip, 60, [2, 3])
+        self.registry.set_ids(self.ip, 300, [17])
+        registry = UnityMetricQueryRegistry(self.registry.filename)
+        assert_that(registry.get_ids(self.ip, 60), equal_to([2, 3]))
+        assert_that(registry.get_ids(self.ip, 300), equal_to([17]))
+        assert_that(registry.get_ids('10.244.223.62', 60), equal_to([]))
+
+    def test_invalid_file(self):
+        with open(self.registry.filename, 'w') as f:
+            f.write('{invalid')
+        assert_that(self.registry.get_ids(self.ip, 60), equal_to([]))
+        self.registry.set_ids(self.ip, 60, [2])
+        assert_that(self.registry.get_ids(self.ip, 60), equal_to([2]))
+
+    @patch_rest
+    def test_get_query_list_save_ids(self):
+        paths = ['sp.*.storage.lun.*.reads']
+        queries = UnityMetricRealTimeQuery.get_query_list(
+            t_rest(), 300, paths, registry=self.registry)
+        assert_that(self.registry.get_ids(self.ip, 300),
+                    equal_to(queries._id_list))
+
+    @patch_rest
+    def test_get_query_list_prefer_registered(self):
+        paths = ['sp.*.storage.lun.*.reads']
+        queries = UnityMetricRealTimeQuery.get_query_list(t_rest(), 300,
+                                                          paths)
+        assert_that(queries._id_list, equal_to([3]))
+
+        self.registry.set_ids(self.ip, 300, [2])
+        queries = UnityMetricRealTimeQuery.get_query_list(
+            t_rest(), 300, paths, registry=self.registry)
+        assert_that(queries._id_list, equal_to([2]))
+
+    @patch_rest
+    def test_get_query_list_expired(self):
+        # query 4 is not found, create a new one for the paths
+        self.registry.set_ids(self.ip, 300, [4])
+        paths = ['sp.*.store.scsiBusDevice.*.calls']
+        queries = UnityMetricRealTimeQuery.get_query_list(
+            t_rest(), 300, paths, registry=self.registry)
+        assert_that(queries._id_list, equal_to([15]))
+        assert_that(self.registry.get_ids(self.ip, 300), equal_to([15]))
+
 
 class UnityMetricQueryResultTest(TestCase):
     def verify_disk_reads_value(self, result):
@@ -202,6 +318,12 @@ class UnityMetricQueryResultTest(TestCase):
         assert_that(len(results), equal_to(3))
         assert_that(results.path, has_items(*paths))
 
+    @patch_rest
+    def test_get_query_result_not_found(self):
+        results = UnityMetricQueryResultList(cli=t_rest(), query_id=404)
+        assert_that(calling(len).with_args(results),
+                    raises(UnityMetricQueryNotFoundError))
+
     @patch_rest
     def test_sum_sp(self):
         result = qr_6.by_path('sp.*.physical.disk.*.reads')
@@ -222,6 +344,25 @@ class UnityMetricQueryResultTest(TestCase):
         assert_that(len(r2), equal_to(3))
         r1.merge(r2)
         assert_that(len(r1), equal_to(6))
+        for path in r2.path:
+            assert_that(r1.by_path(path),
+                        instance_of(UnityMetricQueryResult))
+
+    @patch_rest
+    def test_from_results(self):
+        results = UnityMetricQueryResultList.from_results(t_rest(),
+                                                          list(qr_6) * 2)
+        assert_that(len(results), equal_to(2))
+        assert_that(results.by_path('sp.*.physical.disk.*.reads'),
+                    same_instance(qr_6.by_path('sp.*.physical.disk.*.reads')))
+
+    def test_to_filter_timestamp(self):
+        timestamp = datetime(2016, 11, 18, 14, 55, 0, 123456,
+                             tz.tzoffset(None, 8 * 3600))
+        assert_that(to_filter_timestamp(timestamp),
+                    equal_to('2016-11-18T06:55:00.123Z'))
+        assert_that(to_filter_timestamp(datetime(2016, 11, 18, 6, 55)),
+                    equal_to('2016-11-18T06:55:00.000Z'))
 
     @patch_rest
     def test_sp_values(self):
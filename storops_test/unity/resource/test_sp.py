@@ -20,8 +20,9 @@ from os import path
 from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, instance_of, only_contains, \
-    raises, contains_string, greater_than, is_not
+    raises, contains_string, greater_than, is_not, calling
 
+from storops.exception import UnityPerfMonNotEnabledError
 from storops.lib.common import get_file_size, get_local_folder
 from storops.unity.enums import NodeEnum
 from storops.unity.resource.health import UnityHealth
@@ -208,6 +209,31 @@ class UnityStorageProcessorTest(TestCase):
         assert_that(csv, contains_string('spa,SP A,89,87.0,89.0'))
         assert_that(csv, contains_string('spb,SP B,78,88.0,90.0'))
 
+    @patch_rest
+    def test_metrics_table(self):
+        sp_list = self.sp_list
+        table = sp_list.metrics_table()
+        assert_that(table.ids, equal_to(['spa', 'spb']))
+        assert_that(table.names, equal_to(sp_list.metric_names()))
+        for sp in sp_list:
+            for name in table.names:
+                assert_that(table.get(sp.get_id(), name),
+                            equal_to(getattr(sp, name)))
+
+    @patch_rest
+    def test_metrics_table_names(self):
+        table = self.sp_list.metrics_table(['utilization', 'net_in_mbps'])
+        assert_that(table.to_dict(),
+                    equal_to({'spa': {'utilization': 22, 'net_in_mbps': 1.1},
+                              'spb': {'utilization': 33,
+                                      'net_in_mbps': 1.2}}))
+
+    @patch_rest
+    def test_metrics_table_perf_not_enabled(self):
+        sp_list = UnitySystem('10.244.223.61').get_sp()
+        assert_that(calling(sp_list.metrics_table),
+                    raises(UnityPerfMonNotEnabledError))
+
     FILENAME = path.join(get_local_folder(),
                          'unittest_sp_metric_persist_csv_file.csv')
 
@@ -19,13 +19,16 @@ import datetime
 from unittest import TestCase
 
 import ddt
+import mock
 import time
 from hamcrest import assert_that, equal_to, instance_of, only_contains, \
-    raises, contains_string, is_in, has_items, none, calling
+    raises, contains_string, is_in, has_items, none, calling, \
+    greater_than
 
 from storops.exception import UnityResourceNotFoundError, \
     UnityHostNameInUseError, UnityActionNotAllowedError, \
-    UnityPolicyInvalidParametersError, UnitySnapScheduleNameInUseError
+    UnityPolicyInvalidParametersError, UnitySnapScheduleNameInUseError, \
+    UnityMetricQueryNotFoundError
 from storops.lib.resource import ResourceList
 from storops.unity.enums import EnclosureTypeEnum, DiskTypeEnum, HealthEnum, \
     HostTypeEnum, ServiceLevelEnum, ServiceLevelEnumList, \
@@ -53,7 +56,7 @@ from storops.unity.resource.job import UnityJobList
 from storops.unity.resource.lun import UnityLun
 from storops.unity.resource.lun import UnityLunList
 from storops.unity.resource.metric import UnityMetricQueryResultList, \
-    UnityMetricRealTimeQueryList
+    UnityMetricRealTimeQueryList, UnityMetricRealTimeQuery
 from storops.unity.resource.move_session import UnityMoveSessionList
 from storops.unity.resource.nas_server import UnityNasServer, \
     UnityNasServerList
@@ -658,6 +661,63 @@ class UnitySystemTest(TestCase):
         assert_that(unity._cli.curr_counter, none())
         assert_that(unity._cli.prev_counter, none())
 
+    @patch_rest
+    def test_enable_perf_stats_reuse_queries(self):
+        query_list = mock.MagicMock()
+        query_list.get_query_result.side_effect = [
+            'result_1', UnityMetricQueryNotFoundError(), 'result_2']
+        registry = mock.Mock()
+        unity = t_unity()
+        with mock.patch.object(UnityMetricRealTimeQuery, 'get_query_list',
+                               return_value=query_list) as get_query_list:
+            with mock.patch.object(unity._cli,
+                                   'enable_perf_metric') as enable:
+                unity.enable_perf_stats(60, registry=registry)
+            collect = enable.call_args[0][1]
+            assert_that(get_query_list.call_count, equal_to(1))
+            assert_that(get_query_list.call_args[1]['registry'],
+                        equal_to(registry))
+
+            # queries are not looked up for each collection
+            assert_that(collect(), equal_to('result_1'))
+            assert_that(get_query_list.call_count, equal_to(1))
+
+            # looked up again when expired
+            assert_that(collect(), equal_to('result_2'))
+            assert_that(get_query_list.call_count, equal_to(2))
+            assert_that(query_list.get_query_result.call_args[0][1],
+                        equal_to(False))
+
+    @patch_rest
+    def test_enable_perf_stats_query_expired(self):
+        unity = t_unity()
+        cli = unity._cli
+        expired = UnityMetricRealTimeQueryList(cli=cli)
+        expired._list = [UnityMetricRealTimeQuery(_id=404, cli=cli)]
+        queries = UnityMetricRealTimeQueryList(cli=cli, interval=300)
+        with mock.patch.object(UnityMetricRealTimeQuery, 'get_query_list',
+                               side_effect=[expired, queries]) as lookup:
+            with mock.patch.object(cli, 'enable_perf_metric') as enable:
+                unity.enable_perf_stats(300, registry=mock.Mock())
+            ret = enable.call_args[0][1]()
+        assert_that(lookup.call_count, equal_to(2))
+        assert_that(ret, instance_of(UnityMetricQueryResultList))
+        assert_that(len(ret), greater_than(0))
+
+    @patch_rest
+    def test_enable_perf_stats_incremental(self):
+        query_list = mock.MagicMock()
+        unity = t_unity()
+        with mock.patch.object(UnityMetricRealTimeQuery, 'get_query_list',
+                               return_value=query_list):
+            with mock.patch.object(unity._cli,
+                                   'enable_perf_metric') as enable:
+                unity.enable_perf_stats(60, registry=mock.Mock(),
+                                        incremental=True)
+            enable.call_args[0][1]()
+        assert_that(query_list.get_query_result.call_args[0][1],
+                    equal_to(True))
+
     @patch_rest
     def test_enable_persist_perf_stats(self):
         unity = UnitySystem('10.244.223.61')
@@ -0,0 +1,168 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import json
+import sys
+import unittest
+
+from hamcrest import assert_that, equal_to, instance_of, raises, calling
+
+from storops.connection.exceptions import HTTPClientError
+from storops.lib.common import try_import
+from storops.unity.resp import RestResponse
+from storops.unity.resource.lun import UnityLun
+from storops_test.unity.rest_mock import MockRestClient, t_rest, patch_rest
+from storops_test.utils import read_test_file
+
+aiohttp = try_import('aiohttp')
+
+HAS_ASYNC = sys.version_info >= (3, 5)
+
+if HAS_ASYNC:
+    import asyncio
+    from storops.connection.async_connector import AsyncResponse
+    from storops.unity.async_client import AsyncUnityClient
+
+__author__ = 'Cedric Zhuang'
+
+
+def _done(value):
+    ret = asyncio.get_event_loop().create_future()
+    if isinstance(value, Exception):
+        ret.set_exception(value)
+    else:
+        ret.set_result(value)
+    return ret
+
+
+class FakeAsyncRest(object):
+    """ serves the requests with the mock data of the sync client. """
+
+    def __init__(self, base_url, errors=None):
+        self.base_url = base_url
+        self.errors = errors or {}
+        self.calls = []
+        self.mock = MockRestClient()
+
+    def send(self, method, full_url, headers, data):
+        url = full_url[len(self.base_url):]
+        self.calls.append((method, url, dict(headers)))
+        status = self.errors.pop((method, url), 200)
+        if status != 200:
+            return _done(AsyncResponse(status, {}, b''))
+        body = json.loads(data) if data else None
+        if url.startswith('/api/types/user/instances'):
+            resp_body = {'entries': []}
+        elif url.startswith('/api/types/not_supported?'):
+            resp_body = json.loads(
+                read_test_file('unity/rest_data/error', '404.json'))
+        else:
+            resp_body = self.mock._get_mock_output(url, {'body': body})
+        content = json.dumps(resp_body).encode('utf-8') if resp_body else b''
+        return _done(AsyncResponse(status, {'emc-csrf-token': 'token_1'},
+                                   content))
+
+
+@unittest.skipIf(not HAS_ASYNC or aiohttp is None,
+                 'asyncio client requires python 3.5+ and aiohttp.')
+class AsyncUnityClientTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.client = AsyncUnityClient('10.244.223.61', 'admin',
+                                       'Password123!')
+        # noinspection PyProtectedMember
+        self.rest = FakeAsyncRest(self.client._rest.base_url)
+        self.client._rest._send = self.rest.send
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_session_keeps_cookie_of_ip_host(self):
+        from yarl import URL
+
+        async def _update_cookie():
+            # noinspection PyProtectedMember
+            session = self.client._rest._get_session()
+            session.cookie_jar.update_cookies(
+                {'mod_sec_emc': 'value'},
+                URL('https://10.244.223.61/api/types/user/instances'))
+            return len(session.cookie_jar)
+
+        assert_that(self.run_async(_update_cookie()), equal_to(1))
+
+    @property
+    def lun_nested_fields(self):
+        return UnityLun.build_nested_properties_obj().query_fields
+
+    @patch_rest
+    def test_get_all_same_as_sync_client(self):
+        nested_fields = self.lun_nested_fields
+        resp = self.run_async(self.client.get_all(
+            'lun', nested_fields=nested_fields))
+        expected = t_rest().get_all('lun', nested_fields=nested_fields)
+        assert_that(resp, instance_of(RestResponse))
+        assert_that(resp.contents, equal_to(expected.contents))
+
+    def test_get_all_pages(self):
+        resp = self.run_async(self.client.get_all(
+            'metric',
+            base_fields=('description', 'id', 'isHistoricalAvailable',
+                         'isRealtimeAvailable', 'name', 'objectType', 'path',
+                         'product', 'type', 'unitDisplayString')))
+        assert_that(len(resp.entries), equal_to(2411))
+
+    def test_get_by_id(self):
+        resp = self.run_async(self.client.get(
+            'lun', 'sv_2', nested_fields=self.lun_nested_fields))
+        assert_that(resp.first_content['id'], equal_to('sv_2'))
+
+    def test_get_fields_cached(self):
+        for _ in range(2):
+            self.run_async(self.client.get(
+                'lun', 'sv_2', nested_fields=self.lun_nested_fields))
+        type_queries = [c for c in self.rest.calls
+                        if c[1].startswith('/api/types/lun?')]
+        assert_that(len(type_queries), equal_to(1))
+
+    def test_get_not_supported(self):
+        resp = self.run_async(self.client.get('not_supported', 'abc'))
+        assert_that(resp.body, equal_to({}))
+
+    def test_delete_update_csrf_token(self):
+        url = '/api/instances/alert/alert_182?compact=True'
+        self.rest.errors[('DELETE', url)] = 401
+        resp = self.run_async(self.client.delete('alert', 'alert_182'))
+        assert_that(resp.is_ok(), equal_to(True))
+        methods = [c[0] for c in self.rest.calls]
+        assert_that(methods, equal_to(['DELETE', 'GET', 'DELETE']))
+        assert_that(self.rest.calls[-1][2]['emc-csrf-token'],
+                    equal_to('token_1'))
+
+    def test_delete_unauthorized(self):
+        self.client._rest.retries = 0
+        url = '/api/instances/alert/alert_182?compact=True'
+        self.rest.errors[('DELETE', url)] = 401
+
+        def f():
+            self.run_async(self.client.delete('alert', 'alert_182'))
+
+        assert_that(calling(f), raises(HTTPClientError))
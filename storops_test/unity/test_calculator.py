@@ -15,10 +15,17 @@
 #    under the License.
 from __future__ import unicode_literals, division
 
-from unittest import TestCase
+import math
+import timeit
+from datetime import datetime, timedelta
+from unittest import TestCase, skipIf
 
 from hamcrest import assert_that, has_items, equal_to, raises, has_item, \
-    close_to, is_not
+    close_to, is_not, instance_of, less_than
+from mock import patch
+
+from storops.lib.common import try_import
+from storops.lib.metric import MetricCounterRecords
 
 from storops.unity import calculator
 from storops.unity.calculator import calculators, IdValues, \
@@ -33,10 +40,12 @@ from storops.unity.calculator import calculators, IdValues, \
 from storops.unity.resource.disk import UnityDisk
 from storops.unity.resource.filesystem import UnityFileSystem
 from storops_test.unity.resource.test_metric import qr_6, qr_14, qr_17, \
-    qr_34, qr_128, qr_130
+    qr_34, qr_128, qr_130, get_query_result
 from storops_test.unity.rest_mock import patch_rest
 from storops_test.utils import is_nan
 
+np = try_import('numpy')
+
 __author__ = 'Cedric Zhuang'
 
 
@@ -46,6 +55,24 @@ class MockCli(object):
         self.curr_counter = curr
 
 
+class MockPerfCli(object):
+    def __init__(self, *samples):
+        self.metric_counter_records = MetricCounterRecords(
+            max(len(samples), 2))
+        start = datetime(2016, 11, 21, 9, 0, 0)
+        for i, sample in enumerate(samples):
+            self.metric_counter_records.add_results(
+                sample, start + timedelta(minutes=i))
+
+    @property
+    def prev_counter(self):
+        return self.metric_counter_records.prev
+
+    @property
+    def curr_counter(self):
+        return self.metric_counter_records.curr
+
+
 class CalculatorMetaInfoTest(TestCase):
     def test_get_metric_names(self):
         names = calculators.get_metric_names(UnityDisk)
@@ -90,6 +117,79 @@ class CalculatorMetaInfoTest(TestCase):
             UnityDisk, 'read_iops', disk_counters, 'dae_0_1_disk_2')
         assert_that(value, is_nan())
 
+    @patch_rest
+    def test_get_metric_value_memo(self):
+        cli = MockPerfCli(qr_6, qr_14)
+        disk_ids = ('dae_0_1_disk_2', 'dae_0_1_disk_1', 'dae_0_1_disk_2')
+        with patch.object(qr_14, 'by_path', wraps=qr_14.by_path) as by_path:
+            values = [calculators.get_metric_value(
+                UnityDisk, 'read_iops', cli, disk_id)
+                for disk_id in disk_ids]
+            # all disks are calculated by the first call
+            assert_that(by_path.call_count, equal_to(1))
+        expected = [calculators.get_metric_value(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_14), disk_id)
+            for disk_id in disk_ids]
+        assert_that(values, equal_to(expected))
+        assert_that(len(cli.metric_counter_records.memo), equal_to(1))
+
+    @patch_rest
+    def test_get_metric_value_memo_all(self):
+        cli = MockPerfCli(qr_6, qr_14)
+        values = calculators.get_metric_value(UnityDisk, 'read_iops', cli)
+        assert_that(values, instance_of(IdValues))
+        values.set('dae_0_1_disk_2', 0)
+        value = calculators.get_metric_value(
+            UnityDisk, 'read_iops', cli, 'dae_0_1_disk_2')
+        assert_that(value, is_not(equal_to(0)))
+
+    @patch_rest
+    def test_get_metric_value_memo_rotated(self):
+        cli = MockPerfCli(qr_6, qr_14)
+        calculators.get_metric_value(
+            UnityDisk, 'read_iops', cli, 'dae_0_1_disk_2')
+        cli.metric_counter_records.add_results(qr_17)
+        assert_that(len(cli.metric_counter_records.memo), equal_to(0))
+        value = calculators.get_metric_value(
+            UnityDisk, 'read_iops', cli, 'dae_0_1_disk_2')
+        expected = calculators.get_metric_value(
+            UnityDisk, 'read_iops', MockCli(qr_14, qr_17), 'dae_0_1_disk_2')
+        assert_that(value, equal_to(expected))
+
+    @patch_rest
+    def test_get_window_metric_value(self):
+        qr_19 = get_query_result(19)
+        cli = MockPerfCli(qr_6, qr_14, qr_19)
+        disk_id = 'dae_0_1_disk_2'
+        value = calculators.get_window_metric_value(
+            UnityDisk, 'read_iops', cli, '2m', disk_id)
+        expected = calculators.get_metric_value(
+            UnityDisk, 'read_iops', MockCli(qr_6, qr_19), disk_id)
+        assert_that(value, equal_to(expected))
+
+        value = calculators.get_window_metric_value(
+            UnityDisk, 'read_iops', cli, '1m', disk_id)
+        expected = calculators.get_metric_value(
+            UnityDisk, 'read_iops', MockCli(qr_14, qr_19), disk_id)
+        assert_that(value, equal_to(expected))
+
+    @patch_rest
+    def test_get_metric_aggregates(self):
+        qr_19 = get_query_result(19)
+        cli = MockPerfCli(qr_6, qr_14, qr_19)
+        disk_id = 'dae_0_1_disk_2'
+        r = calculators.get_metric_aggregates(
+            UnityDisk, 'read_iops', cli, disk_id, window='2m',
+            percentiles=[50])
+        values = [calculators.get_metric_value(
+            UnityDisk, 'read_iops', MockCli(prev, curr), disk_id)
+            for prev, curr in ((qr_6, qr_14), (qr_14, qr_19))]
+        assert_that(r['count'], equal_to(2))
+        assert_that(r['min'], equal_to(min(values)))
+        assert_that(r['max'], equal_to(max(values)))
+        assert_that(r['avg'], close_to(sum(values) / 2, 1e-9))
+        assert_that(r['p50'], close_to(sum(values) / 2, 1e-9))
+
 
 class IdValuesTest(TestCase):
     def setUp(self):
@@ -260,6 +360,121 @@ class IdValuesTest(TestCase):
         assert_that(r['b'], equal_to(51))
 
 
+def _to_dict_values(values):
+    return IdValues({k: values.get(k) for k in values.keys()})
+
+
+@skipIf(np is None, 'numpy is required by the columnar values.')
+class ColumnarIdValuesTest(TestCase):
+    def setUp(self):
+        self.o1 = IdValues.from_counters({'a': '2', 'b': '3', 'c': '0'})
+        self.o2 = IdValues.from_counters({'a': '7', 'b': '0', 'c': '0'},
+                                         self.o1._index)
+        self.o3 = IdValues.from_counters({'a': '-4', 'c': '5', 'd': '1'})
+
+    def assert_same(self, r, expected):
+        assert_that(sorted(r.keys()), equal_to(sorted(expected.keys())))
+        for k in expected.keys():
+            v = expected[k]
+            if isinstance(v, float) and math.isnan(v):
+                assert_that(r[k], is_nan())
+            else:
+                assert_that(r[k], equal_to(v))
+                assert_that(type(r[k]), equal_to(type(v)))
+
+    def check_op(self, op, *operands):
+        r = op(*operands)
+        operands = [_to_dict_values(o) if isinstance(o, IdValues) else o
+                    for o in operands]
+        expected = op(*operands)
+        self.assert_same(r, expected)
+        return r
+
+    def test_from_counters(self):
+        assert_that(self.o1.is_columnar, equal_to(True))
+        assert_that(len(self.o1), equal_to(3))
+        assert_that(self.o1['a'], equal_to(2))
+        assert_that(self.o1['a'], instance_of(int))
+        assert_that(self.o1['x'], is_nan())
+
+    def test_from_counters_large_value(self):
+        r = IdValues.from_counters({'a': str(2 ** 60 + 1)})
+        assert_that(r.is_columnar, equal_to(False))
+        assert_that(r['a'], equal_to(2 ** 60 + 1))
+
+    def test_add_same_ids(self):
+        r = self.check_op(lambda x, y: x + y, self.o1, self.o2)
+        assert_that(r.is_columnar, equal_to(True))
+
+    def test_add_different_ids(self):
+        r = self.check_op(lambda x, y: x + y, self.o1, self.o3)
+        assert_that(r.is_columnar, equal_to(False))
+
+    def test_sum(self):
+        r = self.check_op(lambda x, y: sum([x, y]), self.o1, self.o2)
+        assert_that(r.is_columnar, equal_to(True))
+
+    def test_sub(self):
+        self.check_op(lambda x, y: x - y, self.o1, self.o2)
+        self.check_op(lambda x: 9.5 - x, self.o1)
+        self.check_op(lambda x: None - x, self.o1)
+
+    def test_add_numeric(self):
+        self.check_op(lambda x: x + 5, self.o1)
+        self.check_op(lambda x: 5.1 + x, self.o1)
+        self.check_op(lambda x: x + None, self.o1)
+
+    def test_mul(self):
+        self.check_op(lambda x, y: x * y, self.o1, self.o2)
+        self.check_op(lambda x: x * 3, self.o1)
+        self.check_op(lambda x: 0.5 * x, self.o1)
+        self.check_op(lambda x: x * None, self.o1)
+
+    def test_mul_out_of_precision(self):
+        r = self.check_op(lambda x: x * 2 ** 52, self.o1)
+        assert_that(r.is_columnar, equal_to(False))
+        assert_that(r['b'], equal_to(3 * 2 ** 52))
+
+    def test_div(self):
+        r = self.check_op(lambda x, y: x / y, self.o1, self.o2)
+        assert_that(r.is_columnar, equal_to(True))
+        self.check_op(lambda x, y: y / x, self.o1, self.o2)
+        self.check_op(lambda x: x / 2, self.o1)
+        self.check_op(lambda x: x / 0, self.o1)
+        self.check_op(lambda x: 12 / x, self.o1)
+        self.check_op(lambda x: 0.0 / x, self.o1)
+        self.check_op(lambda x: None / x, self.o1)
+
+    def test_div_then_add(self):
+        self.check_op(lambda x, y: x / y + y * 2 - x, self.o1, self.o2)
+
+    def test_neg(self):
+        self.check_op(lambda x: -x, self.o1)
+
+    def test_copy_and_set(self):
+        r = self.o1.copy()
+        r.set('a', 5)
+        assert_that(r.is_columnar, equal_to(False))
+        assert_that(r['a'], equal_to(5))
+        assert_that(self.o1['a'], equal_to(2))
+        self.assert_same(r + self.o1, _to_dict_values(r) + self.o1)
+
+    def test_many_objects_time(self):
+        counters = {'sv_{}'.format(i): str(i) for i in range(10000)}
+        o1 = IdValues.from_counters(counters)
+        o2 = IdValues.from_counters(counters, o1._index)
+        d1, d2 = _to_dict_values(o1), _to_dict_values(o2)
+
+        def _calc(x, y):
+            (y - x) / (x + y) * 100.0
+
+        columnar = min(timeit.repeat(lambda: _calc(o1, o2),
+                                     number=5, repeat=3))
+        dict_values = min(timeit.repeat(lambda: _calc(d1, d2),
+                                        number=5, repeat=3))
+        assert_that(columnar, less_than(dict_values))
+
+
 class CalculatorTest(TestCase):
     @patch_rest
     def test_disk_read_iops(self):
@@ -18,13 +18,17 @@ from __future__ import unicode_literals
 
 import unittest
 
+import mock
+import six
 from hamcrest import assert_that, equal_to, only_contains, none, any_of, \
-    contains_string, raises
+    contains_string, raises, less_than, less_than_or_equal_to, instance_of
 
 from storops.unity.client import UnityClient, UnityDoc
 from storops.unity.enums import RaidTypeEnum, HealthEnum, RaidTypeEnumList, \
     ServiceLevelEnum, ServiceLevelEnumList
+from storops.unity.resource.job import UnityJobList
 from storops.unity.resource.lun import UnityLun, UnityLunList
+from storops.unity.resp import RestResponse
 from storops_test.unity.rest_mock import patch_rest, t_rest
 
 __author__ = 'Cedric Zhuang'
@@ -142,6 +146,10 @@ class UnityClientTest(unittest.TestCase):
         ret = UnityClient.dict_to_filter_string({'a': 1, 'b': 'c'})
         assert_that(ret, equal_to('a eq 1 and b eq "c"'))
 
+    def test_dict_to_filter_string_str(self):
+        ret = UnityClient.dict_to_filter_string('a eq 1 and b gt 2')
+        assert_that(ret, equal_to('a eq 1 and b gt 2'))
+
     def test_dict_to_filter_unity_resource(self):
         ret = UnityClient.dict_to_filter_string(
             {'c': 1, 'b': UnityLun(_id='lun_1')})
@@ -177,6 +185,110 @@ class UnityClientTest(unittest.TestCase):
     def test_system_version(self):
         assert_that(t_rest().system_version, equal_to('4.1.0'))
 
+    @staticmethod
+    def _page_resp(page, page_count, page_size=2, entry_count=None):
+        links = [{'rel': 'self', 'href': '&page={}'.format(page)}]
+        if page < page_count:
+            links.append({'rel': 'next', 'href': '&page={}'.format(page + 1)})
+        entries = [{'content': {'id': 'lun_{}_{}'.format(page, i)}}
+                   for i in range(page_size)]
+        body = {'links': links, 'entries': entries}
+        if entry_count is not None:
+            body['entryCount'] = entry_count
+        return RestResponse(body)
+
+    def _mock_paged_get(self, page_count, entry_count=None):
+        def _get(url, fields=None, **params):
+            page = params.get('page', 1)
+            return self._page_resp(page, page_count,
+                                   entry_count=entry_count)
+
+        return mock.MagicMock(side_effect=_get)
+
+    def test_get_all_serial_pages(self):
+        client = UnityClient('10.10.10.10', 'admin', 'password')
+        client.rest_get = self._mock_paged_get(3)
+        ret = client.get_all('lun', base_fields=('id',))
+        assert_that(len(ret.entries), equal_to(6))
+        assert_that(client.rest_get.call_count, equal_to(3))
+
+    def test_get_all_parallel_pages(self):
+        client = UnityClient('10.10.10.10', 'admin', 'password',
+                             page_workers=4)
+        client.rest_get = self._mock_paged_get(5, entry_count=10)
+        ret = client.get_all('lun', base_fields=('id',))
+        ids = [entry['content']['id'] for entry in ret.entries]
+        assert_that(ids, equal_to(['lun_{}_{}'.format(p, i)
+                                   for p in range(1, 6) for i in range(2)]))
+        assert_that(client.rest_get.call_count, equal_to(5))
+        first_call = client.rest_get.call_args_list[0]
+        assert_that(first_call[1]['with_entrycount'], equal_to(True))
+
+    def test_get_all_parallel_new_page_appears(self):
+        client = UnityClient('10.10.10.10', 'admin', 'password')
+        # entry count says 2 pages while there are 3 pages actually
+        client.rest_get = self._mock_paged_get(3, entry_count=4)
+        ret = client.get_all('lun', base_fields=('id',), page_workers=2)
+        assert_that(len(ret.entries), equal_to(6))
+        assert_that(ret.entries[-1]['content']['id'], equal_to('lun_3_1'))
+
+    def test_get_all_parallel_no_entry_count(self):
+        client = UnityClient('10.10.10.10', 'admin', 'password')
+        client.rest_get = self._mock_paged_get(3)
+        ret = client.get_all('lun', base_fields=('id',), page_workers=2)
+        assert_that(len(ret.entries), equal_to(6))
+        assert_that(client.rest_get.call_count, equal_to(3))
+
+    def test_get_all_parallel_single_page(self):
+        client = UnityClient('10.10.10.10', 'admin', 'password')
+        client.rest_get = self._mock_paged_get(1, entry_count=2)
+        ret = client.get_all('lun', base_fields=('id',), page_workers=2)
+        assert_that(len(ret.entries), equal_to(2))
+        assert_that(client.rest_get.call_count, equal_to(1))
+
+    def test_get_id_filters_one_chunk(self):
+        ret = UnityClient.get_id_filters(['a', 'b', 'a'])
+        assert_that(ret, equal_to(['id eq "a" or id eq "b"']))
+
+    def test_get_id_filters_chunked(self):
+        ids = ['sv_{}'.format(i) for i in range(100)]
+        ret = UnityClient.get_id_filters(ids, max_length=200)
+        assert_that(len(ret), equal_to(15))
+        for the_filter in ret:
+            assert_that(len(six.moves.urllib.parse.quote(the_filter)),
+                        less_than_or_equal_to(200))
+        parsed = [item for the_filter in ret
+                  for item in the_filter.split(' or ')]
+        assert_that(parsed, equal_to(['id eq "{}"'.format(i) for i in ids]))
+
+    def test_get_id_filters_empty(self):
+        assert_that(UnityClient.get_id_filters([]), equal_to([]))
+
+    def test_get_many(self):
+        def _get(url, fields=None, **params):
+            ids = [item.split('"')[1]
+                   for item in params['filter'].split(' or ')]
+            # sv_3 not exists
+            entries = [{'content': {'id': _id}} for _id in ids
+                       if _id != 'sv_3']
+            return RestResponse({'entries': entries})
+
+        client = UnityClient('10.10.10.10', 'admin', 'password')
+        client.rest_get = mock.MagicMock(side_effect=_get)
+        ids = ['sv_{}'.format(i) for i in range(500)]
+        with mock.patch('storops.unity.client.MAX_URL_LENGTH', 1024):
+            ret = client.get_many('lun', ids, base_fields=('id',))
+        assert_that(len(ret), equal_to(499))
+        assert_that(list(ret.keys())[:3], equal_to(['sv_0', 'sv_1', 'sv_2']))
+        assert_that(ret['sv_4'], equal_to({'id': 'sv_4'}))
+        assert_that(client.rest_get.call_count, less_than(20))
+
+    @patch_rest
+    def test_resource_list_get_by_id_list(self):
+        jobs = UnityJobList.get(t_rest(), _id=['N-3074', 'N-3075', 'N-3076'])
+        assert_that(jobs, instance_of(UnityJobList))
+        assert_that(len(jobs), equal_to(3))
+
 
 class UnityDocTest(unittest.TestCase):
     @patch_rest
@@ -47,6 +47,22 @@ class RestResponseTest(TestCase):
         resp = RestResponse(read_json('metric', 'metrics_page_1.json'))
         assert_that(resp.current_page, equal_to(1))
 
+    def test_entry_count_not_available(self):
+        resp = RestResponse(read_json('metric', 'metrics_page_1.json'))
+        assert_that(resp.entry_count, none())
+        assert_that(resp.page_count, none())
+
+    def test_page_count(self):
+        body = read_json('metric', 'metrics_page_1.json')
+        body['entryCount'] = 4001
+        resp = RestResponse(body)
+        assert_that(resp.entry_count, equal_to(4001))
+        assert_that(resp.page_count, equal_to(3))
+
+    def test_page_count_empty(self):
+        resp = RestResponse({'entryCount': 0, 'entries': []})
+        assert_that(resp.page_count, equal_to(1))
+
 
 class UnityErrorTest(TestCase):
     def test_get_properties(self):
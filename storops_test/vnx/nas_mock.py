@@ -70,7 +70,27 @@ class MockXmlPost(ConnectorMock):
         return os.path.join(*ret)
 
     def mock_post(self, body):
-        return self.get_mock_output(body)
+        packet = ET.fromstring(body.encode('utf-8'))
+        if len(packet) > 1:
+            ret = self.get_batch_output(packet)
+        else:
+            ret = self.get_mock_output(body)
+        return ret
+
+    def get_batch_output(self, packet):
+        """ joins the responses of the requests in the packet. """
+        ret = None
+        for request in packet:
+            single = ET.Element(packet.tag)
+            single.append(request)
+            output = self.get_mock_output(
+                ET.tostring(single, encoding='utf-8').decode('utf-8'))
+            response_packet = ET.fromstring(output.encode('utf-8'))
+            if ret is None:
+                ret = ET.Element(response_packet.tag)
+            for response in response_packet:
+                ret.append(response)
+        return ET.tostring(ret, encoding='utf-8').decode('utf-8')
 
     @staticmethod
     def delete_ns(tag):
@@ -136,6 +156,13 @@ class MockSsh(MockCli):
                 command[2] = command[2].replace(folder, '')
         return self.get_mock_output(command), None
 
+    def mock_iter_lines(self, command, timeout=None, check_exit_code=True):
+        out, _ = self.mock_execute(command, timeout, check_exit_code)
+        lines = out.split('\n')
+        if not lines[-1]:
+            lines.pop()
+        return iter(lines)
+
     def mock_init_connection(self, *args):
         pass
 
@@ -147,6 +174,8 @@ def patch_ssh(output=None, mock_map=None):
         @functools.wraps(func)
         @patch(target='storops.connection.connector.SSHConnector.execute',
                new=ssh.mock_execute)
+        @patch(target='storops.connection.connector.SSHConnector.iter_lines',
+               new=ssh.mock_iter_lines)
         @patch(target='storops.connection.connector.SSHConnector.'
                       'init_connection',
                new=ssh.mock_init_connection)
@@ -173,6 +202,8 @@ def patch_nas(xml_output=None, xml_map=None, ssh_output=None, ssh_map=None):
                new=lambda x: 0)
         @patch(target='storops.connection.connector.SSHConnector.execute',
                new=ssh.mock_execute)
+        @patch(target='storops.connection.connector.SSHConnector.iter_lines',
+               new=ssh.mock_iter_lines)
         @patch(target='storops.connection.connector.SSHConnector.'
                       'init_connection',
                new=ssh.mock_init_connection)
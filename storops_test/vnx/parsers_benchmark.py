@@ -0,0 +1,117 @@
+# coding=utf-8
+# Copyright (c) 2015 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the VNX CLI output parsers.
+
+The captured outputs in `block_output` are parsed by the single pass and
+the regex engines of `VNXCliParser`.  The results are stored and compared
+like the ones of `metric_benchmark`:
+
+    python -m storops_test.vnx.parsers_benchmark --parsers VNXLun VNXDisk
+"""
+from __future__ import unicode_literals, print_function
+
+import argparse
+import os
+import timeit
+from datetime import datetime
+
+from storops.lib.common import get_local_folder
+from storops.vnx.parsers import VNXParserConfigFactory
+from storops_test import metric_benchmark
+from storops_test.vnx.cli_mock import MockCli
+from storops_test.vnx.test_parsers import CAPTURED_OUTPUTS
+
+__author__ = 'Cedric Zhuang'
+
+ENGINES = ('regex', 'single_pass')
+
+
+def get_default_output():
+    return os.path.join(get_local_folder(), 'benchmark',
+                        'parsers_benchmark.jsonl')
+
+
+def parse_time(name, filename, single_pass, number=3, repeat=3):
+    """ seconds to parse the output once, best of the repeats. """
+    parser = VNXParserConfigFactory().get(name)
+    output = MockCli.read_file(filename)
+
+    def _parse():
+        parser.parse_all(output)
+
+    try:
+        parser.single_pass = single_pass
+        ret = min(timeit.repeat(_parse, number=number, repeat=repeat))
+    finally:
+        parser.single_pass = True
+    return ret / number
+
+
+def run(parsers=None, number=3, repeat=3):
+    """ runs the benchmark.
+
+    :param parsers: names of the parsers in `CAPTURED_OUTPUTS`, all if not
+        set.
+    :param number: number of the parses timed in each repeat.
+    :param repeat: the best of the repeats is recorded.
+    :return: list of the results, one for each parser and engine.
+    """
+    env = metric_benchmark.get_environment()
+    timestamp = datetime.now().isoformat()
+    ret = []
+    for name, filename in CAPTURED_OUTPUTS:
+        if parsers and name not in parsers:
+            continue
+        objects = len(VNXParserConfigFactory().get(name).parse_all(
+            MockCli.read_file(filename)))
+        for engine in ENGINES:
+            seconds = parse_time(name, filename, engine == 'single_pass',
+                                 number, repeat)
+            ret.append(dict(env, timestamp=timestamp, platform='vnx',
+                            objects=objects,
+                            stage='{}/{}'.format(name, engine),
+                            output=filename, seconds=seconds,
+                            repeat=repeat))
+    return ret
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='benchmark of the VNX CLI output parsers.')
+    parser.add_argument('--parsers', nargs='+',
+                        choices=sorted(name for name, _ in CAPTURED_OUTPUTS),
+                        help='parsers to benchmark, all by default.')
+    parser.add_argument('--number', type=int, default=3,
+                        help='number of the parses timed in each repeat.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the best of the repeats is recorded.')
+    parser.add_argument('--output', default=None,
+                        help='json lines file of the results.  default is '
+                             '{}.'.format(get_default_output()))
+    args = parser.parse_args(args)
+
+    output = args.output
+    if output is None:
+        output = get_default_output()
+    results = run(args.parsers, args.number, args.repeat)
+    metric_benchmark.report(metric_benchmark.compare(
+        results, metric_benchmark.load(output)))
+    metric_benchmark.save(results, output)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -665,6 +665,17 @@ class VNXLunTest(TestCase):
     def test_lun_read_iops(self):
         assert_that(self.lun_5.read_iops, equal_to(2.0))
 
+    @patch_cli
+    def test_lun_window_read_iops(self):
+        assert_that(self.lun_5.get_window_metric_value('read_iops', '1m'),
+                    equal_to(2.0))
+
+    @patch_cli
+    def test_lun_read_iops_aggregates(self):
+        r = self.lun_5.get_metric_aggregates('read_iops', '5m', [95])
+        assert_that(r, equal_to({'count': 1, 'min': 2.0, 'max': 2.0,
+                                 'avg': 2.0, 'p95': 2.0}))
+
     @patch_cli
     def test_lun_read_iops_spa(self):
         assert_that(self.lun_5.read_iops_sp_a, equal_to(1.5))
@@ -18,12 +18,16 @@ from __future__ import unicode_literals
 from unittest import TestCase
 
 from hamcrest import assert_that, equal_to, raises, contains_string, \
-    only_contains
+    only_contains, has_length, instance_of, calling
 
 from storops.exception import VNXNasObjectNotFound, \
-    VNXInvalidMoverID, VNXFileCredentialError
-from storops.vnx.nas_client import NasXmlResponse, XmlStatus
-from storops_test.vnx.nas_mock import MockXmlPost
+    VNXInvalidMoverID, VNXFileCredentialError, VNXBackendError
+from storops.vnx.nas_client import NasXmlResponse, XmlStatus, \
+    VNXNasClient
+from storops.vnx.resource.fs import VNXFileSystemList
+from storops.vnx.resource.mount_point import VNXFsMountPointList
+from storops.vnx.xmlapi import NasXmlBuilder
+from storops_test.vnx.nas_mock import MockXmlPost, patch_post, t_nas
 
 __author__ = 'Cedric Zhuang'
 
@@ -98,3 +102,62 @@ class NasXmlResponseTest(TestCase):
         resp = self.fs_not_found
         assert_that(resp.hex_problem_message_codes,
                     only_contains('0x450010065'))
+
+
+class VNXNasClientBatchTest(TestCase):
+    @patch_post
+    def test_batch_get(self):
+        cli = t_nas()
+        fs_resp, mp_resp, mover_resp = cli.batch_get(
+            'get_filesystem', 'get_fs_mp', ('get_mover', {'full': False}))
+        assert_that(fs_resp.objects,
+                    equal_to(cli.get_filesystem().objects))
+        assert_that(mp_resp.objects, equal_to(cli.get_fs_mp().objects))
+        assert_that(mover_resp.objects,
+                    equal_to(cli.get_mover(full=False).objects))
+
+        fs_list = VNXFileSystemList(cli=cli).update(fs_resp)
+        assert_that(len(fs_list), equal_to(len(fs_resp.objects)))
+        mp_list = VNXFsMountPointList(cli=cli).update(mp_resp)
+        assert_that(len(mp_list), equal_to(len(mp_resp.objects)))
+
+    @patch_post
+    def test_batch_get_single(self):
+        ret = t_nas().batch_get('get_nas_pool')
+        assert_that(ret, has_length(1))
+        assert_that(ret[0], instance_of(NasXmlResponse))
+
+    def test_batch_get_empty(self):
+        assert_that(t_nas().batch_get(), equal_to([]))
+
+    def test_batch_get_not_query(self):
+        assert_that(calling(t_nas().batch_get).with_args(
+            'get_filesystem', ('delete_filesystem', {'fs_id': 1})),
+            raises(ValueError, 'only queries'))
+        assert_that(calling(t_nas().batch_get).with_args('ssh_execute'),
+                    raises(ValueError, 'not a xml api query'))
+
+    def test_batch_rejected(self):
+        # the packet gets one response for all the requests.
+        cli = VNXNasClient('10.110.24.191', 'nasadmin', 'nasadmin')
+        cli._post = lambda req: MockXmlPost.read_file('fs_not_found.xml')
+        ret = cli.batch_get('get_filesystem', 'get_fs_mp')
+        assert_that(ret, has_length(2))
+        assert_that([r.is_ok() for r in ret], only_contains(False))
+
+    def test_batch_count_mismatch(self):
+        cli = VNXNasClient('10.110.24.191', 'nasadmin', 'nasadmin')
+        output = ('<ResponsePacket><Response/><Response/></ResponsePacket>')
+        cli._post = lambda req: output
+        reqs = [NasXmlBuilder.get_nas_pool()] * 3
+        assert_that(calling(cli.request_batch).with_args(reqs),
+                    raises(VNXBackendError, '2 responses for 3 requests'))
+
+    def test_batch_package(self):
+        packet = NasXmlBuilder.batch_package([
+            NasXmlBuilder.get_filesystem(), NasXmlBuilder.get_nas_pool()])
+        assert_that([request[0][0].tag for request in packet],
+                    equal_to(['FileSystemQueryParams',
+                              'StoragePoolQueryParams']))
+        assert_that(calling(NasXmlBuilder.batch_package).with_args([]),
+                    raises(ValueError, 'no query'))
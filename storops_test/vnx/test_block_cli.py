@@ -15,13 +15,23 @@
 #    under the License.
 from __future__ import unicode_literals
 
+import contextlib
+import pickle
+import shutil
+import tempfile
+import threading
+import time
 from unittest import TestCase
 
 from hamcrest import assert_that, contains_string, equal_to, calling, raises, \
-    greater_than, has_items
+    greater_than, has_items, none, same_instance, has_length
+from mock import patch
 
 from storops.exception import VNXSystemDownError, VNXCredentialError
+from storops.lib.metric_exporter import OpenMetricsExporter
+from storops.lib.metric_store import BinaryMetricStore, BinaryMetricReader
 from storops.vnx.block_cli import CliClient
+from storops.vnx.heart_beat import RoundRobinSPPolicy
 from storops.vnx.enums import VNXTieringEnum, VNXProvisionEnum, \
     VNXSPEnum, VNXMigrationRate, VNXLunType, VNXRaidType, VNXUserRoleEnum
 from storops.vnx.resource.lun import VNXLun
@@ -902,3 +912,233 @@ class CliClientTest(TestCase):
         csv = lun_list.get_metrics_csv()
         assert_that(csv, contains_string('LUN 4'))
         assert_that(csv, contains_string('LUN 5'))
+
+    @patch_cli
+    def test_get_rsc_metrics_table(self):
+        lun_list = t_cli().curr_counter.get_rsc_list(VNXLun)
+        table = lun_list.metrics_table()
+        assert_that(len(table), equal_to(len(lun_list)))
+        assert_that(table.ids, has_items('LUN 4', 'LUN 5'))
+        for lun, row in zip(lun_list, table.rows):
+            expected = [getattr(lun, name) for name in table.names]
+            assert_that(str(row), equal_to(str(expected)))
+
+    @patch_cli
+    def test_persist_rsc_metrics_to_store(self):
+        folder = tempfile.mkdtemp(suffix='storops')
+        try:
+            store = BinaryMetricStore(folder)
+            lun_list = t_cli().curr_counter.get_rsc_list(VNXLun)
+            lun_list.persist_metric_data(store=store)
+            reader = BinaryMetricReader.from_store(
+                store, lun_list.get_metric_store_name())
+            ret = reader.read(ids=['LUN 5'], names=['read_iops'])
+            assert_that(len(ret), equal_to(1))
+            assert_that(ret[0][1].rows, equal_to([[2.0]]))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    @patch_cli
+    def test_persist_rsc_metrics_to_exporter(self):
+        exporter = OpenMetricsExporter()
+        lun_list = t_cli().curr_counter.get_rsc_list(VNXLun)
+        lun_list.persist_metric_data(store=exporter)
+        text = exporter.render().decode('utf-8')
+        assert_that(text, contains_string(
+            'storops_read_iops{array="10.244.212.182",type="VNXLun",'
+            'id="LUN 5"} 2\n'))
+
+
+@contextlib.contextmanager
+def patch_execute(client, execute):
+    """ sends the naviseccli commands of the client to `execute`.
+
+    The heart beat of other clients may run at the same time, their
+    commands and the ones not sent by a heart beat, like the security
+    level check, return nothing.
+    """
+    with patch(target='storops.vnx.navi_command.'
+                      'NaviCommand.execute_naviseccli',
+               new=staticmethod(lambda cmd: '')):
+        with patch.object(client.heartbeat, 'execute_naviseccli',
+                          new=execute):
+            yield
+
+
+class CommandRecorder(object):
+    """ records the sps and the concurrency of the naviseccli commands. """
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.ips = []
+        self.commands = []
+        self.max_running = {}
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def execute(self, cmd, *args, **kwargs):
+        if '-h' not in cmd:
+            # commands not sent to the sps
+            return ''
+        ip = cmd[cmd.index('-h') + 1]
+        with self._lock:
+            self.ips.append(ip)
+            self.commands.append(cmd)
+            self._running[ip] = self._running.get(ip, 0) + 1
+            self.max_running[ip] = max(self.max_running.get(ip, 0),
+                                       self._running[ip])
+        time.sleep(self.delay)
+        with self._lock:
+            self._running[ip] -= 1
+        return 'Agent Rev:           7.33.8 (2.97)'
+
+
+class CliClientExecutorTest(TestCase):
+    def setUp(self):
+        self.recorder = CommandRecorder()
+        self.client = CliClient(heartbeat_interval=0, max_workers_per_sp=2)
+        self.client.set_ip('1.1.1.1', '1.1.1.2')
+
+    def tearDown(self):
+        self.client.close()
+
+    def run_cmd(self):
+        with patch_execute(self.client, self.recorder.execute):
+            return self.client.map(lambda _: self.client.get_agent(),
+                                   range(8))
+
+    def test_map_spread_across_sps(self):
+        ret = self.run_cmd()
+        assert_that(len(ret), equal_to(8))
+        assert_that(self.recorder.ips.count('1.1.1.1'), equal_to(4))
+        assert_that(self.recorder.ips.count('1.1.1.2'), equal_to(4))
+
+    def test_map_max_workers_per_sp(self):
+        self.run_cmd()
+        assert_that(self.recorder.max_running,
+                    equal_to({'1.1.1.1': 2, '1.1.1.2': 2}))
+
+    def test_map_max_workers_per_sp_one(self):
+        self.client.max_workers_per_sp = 1
+        self.run_cmd()
+        assert_that(self.recorder.max_running,
+                    equal_to({'1.1.1.1': 1, '1.1.1.2': 1}))
+
+    def test_do_not_capped_out_of_map(self):
+        self.client.max_workers_per_sp = 1
+        running = []
+        lock = threading.Lock()
+        all_running = threading.Event()
+
+        def execute(cmd, *args, **kwargs):
+            if '1.1.1.1' in cmd:
+                with lock:
+                    running.append(cmd)
+                    if len(running) == 4:
+                        all_running.set()
+                # the commands wait for each other, they could not all be
+                # running if capped.
+                all_running.wait(5)
+            return 'Agent Rev:           7.33.8 (2.97)'
+
+        with patch_execute(self.client, execute):
+            threads = [threading.Thread(target=self.client.get_agent,
+                                        kwargs={'ip': '1.1.1.1'})
+                       for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert_that(all_running.is_set(), equal_to(True))
+        assert_that(self.client._sp_semaphores, equal_to({}))
+
+    def test_map_single_item_in_caller_thread(self):
+        ret = self.client.map(lambda _: threading.current_thread(), [1])
+        assert_that(ret, equal_to([threading.current_thread()]))
+        assert_that(self.client._executor, none())
+
+    def test_execute_dual_shared_executor(self):
+        with patch_execute(self.client, self.recorder.execute):
+            self.client.delete_disk('0_0_1')
+            executor = self.client._executor
+            self.client.install_disk('0_0_1')
+        assert_that(self.client._executor, same_instance(executor))
+        assert_that(sorted(self.recorder.ips),
+                    equal_to(['1.1.1.1', '1.1.1.1', '1.1.1.2', '1.1.1.2']))
+
+    def test_execute_dual_in_map(self):
+        with patch_execute(self.client, self.recorder.execute):
+            ret = self.client.map(lambda i: self.client.delete_disk(i),
+                                  range(8))
+        assert_that(len(ret), equal_to(8))
+        assert_that(self.recorder.commands, has_length(16))
+
+    def test_picklable(self):
+        self.client.map(lambda i: i, range(4))
+        client = pickle.loads(pickle.dumps(self.client))
+        assert_that(client.max_workers_per_sp, equal_to(2))
+        assert_that(client._executor, none())
+
+
+class CliClientSPPolicyTest(TestCase):
+    def get_client(self, sp_policy=None):
+        client = CliClient(heartbeat_interval=0, sp_policy=sp_policy)
+        client.set_ip('1.1.1.1', '1.1.1.2')
+        return client
+
+    def run_cmd(self, client, recorder, concurrent=True):
+        with patch_execute(client, recorder.execute):
+            if concurrent:
+                threads = [threading.Thread(target=client.get_agent)
+                           for _ in range(4)]
+                for t in threads:
+                    t.start()
+                    # the command is running when the next one starts
+                    time.sleep(0.02)
+                for t in threads:
+                    t.join()
+            else:
+                for _ in range(4):
+                    client.get_agent()
+
+    def test_default_first(self):
+        recorder = CommandRecorder(0.1)
+        self.run_cmd(self.get_client(), recorder)
+        assert_that(recorder.ips, equal_to(['1.1.1.1'] * 4))
+
+    def test_least_outstanding(self):
+        recorder = CommandRecorder(0.1)
+        self.run_cmd(self.get_client('least_outstanding'), recorder)
+        assert_that(recorder.ips.count('1.1.1.1'), equal_to(2))
+        assert_that(recorder.ips.count('1.1.1.2'), equal_to(2))
+        assert_that(recorder.max_running,
+                    equal_to({'1.1.1.1': 2, '1.1.1.2': 2}))
+
+    def test_first(self):
+        recorder = CommandRecorder(0.1)
+        self.run_cmd(self.get_client('first'), recorder)
+        assert_that(recorder.ips, equal_to(['1.1.1.1'] * 4))
+
+    def test_round_robin(self):
+        recorder = CommandRecorder(0)
+        self.run_cmd(self.get_client('round_robin'), recorder, False)
+        assert_that(recorder.ips, equal_to(['1.1.1.1', '1.1.1.2'] * 2))
+
+    def test_round_robin_picklable(self):
+        client = self.get_client('round_robin')
+        client = pickle.loads(pickle.dumps(client))
+        assert_that(type(client.heartbeat.sp_policy),
+                    equal_to(RoundRobinSPPolicy))
+        recorder = CommandRecorder(0)
+        self.run_cmd(client, recorder, False)
+        assert_that(recorder.ips, equal_to(['1.1.1.1', '1.1.1.2'] * 2))
+
+    def test_outstanding_reset(self):
+        client = self.get_client('least_outstanding')
+        self.run_cmd(client, CommandRecorder(0.01))
+        assert_that([node.outstanding for node in client.heartbeat.nodes],
+                    equal_to([0, 0]))
+
+    def test_ip_not_changed(self):
+        client = self.get_client('round_robin')
+        assert_that([client.ip, client.ip], equal_to(['1.1.1.1'] * 2))
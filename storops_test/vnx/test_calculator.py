@@ -16,10 +16,12 @@ from __future__ import unicode_literals
 
 from unittest import TestCase
 
-from hamcrest import assert_that, instance_of, equal_to, close_to
+from hamcrest import assert_that, instance_of, equal_to, close_to, \
+    same_instance
 
 from storops.vnx.calculator import VNXMetricConfigParser, VNXMetricConfig, \
-    VNXMetricConfigList, minus, div, round_60, add, aggregated_sum
+    VNXMetricConfigList, minus, div, round_60, add, aggregated_sum, \
+    get_value
 from storops.vnx.resource.lun import VNXLun, VNXLunList
 from storops_test.utils import is_nan
 from storops_test.vnx.cli_mock import t_cli, patch_cli
@@ -101,12 +103,28 @@ class AggregatorTest(TestCase):
         ret = aggregated_sum(lun_list, 'consumed_capacity_gbs')
         assert_that(ret, close_to(4911.59, 0.01))
 
+    @patch_cli
+    def test_get_value(self):
+        lun = VNXLun(lun_id=19, cli=t_cli())
+        assert_that(get_value(lun, 'total_capacity_gb'), equal_to(1.0))
+        assert_that(get_value(lun, 'lun_id'), equal_to(19))
+
 
 class VNXMetricConfigCalculatorTest(TestCase):
     def test_get_config(self):
         config = VNXMetricConfigParser.get_config(VNXLun)
         assert_that(config, instance_of(VNXMetricConfigList))
 
+    def test_get_config_cached(self):
+        config = VNXMetricConfigParser.get_config(VNXLun)
+        assert_that(VNXMetricConfigParser.get_config('VNXLun'),
+                    same_instance(config))
+
+    def test_is_metric(self):
+        config = VNXMetricConfigParser.get_config(VNXLun)
+        assert_that(config.is_metric('read_iops'), equal_to(True))
+        assert_that(config.is_metric('name'), equal_to(False))
+
     def test_get_metric_config(self):
         config = VNXMetricConfigParser.get_config(VNXLun)
         metric_config = config.get_metric_config('read_iops')
@@ -16,16 +16,19 @@
 from __future__ import unicode_literals
 
 import pickle
+import threading
 from unittest import TestCase
 
 import time
 from hamcrest import assert_that, equal_to, ends_with, contains_string, \
     greater_than, less_than_or_equal_to, greater_than_or_equal_to, raises, \
-    has_items
+    has_items, calling
 
 from storops_test.vnx.cli_mock import patch_cli
 from storops.exception import VNXSystemDownError, VNXCredentialError
-from storops.vnx.heart_beat import NodeInfo, NodeHeartBeat
+from storops.vnx.heart_beat import NodeInfo, NodeHeartBeat, \
+    LeastOutstandingSPPolicy, LowestLatencySPPolicy, RoundRobinSPPolicy, \
+    FirstSPPolicy, get_sp_policy
 
 __author__ = 'Cedric Zhuang'
 
@@ -220,6 +223,106 @@ class NodeHeartBeatTest(TestCase):
         hb_new.stop()
 
 
+class SPPolicyTest(TestCase):
+    @staticmethod
+    def get_nodes(latency=(0, 0), outstanding=(0, 0)):
+        ret = []
+        for i, name in enumerate(('spb', 'spa')):
+            node = NodeInfo(name, '1.1.1.{}'.format(2 - i))
+            if latency[i]:
+                node.latency = latency[i]
+            node.outstanding = outstanding[i]
+            ret.append(node)
+        return ret
+
+    @staticmethod
+    def select_ip(policy, nodes):
+        return policy.select(nodes).ip
+
+    def test_first(self):
+        nodes = self.get_nodes(outstanding=(0, 3))
+        assert_that(self.select_ip(FirstSPPolicy(), nodes),
+                    equal_to('1.1.1.1'))
+
+    def test_round_robin(self):
+        policy = RoundRobinSPPolicy()
+        nodes = self.get_nodes()
+        ips = [self.select_ip(policy, nodes) for _ in range(3)]
+        assert_that(ips, equal_to(['1.1.1.1', '1.1.1.2', '1.1.1.1']))
+
+    def test_round_robin_concurrent(self):
+        policy = RoundRobinSPPolicy()
+        nodes = self.get_nodes()
+        ips = []
+
+        def _select():
+            for _ in range(500):
+                ips.append(self.select_ip(policy, nodes))
+
+        threads = [threading.Thread(target=_select) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert_that(policy._count, equal_to(2000))
+        assert_that(ips.count('1.1.1.1'), equal_to(1000))
+        assert_that(ips.count('1.1.1.2'), equal_to(1000))
+
+    def test_least_outstanding(self):
+        policy = LeastOutstandingSPPolicy()
+        assert_that(self.select_ip(policy, self.get_nodes()),
+                    equal_to('1.1.1.1'))
+        nodes = self.get_nodes(latency=(1, 5), outstanding=(2, 1))
+        assert_that(self.select_ip(policy, nodes), equal_to('1.1.1.1'))
+        # lower latency if the outstanding commands are the same
+        nodes = self.get_nodes(latency=(1, 5), outstanding=(1, 1))
+        assert_that(self.select_ip(policy, nodes), equal_to('1.1.1.2'))
+
+    def test_lowest_latency(self):
+        policy = LowestLatencySPPolicy()
+        nodes = self.get_nodes(latency=(1, 5), outstanding=(2, 1))
+        assert_that(self.select_ip(policy, nodes), equal_to('1.1.1.2'))
+
+    def test_get_sp_policy(self):
+        assert_that(type(get_sp_policy()), equal_to(FirstSPPolicy))
+        assert_that(type(get_sp_policy('round_robin')),
+                    equal_to(RoundRobinSPPolicy))
+        policy = LowestLatencySPPolicy()
+        assert_that(get_sp_policy(policy), equal_to(policy))
+
+    def test_get_sp_policy_invalid(self):
+        assert_that(calling(get_sp_policy).with_args('abc'),
+                    raises(ValueError, 'invalid sp policy'))
+
+    def test_select_sp_ip(self):
+        hb = NodeHeartBeat(interval=0, sp_policy='round_robin')
+        hb.add('spa', '1.1.1.1')
+        hb.add('spb', '1.1.1.2', False)
+        assert_that([hb.select_sp_ip(), hb.select_sp_ip()],
+                    equal_to(['1.1.1.1', '1.1.1.1']))
+
+    def test_select_sp_ip_down(self):
+        hb = NodeHeartBeat(interval=0)
+        hb.add('spa', '1.1.1.1', False)
+        assert_that(calling(hb.select_sp_ip),
+                    raises(VNXSystemDownError, 'no storage processor'))
+
+    def test_picklable(self):
+        hb = NodeHeartBeat(interval=0, sp_policy='lowest_latency')
+        hb_new = pickle.loads(pickle.dumps(hb))
+        assert_that(type(hb_new.sp_policy), equal_to(LowestLatencySPPolicy))
+
+    def test_picklable_round_robin(self):
+        hb = NodeHeartBeat(interval=0, sp_policy='round_robin')
+        hb.add('spa', '1.1.1.1')
+        hb.add('spb', '1.1.1.2')
+        assert_that(hb.select_sp_ip(), equal_to('1.1.1.1'))
+        hb_new = pickle.loads(pickle.dumps(hb))
+        assert_that(type(hb_new.sp_policy), equal_to(RoundRobinSPPolicy))
+        assert_that([hb_new.select_sp_ip(), hb_new.select_sp_ip()],
+                    equal_to(['1.1.1.2', '1.1.1.1']))
+
+
 class NodeInfoTest(TestCase):
     def test_repr(self):
         info = NodeInfo('spa', '1.1.1.1', True, False)
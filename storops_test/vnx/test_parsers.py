@@ -20,6 +20,7 @@ from unittest import TestCase
 
 from hamcrest import equal_to, assert_that, not_none, none, raises
 
+from storops.lib.resource import Resource, ResourceList
 from storops.vnx.enums import VNXSPEnum
 from storops.vnx.parsers import VNXCliParser, VNXPropDescriptor, \
     VNXParserConfigFactory
@@ -35,6 +36,36 @@ C = VNXPropDescriptor('-c', 'Prop C:')
 ID = VNXPropDescriptor(None, 'ID:', is_index=True)
 
 
+# parser name and the captured output it parses
+CAPTURED_OUTPUTS = (
+    ('VNXLun', 'lun_-list_-all.txt'),
+    ('VNXPool', 'storagepool_-list_-all.txt'),
+    ('VNXDisk', 'getdisk.txt'),
+    ('VNXSPPort', 'port_-list_-sp_-all.txt'),
+    ('VNXSnap', 'snap_-list_-detail.txt'),
+    ('VNXConnectionPort', 'connection_-getport_-all.txt'),
+    ('VNXStorageGroup', 'storagegroup_-list_-host_-iscsiAttributes.txt'),
+    ('VNXRaidGroup', 'getrg.txt'),
+    ('VNXNdu', 'ndu_-list.txt'),
+    ('VNXMirrorView', 'mirror_-sync_-list.txt'),
+)
+
+
+def _to_comparable(value):
+    """ converts the parsed resources to dict for comparison. """
+    if isinstance(value, dict):
+        ret = {k: _to_comparable(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        ret = [_to_comparable(v) for v in value]
+    elif isinstance(value, ResourceList):
+        ret = _to_comparable(value._list)
+    elif isinstance(value, Resource):
+        ret = _to_comparable(value._parsed_resource)
+    else:
+        ret = value
+    return ret
+
+
 class DemoParser(VNXCliParser):
     def __init__(self):
         super(DemoParser, self).__init__()
@@ -166,6 +197,75 @@ class VNXCliParserTest(TestCase):
         assert_that(a0b1.b, equal_to('b1'))
         assert_that(a0b1.c, equal_to('c1'))
 
+    def test_parse_single_pass_same_as_regex(self):
+        output = """
+                ID: test
+                  prop a (NAME):  ab (c)\t
+                Prop B: first
+                Prop B: second
+                Prop C:
+                """
+        parser = DemoParser()
+        parsed = parser.parse(output)
+        parser.single_pass = False
+        expected = parser.parse(output)
+        assert_that(parsed, equal_to(expected))
+        assert_that(parsed.prop_a, equal_to('ab (c)'))
+        assert_that(parsed.prop_b, equal_to('first'))
+        assert_that(parsed.prop_c, equal_to(''))
+
+    def test_parse_single_pass_label_prefix(self):
+        parser = VNXCliParser()
+        parser.add_property(
+            VNXPropDescriptor(None, 'Name', 'short_name'),
+            VNXPropDescriptor(None, 'Name of the Pool:', 'name'))
+        parsed = parser.parse('Name of the Pool: p0')
+        assert_that(parsed.name, equal_to('p0'))
+        assert_that(parsed.short_name, equal_to('of the Pool: p0'))
+
+    def test_parse_single_pass_regex_fallback(self):
+        parser = DemoParserRegexIndex()
+        assert_that(parser.parse('x:1\nvalue: abc').value, equal_to('abc'))
+        assert_that(parser.parse('value: abc'), equal_to({}))
+
+    def test_parse_single_pass_no_index(self):
+        parser = DemoParser()
+        assert_that(parser.parse_single('Prop B: abc'), equal_to({}))
+
+    def test_label_table_reset_by_add_property(self):
+        parser = DemoParserNonIndex()
+        assert_that(parser.parse('Prop D: abc'), equal_to({'prop_b': None}))
+        parser.add_property(VNXPropDescriptor('-d', 'Prop D:'))
+        assert_that(parser.parse('Prop D: abc').prop_d, equal_to('abc'))
+
+    def test_parse_captured_output_single_pass_same_as_regex(self):
+        for name, filename in CAPTURED_OUTPUTS:
+            parser = VNXParserConfigFactory().get(name)
+            output = MockCli.read_file(filename)
+            parsed = _to_comparable(parser.parse_all(output))
+            parser.single_pass = False
+            expected = _to_comparable(parser.parse_all(output))
+            parser.single_pass = True
+            assert_that(parsed, equal_to(expected), filename)
+
+    def test_parse_captured_output_all_parsers_same_as_regex(self):
+        # the outputs are parsed by the parsers of other resources too, to
+        # compare the engines on more labels.
+        parsers = VNXParserConfigFactory().build_all()
+        outputs = [MockCli.read_file(filename)
+                   for _, filename in CAPTURED_OUTPUTS]
+        for name, parser in sorted(parsers.items()):
+            if not isinstance(parser, VNXCliParser):
+                continue
+            for output in outputs:
+                parsed = _to_comparable(parser.parse_all(output))
+                try:
+                    parser.single_pass = False
+                    expected = _to_comparable(parser.parse_all(output))
+                finally:
+                    parser.single_pass = True
+                assert_that(parsed, equal_to(expected), name)
+
 
 class VNXStorageGroupHBAParserTest(TestCase):
     def test_parse(self):
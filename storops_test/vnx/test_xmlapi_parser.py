@@ -0,0 +1,202 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from __future__ import unicode_literals
+
+import json
+import os
+import threading
+import unittest
+
+from hamcrest import assert_that, equal_to, has_length, only_contains, \
+    greater_than_or_equal_to, greater_than
+
+from storops.vnx.xmlapi_parser import XMLAPIParser
+from storops_test.utils import read_test_file
+from storops_test.vnx import xmlapi_benchmark as benchmark
+
+__author__ = 'Cedric Zhuang'
+
+
+def _response(body):
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<ResponsePacket xmlns="http://www.emc.com/schemas/celerra/'
+            'xml_api"><Response>{}</Response></ResponsePacket>'.format(body))
+
+
+_FOLDER = os.path.join('vnx', 'testdata', 'nas_xml_output')
+
+
+def _read(name):
+    return read_test_file(_FOLDER, name)
+
+
+def _all_outputs():
+    """ relative paths of all the xml outputs in `nas_xml_output`. """
+    root = os.path.join(os.path.dirname(os.path.dirname(__file__)), _FOLDER)
+    ret = []
+    for folder, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith('.xml'):
+                path = os.path.relpath(os.path.join(folder, filename), root)
+                ret.append(path.replace(os.sep, '/'))
+    return sorted(ret)
+
+
+def _expected():
+    """ results of the parser before the streaming rewrite.
+
+    `nas_xml_output_parsed.json` has the results of each output in
+    `nas_xml_output`, and the ones of the responses scaled to 10 objects
+    by `xmlapi_benchmark`.
+    """
+    return json.loads(read_test_file(os.path.join('vnx', 'testdata'),
+                                     'nas_xml_output_parsed.json'))
+
+
+class XMLAPIParserTest(unittest.TestCase):
+    def test_parse_bytes(self):
+        xml = _read('fs_not_found.xml')
+        parser = XMLAPIParser()
+        assert_that(parser.parse(xml.encode('utf-8')),
+                    equal_to(parser.parse(xml)))
+
+    def test_parse_non_ascii(self):
+        xml = _response('<FileSystem fileSystem="1" name="fs_中"/>')
+        ret = XMLAPIParser().parse(xml.encode('utf-8'))
+        assert_that(ret['objects'][0]['name'], equal_to('fs_中'))
+
+    def test_problem_text(self):
+        ret = XMLAPIParser().parse(_read('fs_not_found.xml'))
+        assert_that(ret['maxSeverity'], equal_to('warning'))
+        assert_that(ret['problems'], has_length(2))
+        assert_that(ret['problems'][1]['Diagnostics'],
+                    equal_to('Migration file system not found.'))
+
+    def test_li_text_across_chunks(self):
+        aliases = ['alias_{}_{}'.format(i, 'x' * 100) for i in range(500)]
+        xml = _response(
+            '<CifsServer mover="1" name="cifs"><Aliases>{}</Aliases>'
+            '</CifsServer>'.format(
+                ''.join('<li>{}</li>'.format(a) for a in aliases)))
+        ret = XMLAPIParser().parse(xml)
+        assert_that(ret['objects'][0]['Aliases'], equal_to(aliases))
+
+    def test_merge_by_identifier(self):
+        xml = _response(
+            '<FileSystem fileSystem="1" name="fs1"/>'
+            '<FileSystem fileSystem="2" name="fs2"/>'
+            '<FileSystemCapacityInfo fileSystem="1" volumeSize="10"/>'
+            '<FileSystem fileSystem="3" name="fs3"/>'
+            '<FileSystemCapacityInfo fileSystem="3" volumeSize="30"/>'
+            '<FileSystemCapacityInfo fileSystem="2" volumeSize="20"/>')
+        ret = XMLAPIParser().parse(xml)
+        assert_that([o['volumeSize'] for o in ret['objects']],
+                    equal_to(['10', '20', '30']))
+
+    def test_merge_after_status(self):
+        xml = _response(
+            '<Mover mover="1" name="server_2"/>'
+            '<Mover mover="2" name="server_3"/>'
+            '<MoverInterface mover="1" name="if1"/>'
+            '<MoverStatus mover="1" version="T8.1"/>'
+            '<MoverInterface mover="2" name="if2"/>')
+        ret = XMLAPIParser().parse(xml)
+        assert_that([[i['name'] for i in o['MoverInterface']]
+                     for o in ret['objects']],
+                    equal_to([['if1'], ['if2']]))
+        assert_that(ret['objects'][0]['version'], equal_to('T8.1'))
+
+    def test_scaled_interfaces(self):
+        xml, _ = benchmark.scale('Mover', 50)
+        ret = XMLAPIParser().parse(xml)
+        movers = [o for o in ret['objects'] if 'MoverInterface' in o]
+        for mover in movers:
+            assert_that([i['mover'] for i in mover['MoverInterface']],
+                        only_contains(mover['mover']))
+
+    def test_parse_all(self):
+        xml = (
+            '<ResponsePacket xmlns="http://www.emc.com/schemas/celerra/'
+            'xml_api"><Response><QueryStatus maxSeverity="ok"/>'
+            '<FileSystem fileSystem="1" name="fs1"/>'
+            '<FileSystemCapacityInfo fileSystem="1" volumeSize="10"/>'
+            '</Response><Response><QueryStatus maxSeverity="warning"/>'
+            '<Mover mover="1" name="server_2"/>'
+            '<MoverStatus mover="1" version="T8.1"/></Response>'
+            '</ResponsePacket>')
+        fs_ret, mover_ret = XMLAPIParser().parse_all(xml)
+        assert_that(fs_ret['maxSeverity'], equal_to('ok'))
+        assert_that(fs_ret['objects'], equal_to(
+            [{'fileSystem': '1', 'name': 'fs1', 'volumeSize': '10'}]))
+        assert_that(mover_ret['maxSeverity'], equal_to('warning'))
+        assert_that(mover_ret['objects'], equal_to(
+            [{'mover': '1', 'name': 'server_2', 'version': 'T8.1'}]))
+
+    def test_parse_all_single(self):
+        xml = _read('fs_not_found.xml')
+        ret = XMLAPIParser().parse_all(xml)
+        assert_that(ret, equal_to([XMLAPIParser().parse(xml)]))
+
+    def test_shared_parser(self):
+        parser = XMLAPIParser()
+        xml, count = benchmark.scale('FileSystem', 200)
+        results = []
+
+        def _parse():
+            results.append(parser.parse(xml))
+
+        threads = [threading.Thread(target=_parse) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert_that(results, has_length(4))
+        for ret in results:
+            assert_that(ret['objects'], has_length(count))
+            assert_that(ret, equal_to(results[0]))
+
+
+class XMLAPIParserExpectedTest(unittest.TestCase):
+    """ the parser gives the same results as the one before the rewrite. """
+
+    def setUp(self):
+        self.expected = _expected()
+
+    def test_outputs(self):
+        outputs = _all_outputs()
+        assert_that(outputs, has_length(greater_than(100)))
+        assert_that(sorted(self.expected['outputs']), equal_to(outputs))
+        for name in outputs:
+            assert_that(XMLAPIParser().parse(_read(name)),
+                        equal_to(self.expected['outputs'][name]), name)
+
+    def test_scaled(self):
+        assert_that(sorted(self.expected['scaled']),
+                    equal_to(sorted(benchmark.QUERIES)))
+        for name in sorted(benchmark.QUERIES):
+            xml, _ = benchmark.scale(name, 10)
+            assert_that(XMLAPIParser().parse(xml),
+                        equal_to(self.expected['scaled'][name]), name)
+
+
+class XMLAPIBenchmarkTest(unittest.TestCase):
+    def test_scale(self):
+        xml, count = benchmark.scale('FileSystem', 100)
+        ret = XMLAPIParser().parse(xml)
+        assert_that(ret['objects'], has_length(count))
+        assert_that(count, greater_than_or_equal_to(100))
+        ids = set(o['fileSystem'] for o in ret['objects'])
+        assert_that(ids, has_length(count))
@@ -0,0 +1,166 @@
+# coding=utf-8
+# Copyright (c) 2016 EMC Corporation.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+""" benchmark of the VNX File XML API response parser.
+
+The query responses in `nas_xml_output` are scaled by copying their
+objects with new ids, then parsed by `XMLAPIParser`.  The results are
+stored and compared like the ones of `metric_benchmark`:
+
+    python -m storops_test.vnx.xmlapi_benchmark --sizes 1000 10000
+"""
+from __future__ import unicode_literals, print_function
+
+import argparse
+import copy
+import os
+import time
+from datetime import datetime
+from xml.etree import ElementTree
+
+from storops.lib.common import get_local_folder
+from storops.vnx.xmlapi import XML_NS
+from storops.vnx.xmlapi_parser import XMLAPIParser
+from storops_test import metric_benchmark
+from storops_test.utils import read_test_file
+
+__author__ = 'Cedric Zhuang'
+
+ElementTree.register_namespace('', XML_NS)
+
+DEFAULT_SIZES = (1000, 10000)
+
+# {name: (folder, file name)} of the query responses
+QUERIES = {
+    'FileSystem': ('FileSystemQueryParams', 'get_fs_all.xml'),
+    'Mount': ('MountQueryParams', 'get_all.xml'),
+    'Checkpoint': ('CheckpointQueryParams', 'get_all_fs_snap.xml'),
+    'Mover': ('MoverQueryParams', 'get_mover_all.xml'),
+}
+
+# attributes referring to the objects, changed in each copy
+_ID_ATTRS = ('fileSystem', 'mover', 'moverHost', 'checkpoint',
+             'checkpointOf')
+_ID_STEP = 100000
+
+
+def get_default_output():
+    return os.path.join(get_local_folder(), 'benchmark',
+                        'xmlapi_benchmark.jsonl')
+
+
+def _read_query(name):
+    folder, filename = QUERIES[name]
+    return read_test_file(os.path.join('vnx', 'testdata', 'nas_xml_output',
+                                       'Query', folder), filename)
+
+
+def _update_ids(elem, i):
+    for child in elem.iter():
+        for key in _ID_ATTRS:
+            value = child.get(key)
+            if value is not None and value.isdigit():
+                child.set(key, str(int(value) + i * _ID_STEP))
+        name = child.get('name')
+        if name is not None:
+            child.set('name', '{}_{}'.format(name, i))
+
+
+def scale(name, count):
+    """ response of the query with about `count` objects.
+
+    :return: the response in bytes and the number of the objects.
+    """
+    root = ElementTree.fromstring(_read_query(name).encode('utf-8'))
+    response = root[0]
+    template = [child for child in response
+                if not child.tag.endswith('QueryStatus')]
+    template_count = len(XMLAPIParser().parse(
+        ElementTree.tostring(root))['objects'])
+    copies = max(1, -(-count // template_count))
+    for child in template:
+        response.remove(child)
+    for i in range(copies):
+        for child in template:
+            elem = copy.deepcopy(child)
+            _update_ids(elem, i)
+            response.append(elem)
+    return ElementTree.tostring(root), copies * template_count
+
+
+def _time(func, repeat):
+    ret = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        if ret is None or elapsed < ret:
+            ret = elapsed
+    return ret
+
+
+def run(sizes=None, queries=None, repeat=3):
+    """ runs the benchmark.
+
+    :param sizes: numbers of the objects.
+    :param queries: names in `QUERIES`, all if not set.
+    :param repeat: the best of the repeats is recorded.
+    :return: list of the results, one for each query and size.
+    """
+    if sizes is None:
+        sizes = DEFAULT_SIZES
+    if queries is None:
+        queries = sorted(QUERIES)
+    env = metric_benchmark.get_environment()
+    timestamp = datetime.now().isoformat()
+    parser = XMLAPIParser()
+    ret = []
+    for name in queries:
+        for size in sizes:
+            xml, objects = scale(name, size)
+            seconds = _time(lambda: parser.parse(xml), repeat)
+            ret.append(dict(env, timestamp=timestamp, platform='vnx_file',
+                            objects=objects, stage=name, seconds=seconds,
+                            bytes=len(xml), repeat=repeat))
+    return ret
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='benchmark of the XML API response parser.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES),
+                        help='numbers of the objects.')
+    parser.add_argument('--queries', nargs='+', choices=sorted(QUERIES),
+                        help='queries to benchmark, all by default.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='the best of the repeats is recorded.')
+    parser.add_argument('--output', default=None,
+                        help='json lines file of the results.  default is '
+                             '{}.'.format(get_default_output()))
+    args = parser.parse_args(args)
+
+    output = args.output
+    if output is None:
+        output = get_default_output()
+    results = run(args.sizes, args.queries, args.repeat)
+    metric_benchmark.report(metric_benchmark.compare(
+        results, metric_benchmark.load(output)))
+    metric_benchmark.save(results, output)
+    return results
+
+
+if __name__ == '__main__':
+    main()